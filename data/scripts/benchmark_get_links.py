@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Compares get_links(with_text=True) against loading one TextFamily per linked section, as it did before.
+Reports the number of text queries each way: the old way makes at least one per section and language.
+Takes a ref as the command line argument, e.g:
+# python benchmark_get_links.py "Genesis 1:1"
+"""
+import sys
+import timeit
+
+from sefaria.model import *
+from sefaria.client.wrapper import get_links, grab_section_from_text
+
+tref = sys.argv[1] if len(sys.argv) > 1 else "Genesis 1:1"
+number = 3
+
+
+def get_links_per_section():
+    links = get_links(tref, with_text=False)
+    texts = {}
+    for com in links:
+        com_oref = Ref(com["ref"])
+        top_oref = com_oref.top_section_ref()
+        top_nref = top_oref.normal()
+        if top_nref not in texts:
+            texts[top_nref] = TextFamily(top_oref, context=0, commentary=False, pad=False).contents()
+        sections, toSections = com_oref.sections[1:], com_oref.toSections[1:]
+        com["text"] = grab_section_from_text(sections, texts[top_nref]["text"], toSections)
+        com["he"]   = grab_section_from_text(sections, texts[top_nref]["he"], toSections)
+    return links, len(texts)
+
+
+from sefaria.model.text import text_family_cache
+text_family_cache.clear()
+old_links, sections = get_links_per_section()
+assert old_links == get_links(tref)
+
+orefs = [Ref(com["ref"]).top_section_ref() for com in old_links]
+stats = {"queries": 0}
+for lang in ["en", "he"]:
+    TextChunk.bulk(orefs, lang, stats=stats)
+
+before = timeit.timeit(lambda: (text_family_cache.clear(), get_links_per_section()), number=number)
+after = timeit.timeit(lambda: get_links(tref), number=number)
+
+print "{}: {} links to {} sections in {} books".format(tref, len(old_links), sections, len({o.book for o in orefs}))
+print "one TextFamily per section: {:.3f}s per call, at least {} text queries".format(before / number, sections * 2)
+print "get_links():                {:.3f}s per call, {} text queries".format(after / number, stats["queries"])
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""
+Compares the lookup tables of encode_hebrew_numeral() and decode_hebrew_numeral() against the algorithms they are built from.
+Takes the number of passes as an optional command line argument, e.g:
+# python benchmark_hebrew_numerals.py 20
+"""
+import sys
+import timeit
+
+from sefaria.utils import hebrew as h
+
+number = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+h.encode_hebrew_numeral(1)  # build the tables
+numbers = range(1, 1200, 7) + range(5000, 5800, 13)
+strings = [h.encode_hebrew_numeral(x) for x in numbers]
+
+assert [h.decode_hebrew_numeral(s) for s in strings] == [h._decode_hebrew_numeral(s) for s in strings]
+
+table_encode = timeit.timeit(lambda: [h.encode_hebrew_numeral(x) for x in numbers], number=number)
+algorithm_encode = timeit.timeit(lambda: [h._encode_hebrew_numeral(x) for x in numbers], number=number)
+table_decode = timeit.timeit(lambda: [h.decode_hebrew_numeral(s) for s in strings], number=number)
+algorithm_decode = timeit.timeit(lambda: [h._decode_hebrew_numeral(s) for s in strings], number=number)
+
+calls = len(numbers) * number
+print "{} numbers, {} passes".format(len(numbers), number)
+print "encode: table {:.2f}us, algorithm {:.2f}us per call".format(table_encode / calls * 1e6, algorithm_encode / calls * 1e6)
+print "decode: table {:.2f}us, algorithm {:.2f}us per call".format(table_decode / calls * 1e6, algorithm_decode / calls * 1e6)
+print "speedup: encode {:.1f}x, decode {:.1f}x".format(algorithm_encode / table_encode, algorithm_decode / table_decode)
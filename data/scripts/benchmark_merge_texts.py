@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Compares merge_texts() against the recursive implementation it replaced, on the versions of a deep commentary.
+If the text has fewer than two versions in the language, a second one is derived from the first by blanking every other segment.
+Takes a title and language as command line arguments, e.g:
+# python benchmark_merge_texts.py "Rashi on Genesis" he
+"""
+import sys
+import timeit
+
+from sefaria.model import *
+from sefaria.model.text import merge_texts
+from sefaria.utils.util import list_depth
+
+title = sys.argv[1] if len(sys.argv) > 1 else "Rashi on Genesis"
+lang = sys.argv[2] if len(sys.argv) > 2 else "he"
+number = 3
+
+
+def merge_texts_recursive(text, sources):
+    """
+    The previous implementation of merge_texts(), for comparison.
+    """
+    if not (len(text) and len(sources)):
+        return ["", []]
+
+    depth = list_depth(text)
+    if depth > 2:
+        results = []
+        result_sources = []
+        for x in range(max(map(len, text))):
+            translations = map(None, *text)[x]
+            remove_nones = lambda x: x or []
+            result, source = merge_texts_recursive(map(remove_nones, translations), sources)
+            results.append(result)
+            result_sources += source
+        return [results, result_sources]
+
+    if depth == 1:
+        text = map(lambda x: [x], text)
+
+    merged = map(None, *text)
+    text = []
+    text_sources = []
+    for verses in merged:
+        index, value = 0, 0
+        for i, version in enumerate(verses):
+            if version:
+                index = i
+                value = version
+                break
+        text.append(value)
+        text_sources.append(sources[index])
+
+    if depth == 1:
+        text = text[0]
+    return [text, text_sources]
+
+
+def blank_alternate(ja, state=[0]):
+    if isinstance(ja, list):
+        return [blank_alternate(x) for x in ja]
+    state[0] += 1
+    return ja if state[0] % 2 else ""
+
+
+versions = VersionSet({"title": title, "language": lang}).array()
+texts = [v.chapter for v in versions]
+sources = [v.versionTitle for v in versions]
+if len(texts) < 2:
+    texts.append(blank_alternate(texts[0]))
+    sources.append("Derived")
+
+assert merge_texts(texts, sources) == merge_texts_recursive(texts, sources)
+
+before = timeit.timeit(lambda: merge_texts_recursive(texts, sources), number=number)
+after = timeit.timeit(lambda: merge_texts(texts, sources), number=number)
+
+print "{} ({}): {} versions, depth {}, {} passes".format(title, lang, len(texts), list_depth(texts) - 1, number)
+print "recursive merge:  {:.3f}s per pass".format(before / number)
+print "merge_texts():    {:.3f}s per pass".format(after / number)
+print "speedup: {:.1f}x".format(before / after)
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+Compares loading N refs with one TextChunk each against a single TextChunk.bulk() call.
+The refs are the first verses of each chapter of a few books, plus some ranges and commentary, as a source sheet or a link list would request them.
+Takes an optional number of passes as the command line argument, e.g:
+# python benchmark_text_chunk_bulk.py 5
+"""
+import sys
+import timeit
+
+from sefaria.model import *
+
+number = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+trefs = []
+for title in ["Genesis", "Exodus", "Psalms"]:
+    trefs += ["{} {}:{}".format(title, i, i % 5 + 1) for i in range(1, 31)]
+    trefs += ["{} {}:1-4".format(title, i) for i in range(1, 11)]
+trefs += ["Rashi on Genesis {}:1".format(i) for i in range(1, 21)]
+trefs += ["Shabbat {}a:1".format(i) for i in range(2, 22)]
+orefs = [Ref(tref) for tref in trefs]
+
+
+def load_single(lang):
+    return [TextChunk(oref, lang) for oref in orefs]
+
+
+def load_bulk(lang):
+    return TextChunk.bulk(orefs, lang)
+
+
+for lang in ["en", "he"]:
+    assert [c.text for c in load_single(lang)] == [c.text for c in load_bulk(lang)]
+
+    single = timeit.timeit(lambda: load_single(lang), number=number)
+    bulk = timeit.timeit(lambda: load_bulk(lang), number=number)
+
+    print "{}: {} refs x {} passes".format(lang, len(orefs), number)
+    print "single TextChunks: {:.3f}s, {:.1f}ms per pass".format(single, single * 1000 / number)
+    print "TextChunk.bulk():  {:.3f}s, {:.1f}ms per pass".format(bulk, bulk * 1000 / number)
+    print "speedup: {:.1f}x".format(single / bulk)
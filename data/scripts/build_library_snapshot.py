@@ -0,0 +1,12 @@
+"""
+Builds the precomputed library snapshot read by each process on startup.  Run during deploy, after any Index changes.
+Writes to settings.LIBRARY_SNAPSHOT_PATH, or to the path given as the first argument, e.g:
+# python build_library_snapshot.py /var/tmp/library_snapshot.pickle
+"""
+import sys
+
+from sefaria.model import *
+
+path = sys.argv[1] if len(sys.argv) > 1 else None
+path = library.build_snapshot(path)
+print "Wrote library snapshot for Index generation {} to {}".format(library.index_generation(), path)
@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+"""
+Builds the link_counts collection, of the number of links between each pair of books, used by the Link Explorer.
+Run on deploy.  Until it has run, Link changes don't update link_counts, and the Link Explorer builds it on first use.
+Afterwards it is kept up to date as Links are created, moved and deleted.  Rerun after changing links directly in the database.
+"""
+from sefaria.model import *
+from sefaria.model.link import rebuild_link_counts
+from sefaria.system.database import db
+
+rebuild_link_counts()
+print "{} book pairs".format(db.link_counts.count() - 1)  # less the "built" marker
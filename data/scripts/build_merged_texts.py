@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+"""
+Builds the merged_texts collection: the merge of all of the Versions of each book and language that has more than one.
+Run once when deploying merged texts, or to repair them after Versions were changed directly in the database.
+Afterwards, the collection is kept up to date as Versions are saved.
+"""
+from sefaria.model import *
+from sefaria.model.merged_text import rebuild_all_merged_texts
+from sefaria.system.database import db
+
+db.merged_texts.ensure_index([("title", 1), ("language", 1)], unique=True)
+rebuild_all_merged_texts()
+print "{} merged texts".format(db.merged_texts.count())
@@ -0,0 +1,24 @@
+"""
+Writes the indexable addresses of each link's refs, and indexes them, so that links can be found with
+range queries rather than with regexes over refs.  See sefaria.model.link.ref_address().
+Safe to rerun.  Links whose refs don't parse are reported and left as they are.
+"""
+from sefaria.model import *
+from sefaria.model.link import ref_address, ensure_link_address_index
+from sefaria.system.database import db
+from sefaria.system.exceptions import InputError
+
+ensure_link_address_index()
+
+updated, failed = 0, 0
+for l in db.links.find({}, {"refs": 1}):
+    try:
+        addresses = [ref_address(Ref(tref)) for tref in l["refs"]]
+    except InputError:
+        print u"Failed to parse refs of link {}: {}".format(l["_id"], l["refs"])
+        failed += 1
+        continue
+    db.links.update({"_id": l["_id"]}, {"$set": {"addresses": addresses}})
+    updated += 1
+
+print "Updated {} links.  {} failed.".format(updated, failed)
@@ -0,0 +1,26 @@
+"""
+Writes the canonical key of each link, removes exact duplicates (the same two refs, in either order),
+and creates the unique index on key, so that the database rejects duplicate links.  See sefaria.model.link.link_key().
+Of each set of duplicates, the earliest link is kept.  The others are deleted through Link.delete(),
+so that link counts, link graphs and the links generations of their books follow.  Safe to rerun.
+"""
+from sefaria.model import *
+from sefaria.model.link import link_key, ensure_link_key_index
+from sefaria.system.database import db
+
+seen = {}
+updated, removed = 0, 0
+for l in db.links.find({}, {"refs": 1, "type": 1}).sort("_id", 1):
+    key = link_key(l["refs"])
+    if key in seen:
+        print u"Removing duplicate link {} of {}: {}".format(l["_id"], seen[key], l["refs"])
+        Link().load_by_id(l["_id"]).delete()
+        removed += 1
+        continue
+    seen[key] = l["_id"]
+    db.links.update({"_id": l["_id"]}, {"$set": {"key": key}})
+    updated += 1
+
+ensure_link_key_index()
+
+print "Updated {} links.  Removed {} duplicates.".format(updated, removed)
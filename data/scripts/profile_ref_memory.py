@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Measures the memory held by each cached Ref.
+Parses a Ref for every segment of a book, keeps them all alive, and reports:
+ - the growth in process RSS, per Ref
+ - the bytes owned by each Ref itself: the object, its sections and its memo fields.  Shared objects (Index, nodes, book names) are not counted.
+Takes a book title as the command line argument, e.g:
+# python profile_ref_memory.py Genesis
+"""
+import sys
+import resource
+
+from sefaria.model import *
+
+book = sys.argv[1] if len(sys.argv) > 1 else "Genesis"
+
+
+def rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def own_size(oref):
+    size = sys.getsizeof(oref)
+    for attr in ["sections", "toSections", "_context", "_spanned_refs", "_ranged_refs"]:
+        val = getattr(oref, attr, None)
+        if val is not None:
+            size += sys.getsizeof(val)
+    if hasattr(oref, "__dict__"):
+        size += sys.getsizeof(oref.__dict__)
+    return size
+
+
+ja = Ref(book).get_state_ja()
+trefs = []
+for section in ja.sections():
+    section_tref = book + " " + ":".join(str(i + 1) for i in section)
+    for j in range(ja.sub_array_length(section)):
+        trefs.append(section_tref + ":" + str(j + 1))
+
+Ref.clear_cache()
+before = rss_kb()
+refs = [Ref(tref) for tref in trefs]
+after = rss_kb()
+
+n = len(refs)
+print "{}: {} segment Refs".format(book, n)
+print "RSS growth: {:.0f} bytes per Ref".format((after - before) * 1024.0 / n)
+print "Own size: {:.0f} bytes per Ref".format(sum(own_size(r) for r in refs) / float(n))
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Measures Ref construction throughput, with and without the compiled regex cache on JaggedArrayNode.
+The Ref cache is cleared before every pass, so that each Ref is parsed from its string.
+
+"before" drops the compiled regexes before each Ref, as every Ref parse did before the cache existed.
+"after" leaves the compiled regexes in place.
+"""
+import timeit
+
+from sefaria.model import *
+from sefaria.model.text import JaggedArrayNode
+
+trefs = []
+for title in ["Genesis", "Exodus", "Psalms", "Mishnah Peah", "Rashi on Genesis"]:
+    for i in range(1, 21):
+        trefs.append("{} {}:{}".format(title, i, i % 7 + 1))
+trefs += ["Shabbat {}a:{}".format(i, i % 5 + 1) for i in range(2, 22)]
+trefs += [u"בראשית {}".format(n) for n in [u"א", u"ב", u"ג", u"יא", u"כב"]]
+trefs += [u"שבת {}".format(n) for n in [u"ד.", u"ה:", u"כב."]]
+
+
+def parse_before():
+    Ref.clear_cache()
+    for tref in trefs:
+        JaggedArrayNode.clear_regex_cache()
+        Ref(tref)
+
+
+def parse_after():
+    Ref.clear_cache()
+    for tref in trefs:
+        Ref(tref)
+
+
+parse_after()  # warm the title and node caches for both runs
+
+number = 20
+before = timeit.timeit(parse_before, number=number)
+after = timeit.timeit(parse_after, number=number)
+n = len(trefs) * number
+
+print "Ref construction: {} refs x {} passes".format(len(trefs), number)
+print "before (no compiled regex cache): {:.3f}s, {:.0f} refs/sec".format(before, n / before)
+print "after (compiled regex cache):     {:.3f}s, {:.0f} refs/sec".format(after, n / after)
+print "speedup: {:.1f}x".format(before / after)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Rebuilds the citation links of every book with text, or of the books named on the command line,
+scanning the text for citations in a pool of worker processes.  See sefaria.helper.link.rebuild_links_from_text().
+Progress is printed as each book goes, and the title of each finished book is appended to a state file.
+An interrupted run, restarted with the same state file, skips the books already finished
+and rebuilds the one it was in the middle of from the start.  A book that fails is reported and left out of the state file,
+so that the next run tries it again.  Delete the state file to rebuild everything again.
+e.g:
+# python rebuild_citation_links.py --processes 8 --state citation_links.done
+# python rebuild_citation_links.py "Mishnah Berakhot" "Rashi on Genesis"
+"""
+import argparse
+import codecs
+import os
+import sys
+import time
+
+from sefaria.model import *
+from sefaria.helper.link import rebuild_links_from_text, citation_pool
+
+parser = argparse.ArgumentParser(description="Rebuild citation links, in parallel and resumably.")
+parser.add_argument("titles", nargs="*", help="Titles of the books to rebuild.  All books with text if none are given.")
+parser.add_argument("--processes", type=int, default=4, help="Number of worker processes scanning for citations")
+parser.add_argument("--state", default="rebuild_citation_links.done", help="File listing the books already finished")
+parser.add_argument("--user", type=int, default=1, help="User id recorded in history for the new links")
+args = parser.parse_args()
+
+titles = [t.decode("utf-8") for t in args.titles] or sorted(VersionSet().distinct("title"))
+
+done = set()
+if os.path.exists(args.state):
+    with codecs.open(args.state, "r", "utf-8") as f:
+        done = {line.strip() for line in f if line.strip()}
+todo = [t for t in titles if t not in done]
+print "{} books, {} already done".format(len(titles), len(titles) - len(todo))
+
+
+def report(title, n):
+    def progress(scanned, total):
+        sys.stdout.write(u"\r[{}/{}] {}: {}/{} segments".format(n, len(todo), title, scanned, total).encode("utf-8"))
+        sys.stdout.flush()
+    return progress
+
+
+pool = citation_pool(args.processes) if args.processes > 1 else None
+total_links = 0
+start = time.time()
+try:
+    for n, title in enumerate(todo, 1):
+        try:
+            added = rebuild_links_from_text(title, args.user, pool=pool, progress=report(title, n))
+        except Exception as e:
+            print u"\n[{}/{}] {}: failed: {}".format(n, len(todo), title, e).encode("utf-8")
+            continue
+        total_links += added
+        print u"\n[{}/{}] {}: {} links".format(n, len(todo), title, added).encode("utf-8")
+        with codecs.open(args.state, "a", "utf-8") as f:
+            f.write(title + u"\n")
+finally:
+    if pool:
+        pool.close()
+        pool.join()
+
+print "Added {} links in {:.0f}s".format(total_links, time.time() - start)
@@ -198,6 +198,25 @@ class ApiTest(SefariaTestCase):
         self.assertEqual(data["sections"],    ["2a", 1, 1])
         self.assertEqual(data["toSections"],  ["2a", 1, 1])
 
+    def test_api_get_text_not_modified(self):
+        response = c.get('/api/texts/Job.5:2-4')
+        self.assertEqual(200, response.status_code)
+        etag = response["ETag"]
+        response = c.get('/api/texts/Job.5:2-4', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(304, response.status_code)
+        response = c.get('/api/texts/Job.5:2-4?notes=1', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, response.status_code)
+        from sefaria.model.text import bump_generation
+        bump_generation(u"state:Job")  # as when the VersionState is refreshed, changing next and prev
+        response = c.get('/api/texts/Job.5:2-4', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, response.status_code)
+
+        response = c.get('/api/links/Job.5:2')
+        self.assertEqual(200, response.status_code)
+        etag = response["ETag"]
+        response = c.get('/api/links/Job.5:2', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(304, response.status_code)
+
     def test_api_get_text_range(self):
         response = c.get('/api/texts/Job.5:2-4')
         self.assertEqual(200, response.status_code)
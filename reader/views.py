@@ -12,6 +12,7 @@ from django.contrib.auth.decorators import login_required
 from django.utils.http import urlquote
 from django.utils.encoding import iri_to_uri
 from django.views.decorators.csrf import ensure_csrf_cookie, csrf_exempt, csrf_protect
+from django.views.decorators.http import condition
 from django.contrib.auth.models import User
 from sefaria.client.wrapper import format_object_for_client, format_note_object_for_client, get_notes, get_links
 from sefaria.system.exceptions import InputError
@@ -23,6 +24,8 @@ from sefaria.workflows import *
 from sefaria.reviews import *
 from sefaria.summaries import get_toc, flatten_toc, get_or_make_summary_node
 from sefaria.model import *
+from sefaria.model.text import fetch_concurrently, content_revision
+from sefaria.model.version_state import make_text_preview
 from sefaria.sheets import LISTED_SHEETS, get_sheets_for_ref
 from sefaria.utils.users import user_link, user_started_text
 from sefaria.utils.util import list_depth
@@ -53,13 +56,13 @@ def reader(request, tref, lang=None, version=None):
             return response
 
         # Return Text TOC if this is a bare text title
-        if oref.sections == []:
+        if not oref.sections:
             return text_toc(request, oref.normal())
 
         # BANDAID - for spanning refs, return the first section
         oref = oref.padded_ref()
         if oref.is_spanning():
-            first_oref = oref.split_spanning_ref()[0]
+            first_oref = next(oref.iter_split_spanning_ref())
             url = "/" + first_oref.url()
             if lang and version:
                 url += "/%s/%s" % (lang, version)
@@ -87,11 +90,18 @@ def reader(request, tref, lang=None, version=None):
                 text["_loadSources"] = True
                 hasSidebar = True if len(text["layer"]) else False
         else:
-            text = TextFamily(Ref(tref), lang=lang, version=version, commentary=True).contents()
+            uid = request.user.id
+            # oref is already known to be valid.  The notes and sheets are fetched alongside the text, and are only
+            # wasted in the rare case that building the text fails and returns an error, in which case they are dropped.
+            text, notes, sheets = fetch_concurrently([
+                lambda: TextFamily(Ref(tref), lang=lang, version=version, commentary=True).contents(),
+                lambda: get_notes(oref, uid=uid),
+                lambda: get_sheets_for_ref(tref)
+            ])
             hasSidebar = True if len(text["commentary"]) else False
             if not "error" in text:
-                text["notes"]  = get_notes(oref, uid=request.user.id)
-                text["sheets"] = get_sheets_for_ref(tref)
+                text["notes"]  = notes
+                text["sheets"] = sheets
                 hasSidebar = True if len(text["notes"]) or len(text["sheets"]) else hasSidebar
         text["next"] = oref.next_section_ref().normal() if oref.next_section_ref() else None
         text["prev"] = oref.prev_section_ref().normal() if oref.prev_section_ref() else None
@@ -157,7 +167,7 @@ def edit_text(request, ref=None, lang=None, version=None):
     if ref is not None:
 
         oref = Ref(ref)
-        if oref.sections == []:
+        if not oref.sections:
             # Only text name specified, let them chose section first
             initJSON = json.dumps({"mode": "add new", "newTitle": oref.normal()})
             mode = "Add"
@@ -360,8 +370,50 @@ def count_and_index(c_oref, c_lang, vtitle, to_count=1, to_index=1):
         }).save()
 
 
+def revision_condition(keys_func):
+    """
+    Decorator adding conditional GET support to an API view whose response depends only on the generation counters
+    (see sefaria.model.text.content_revision()) named by keys_func(request, *args, **kwargs).
+    ETag and Last-Modified headers are derived from the counters, and a matching If-None-Match or If-Modified-Since
+    is answered with a 304 before the view runs.  keys_func returns None for requests that can't be cached this way.
+    """
+    def revision(request, *args, **kwargs):
+        if not hasattr(request, "_content_revision"):
+            try:
+                keys = keys_func(request, *args, **kwargs)
+            except InputError:
+                keys = None  # let the view report the error
+            request._content_revision = content_revision(keys) if keys else (None, None)
+        return request._content_revision
+
+    return condition(etag_func=lambda request, *args, **kwargs: revision(request, *args, **kwargs)[0],
+                     last_modified_func=lambda request, *args, **kwargs: revision(request, *args, **kwargs)[1])
+
+
+def texts_api_revision_keys(request, tref, lang=None, version=None):
+    if request.method != "GET" or request.GET.get("layer"):
+        return None
+    if int(request.GET.get("notes", 0)) or int(request.GET.get("sheets", 0)):
+        return None  # notes and sheets have no revision counter
+    book = Ref(tref).book
+    keys = ["index", u"text:" + book, u"state:" + book]  # next and prev come from the VersionState
+    if bool(int(request.GET.get("commentary", True))):
+        keys += [u"links:" + book, "text"]  # links carry the text of other books
+    return keys
+
+
+def links_api_revision_keys(request, link_id_or_ref=None):
+    if request.method != "GET" or link_id_or_ref is None:
+        return None
+    keys = ["index", u"links:" + Ref(link_id_or_ref).book]
+    if int(request.GET.get("with_text", 1)):
+        keys += ["text"]
+    return keys
+
+
 @catch_error_as_json
 @csrf_exempt
+@revision_condition(texts_api_revision_keys)
 def texts_api(request, tref, lang=None, version=None):
     oref = Ref(tref)
     if request.method == "GET":
@@ -372,18 +424,27 @@ def texts_api(request, tref, lang=None, version=None):
         version    = version.replace("_", " ") if version else None
         layer_name = request.GET.get("layer", None)
 
-        #text = get_text(tref, version=version, lang=lang, commentary=commentary, context=context, pad=pad)
-        text = TextFamily(oref, version=version, lang=lang, commentary=commentary, context=context, pad=pad).contents()
-
-        # Use a padded ref for calculating next and prev
+        # Use a padded ref for calculating next and prev, and for notes
         # TODO: what if pad is false and the ref is of an entire book?
         # Should next_section_ref return None in that case?
-        oref               = oref.padded_ref() if pad else oref
+        padded_oref = oref.padded_ref() if pad else oref
+        uid = request.user.id
+        with_notes = int(request.GET.get("notes", 0))
+        with_sheets = int(request.GET.get("sheets", 0))
+
+        #text = get_text(tref, version=version, lang=lang, commentary=commentary, context=context, pad=pad)
+        text, notes, sheets = fetch_concurrently([
+            lambda: TextFamily(oref, version=version, lang=lang, commentary=commentary, context=context, pad=pad).contents(),
+            lambda: get_notes(padded_oref, uid=uid) if with_notes else [],
+            lambda: get_sheets_for_ref(tref) if with_sheets else []
+        ])
+
+        oref               = padded_oref
         text["next"]       = oref.next_section_ref().normal() if oref.next_section_ref() else None
         text["prev"]       = oref.prev_section_ref().normal() if oref.prev_section_ref() else None
         text["commentary"] = text.get("commentary", [])
-        text["notes"]      = get_notes(oref, uid=request.user.id) if int(request.GET.get("notes", 0)) else []
-        text["sheets"]     = get_sheets_for_ref(tref) if int(request.GET.get("sheets", 0)) else []
+        text["notes"]      = notes
+        text["sheets"]     = sheets
 
         if layer_name:
             layer = Layer().load({"urlkey": layer_name})
@@ -583,37 +644,15 @@ def text_preview_api(request, title):
     for text 'title'
     """
     oref = Ref(title)
-    text = TextFamily(oref, pad=False, commentary=False)
-
-    def text_preview(en, he):
-        """
-        Returns a jagged array terminating in dicts like {'he': '', 'en': ''} which offers preview
-        text merging what's available in jagged string arrays 'en' and 'he'.
-        """
-        n_chars = 80
-        en = [""] if en == [] or not isinstance(en, list) else en
-        he = [""] if he == [] or not isinstance(he, list) else he
-      
-        def preview(section):
-            """Returns a privew string for list section"""
-            section =[s for s in section if isinstance(s, basestring)]
-            section = " ".join(map(unicode, section))
-            return strip_tags(section[:n_chars]).strip()
-
-
-        if not any(isinstance(x, list) for x in en+he):
-             return { 'en': preview(en), 'he': preview(he) }
-        else:
-            zipped = map(None, en, he)
-            return [text_preview(x[0], x[1]) for x in zipped]
-
-    if oref.index_node.depth == 1:
-        # Give deeper previews for texts with depth 1 (boring to look at otherwise)
-        text.text, text.he = [[i] for i in text.text], [[i] for i in text.he]
-    preview = text_preview(text.text, text.he) if (text.text or text.he) else [];
+    state = VersionState().load({"title": oref.book}, {"preview": 1})
+    preview = getattr(state, "preview", None) if state else None
+    if preview is None:
+        # States refreshed before previews were stored
+        text = TextFamily(oref, pad=False, commentary=False)
+        preview = make_text_preview(text.text, text.he, oref.index_node.depth)
 
     response = oref.index.contents()
-    response['preview'] = preview if isinstance(preview, list) else [preview]
+    response['preview'] = preview
     response["heSectionNames"] = map(hebrew_term, response["sectionNames"])
 
     return jsonResponse(response, callback=request.GET.get("callback", None))
@@ -621,6 +660,7 @@ def text_preview_api(request, title):
 
 @catch_error_as_json
 @csrf_exempt
+@revision_condition(links_api_revision_keys)
 def links_api(request, link_id_or_ref=None):
     """
     API for textual links.
@@ -53,7 +53,7 @@ def remove_trailing_empty_segments():
     """
     Removes empty segments from the end of any text section.
     """
-    texts = model.VersionSet()
+    texts = model.VersionSet().stream()
     for text in texts:
         if not model.Ref.is_ref(text.title):
             continue # Ignore text versions we don't understand
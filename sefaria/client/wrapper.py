@@ -1,9 +1,14 @@
 import re
+import logging
+from collections import OrderedDict
 
 from sefaria.model import *
+from sefaria.model.link import links_to_ref
 from sefaria.system.exceptions import InputError
 from sefaria.utils.users import user_link
 
+logger = logging.getLogger(__name__)
+
 
 def format_link_object_for_client(link, with_text, ref, pos=None):
     """
@@ -121,44 +126,47 @@ def get_links(tref, with_text=True):
     """
     Return a list of links tied to 'ref' in client format.
     If with_text, retrieve texts for each link.
+    The texts of all of the linked sections are loaded together, with one query per book and language.
     """
-    links = []
     oref = Ref(tref)
     nRef = oref.normal()
-    reRef = oref.regex()
 
-    # for storing all the section level texts that need to be looked up
-    texts = {}
+    # pairs of client format link and the Ref of the linked text
+    linked = []
 
-    linkset = LinkSet({"refs": {"$regex": reRef}})
     # For all links that mention ref (in any position)
-    for link in linkset:
-        # each link contins 2 refs in a list
-        # find the position (0 or 1) of "anchor", the one we're getting links for
-        pos = 0 if re.match(reRef, link.refs[0]) else 1
+    # each link contins 2 refs in a list, and pos is the position (0 or 1) of "anchor", the one we're getting links for
+    for link, pos in links_to_ref(oref):
         try:
             com = format_link_object_for_client(link, False, nRef, pos)
         except InputError:
             # logger.warning("Bad link: {} - {}".format(link.refs[0], link.refs[1]))
             continue
+        linked.append((com, Ref(com["ref"]) if with_text else None))
 
-        # Rather than getting text with each link, walk through all links here,
-        # caching text so that redudant DB calls can be minimized
-        if with_text:
-            com_oref = Ref(com["ref"])
+    # Rather than getting text with each link, collect the top level section of every link,
+    # and load all of them at once, so that redundant DB calls can be minimized
+    if with_text:
+        top_orefs = OrderedDict()
+        for com, com_oref in linked:
             top_oref = com_oref.top_section_ref()
-            top_nref = top_oref.normal()
-
-            # Lookup and save top level text, only if we haven't already
-            if top_nref not in texts:
-                #texts[top_nref] = get_text(top_nref, context=0, commentary=False, pad=False)
-                texts[top_nref] = TextFamily(top_oref, context=0, commentary=False, pad=False).contents()
-
+            top_orefs.setdefault(top_oref.normal(), top_oref)
+
+        stats = {"queries": 0}
+        texts = {}  # for storing all the section level texts that need to be looked up
+        for lang in ["en", "he"]:
+            chunks = TextChunk.bulk(top_orefs.values(), lang, stats=stats)
+            for top_nref, chunk in zip(top_orefs.keys(), chunks):
+                texts.setdefault(top_nref, {})[lang] = chunk.text
+        logger.debug(u"get_links({}): {} links, {} sections, {} text queries".format(nRef, len(linked), len(top_orefs), stats["queries"]))
+
+        for com, com_oref in linked:
+            text = texts[com_oref.top_section_ref().normal()]
             sections, toSections = com_oref.sections[1:], com_oref.toSections[1:]
-            com["text"] = grab_section_from_text(sections, texts[top_nref]["text"], toSections)
-            com["he"]   = grab_section_from_text(sections, texts[top_nref]["he"],   toSections)
+            com["text"] = grab_section_from_text(sections, text["en"], toSections)
+            com["he"]   = grab_section_from_text(sections, text["he"], toSections)
 
-        links.append(com)
+    links = [com for com, _ in linked]
 
     return links
 
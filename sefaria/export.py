@@ -14,7 +14,7 @@ from pprint import pprint
 from datetime import datetime
 
 import sefaria.model as model
-from sefaria.model.text import merge_texts
+from sefaria.model.text import merge_texts, _flatten_source_map
 from sefaria.utils.talmud import section_to_daf
 from sefaria.system.exceptions import InputError
 from summaries import order
@@ -182,6 +182,17 @@ def export_merged(title, lang=None):
 		doc["text"]          = text_doc["chapter"]
 		doc["versions"]      = [(text_doc["versionTitle"], text_doc["versionSource"])]
 	else:
+		merged_doc = db.merged_texts.find_one({"title": title, "language": lang})
+		if merged_doc:
+			version_sources = {text["versionTitle"]: text["versionSource"] for text in text_docs}
+			merged_titles = set(_flatten_source_map(merged_doc["sources"]))
+			doc.update({
+				"text": merged_doc["chapter"],
+				"versions": [(vtitle, version_sources.get(vtitle)) for vtitle in merged_titles],
+			})
+			export_text(doc)
+			return
+
 		texts = []
 		sources = []
 		for text in text_docs:
@@ -229,25 +240,37 @@ def export_links():
 							"Category 2",
 						 ])
 		links = db.links.find().sort([["refs.0", 1]])
+		batch = []
 		for link in links:
-			if random() > .99:
-				print link["refs"][0]
-
-			try:
-				oref1 = model.Ref(link["refs"][0])
-				oref2 = model.Ref(link["refs"][1])
-			except InputError:
-				continue
-
-			writer.writerow([
-							link["refs"][0],
-							link["refs"][1],
-							link["type"],
-							oref1.book,
-							oref2.book,
-							oref1.index.categories[0],
-							oref2.index.categories[0],
-			])
+			batch.append(link)
+			if len(batch) == 10000:
+				write_links(writer, batch)
+				batch = []
+		write_links(writer, batch)
+
+
+def write_links(writer, links):
+	"""
+	Writes a CSV row for each of 'links' whose refs both parse.
+	"""
+	orefs = model.library.parse_refs([tref for link in links for tref in (link["refs"][0], link["refs"][1])])
+	for i, link in enumerate(links):
+		if random() > .99:
+			print link["refs"][0]
+
+		oref1, oref2 = orefs[2 * i], orefs[2 * i + 1]
+		if isinstance(oref1, InputError) or isinstance(oref2, InputError):
+			continue
+
+		writer.writerow([
+						link["refs"][0],
+						link["refs"][1],
+						link["type"],
+						oref1.book,
+						oref2.book,
+						oref1.index.categories[0],
+						oref2.index.categories[0],
+		])
 
 
 def export_all():
@@ -1,8 +1,12 @@
 # -*- coding: utf-8 -*-
 from sefaria.model import *
+from sefaria.model.link import link_query
 from sefaria.system.exceptions import DuplicateRecordError, InputError
 import sefaria.tracker as tracker
 
+import logging
+logger = logging.getLogger(__name__)
+
 
 def add_commentary_links(tref, user, **kwargs):
     """
@@ -10,6 +14,14 @@ def add_commentary_links(tref, user, **kwargs):
     E.g., for the ref 'Sforno on Kohelet 3:2', automatically set links for
     Kohelet 3:2 <-> Sforno on Kohelet 3:2:1, Kohelet 3:2 <-> Sforno on Kohelet 3:2:2, etc.
     for each segment of text (comment) that is in 'Sforno on Kohelet 3:2'.
+    The links are saved together, skipping any that already exist.  See tracker.add_many().
+    """
+    tracker.add_many(user, Link, _commentary_links(tref), **kwargs)
+
+
+def _commentary_links(tref):
+    """
+    :return: list of the links to add for each comment in the commentary text denoted by 'tref'.  See add_commentary_links().
     """
     text = TextFamily(Ref(tref), commentary=0, context=0, pad=False).contents()
     tref = Ref(tref).normal()
@@ -19,35 +31,26 @@ def add_commentary_links(tref, user, **kwargs):
     if len(text["sections"]) == len(text["sectionNames"]):
         # this is a single comment, trim the last secton number (comment) from ref
         book = book[0:book.rfind(":")]
-        link = {
+        return [{
             "refs": [book, tref],
             "type": "commentary",
             "anchorText": "",
             "auto": True,
             "generated_by": "add_commentary_links"
-        }
-        try:
-            tracker.add(user, Link, link, **kwargs)
-        except DuplicateRecordError as e:
-            pass
+        }]
 
     elif len(text["sections"]) == (len(text["sectionNames"]) - 1):
         # This means that the text (and it's corresponding ref) being posted has the amount of sections like the parent text
         # (the text being commented on) so this is single group of comments on the lowest unit of the parent text.
         # and we simply iterate and create a link for each existing one to point to the same unit of parent text
         length = max(len(text["text"]), len(text["he"]))
-        for i in range(length):
-                link = {
-                    "refs": [book, tref + ":" + str(i + 1)],
-                    "type": "commentary",
-                    "anchorText": "",
-                    "auto": True,
-                    "generated_by": "add_commentary_links"
-                }
-                try:
-                    tracker.add(user, Link, link, **kwargs)
-                except DuplicateRecordError as e:
-                    pass
+        return [{
+            "refs": [book, tref + ":" + str(i + 1)],
+            "type": "commentary",
+            "anchorText": "",
+            "auto": True,
+            "generated_by": "add_commentary_links"
+        } for i in range(length)]
 
     elif len(text["sections"]) > 0:
         # any other case where the posted ref sections do not match the length of the parent texts sections
@@ -55,8 +58,6 @@ def add_commentary_links(tref, user, **kwargs):
         # in order to be able to match the commentary to the basic parent text units,
         # recur on each section
         length = max(len(text["text"]), len(text["he"]))
-        for i in range(length):
-            add_commentary_links("%s:%d" % (tref, i + 1), user)
     else:
         #This is a special case of the above, where the sections length is 0 and that means this is
         # a whole text that has been posted. For  this we need a better way than get_text() to get the correct length of
@@ -66,8 +67,11 @@ def add_commentary_links(tref, user, **kwargs):
         #length = len(text_counts["counts"])
         sn = StateNode(tref)
         length = sn.ja('all').length()
-        for i in range(length):
-            add_commentary_links("%s:%d" % (tref, i+1), user)
+
+    links = []
+    for i in range(length):
+        links += _commentary_links("%s:%d" % (tref, i + 1))
+    return links
 
 
 def rebuild_commentary_links(tref, user, **kwargs):
@@ -84,11 +88,10 @@ def rebuild_commentary_links(tref, user, **kwargs):
             rebuild_commentary_links(c, user, **kwargs)
         return
 
-    links = LinkSet({
-                        "refs": {"$regex": oref.regex()}, 
-                        "generated_by": "add_commentary_links",
-                    })
-    for link in links:
+    query = link_query(oref)
+    query["generated_by"] = "add_commentary_links"
+    links = LinkSet(query)
+    for link in links.stream():
         try:
             oref1, oref2 = Ref(link.refs[0]), Ref(link.refs[1])
         except InputError:
@@ -105,8 +108,18 @@ def add_links_from_text(ref, lang, text, text_id, user, **kwargs):
     ref and the mentioned text.
 
     text["text"] may be a list of segments, an individual segment, or None.
+    The links are saved together, skipping any that already exist.  See tracker.add_many().
 
     Lev - added return on 13 July 2014
+    :return: list of the links that were added
+    """
+    links = tracker.add_many(user, Link, _links_from_text(ref, lang, text, text_id), **kwargs)
+    return [link.contents() for link in links]
+
+
+def _links_from_text(ref, lang, text, text_id):
+    """
+    :return: list of the links to add for the references in text.  See add_links_from_text().
     """
     if not text:
         return []
@@ -114,37 +127,103 @@ def add_links_from_text(ref, lang, text, text_id, user, **kwargs):
         links = []
         for i in range(len(text)):
             subtext = text[i]
-            single = add_links_from_text("%s:%d" % (ref, i + 1), lang, subtext, text_id, user, **kwargs)
-            links += single
+            links += _links_from_text("%s:%d" % (ref, i + 1), lang, subtext, text_id)
         return links
     elif isinstance(text, basestring):
-        links = []
         refs = library.get_refs_in_string(text, lang)
-        for oref in refs:
-            link = {
-                "refs": [ref, oref.normal()],
+        return [{
+            "refs": [ref, oref.normal()],
+            "type": "",
+            "auto": True,
+            "generated_by": "add_links_from_text",
+            "source_text_oid": text_id
+        } for oref in refs]
+    return []
+
+
+def rebuild_links_from_text(title, user, pool=None, chunksize=200, progress=None):
+    """
+    Deletes all of the citatation generated links from 'title'
+    then rebuilds them.
+    The citations in each segment of each version are found in chunks of segments,
+    in a worker process of pool if one is given (see citation_pool()), and the links of each chunk are saved together.
+    :param pool: optional multiprocessing.Pool from citation_pool(), to scan the segments in parallel
+    :param chunksize: The number of segments scanned at a time
+    :param progress: optional function, called with (segments scanned, total segments) after each chunk
+    :return: The number of links added
+    """
+    oref = Ref(title)
+    versions = VersionSet({"title": oref.normal()}).array()
+    LinkSet({"generated_by": "add_links_from_text", "source_text_oid": {"$in": [v._id for v in versions]}}).delete()
+
+    segments = []  # (ref, lang, text, version _id)
+    for version in versions:
+        if isinstance(getattr(version, "chapter", None), list):
+            segments += [(tref, version.language, st, version._id) for tref, st in _text_segments(oref, version.chapter)]
+    chunks = [segments[i:i + chunksize] for i in range(0, len(segments), chunksize)]
+    jobs = [[(tref, lang, st) for tref, lang, st, _ in chunk] for chunk in chunks]
+    results = pool.imap(_citations_in_segments, jobs) if pool else (_citations_in_segments(job) for job in jobs)
+
+    added, scanned = 0, 0
+    for chunk, citations in zip(chunks, results):
+        links = []
+        for (tref, lang, st, text_id), cited in zip(chunk, citations):
+            links += [{
+                "refs": [tref, cited_ref],
                 "type": "",
                 "auto": True,
                 "generated_by": "add_links_from_text",
                 "source_text_oid": text_id
-            }
-            try:
-                tracker.add(user, Link, link, **kwargs)
-                links += [link]
-            except InputError as e:
-                pass
-        return links
+            } for cited_ref in cited]
+        added += len(tracker.add_many(user, Link, links))
+        scanned += len(chunk)
+        if progress:
+            progress(scanned, len(segments))
+    return added
 
 
-def rebuild_links_from_text(title, user):
+def citation_pool(processes):
     """
-    Deletes all of the citatation generated links from 'title'
-    then rebuilds them. 
+    :return: multiprocessing.Pool for rebuild_links_from_text(), whose workers start with the title matchers already built.
+    The caller should close() and join() it when done.
     """
-    title = Ref(title).normal()
-    versions = VersionSet({"title": title})
-    links = LinkSet({"title": title, "generated_by": "add_links_from_text"})
-    links.delete()
+    import multiprocessing
+    _warm_citation_matchers()  # Forked workers inherit these
+    return multiprocessing.Pool(processes, initializer=_warm_citation_matchers)
 
-    for version in versions:
-        add_links_from_text(title, version.language, version.chapter, version._id, user)
+
+def _warm_citation_matchers():
+    for lang in ["en", "he"]:
+        library.all_titles_trie(lang)
+
+
+def _text_segments(oref, text):
+    """
+    Yields (normal ref, text) for each non empty segment of the jagged array text, which is the content of oref.
+    """
+    for i, subtext in enumerate(text):
+        if not subtext:
+            continue
+        if isinstance(subtext, list):
+            if oref.index_node.depth > len(oref.sections) + 1:
+                for segment in _text_segments(oref.subref(i + 1), subtext):
+                    yield segment
+        elif isinstance(subtext, basestring):
+            yield oref.subref(i + 1).normal(), subtext
+
+
+def _citations_in_segments(segments):
+    """
+    Finds the refs cited in each of segments.  Runs in a worker process of citation_pool(), so returns strings rather than Refs.
+    :param segments: list of (ref, lang, text)
+    :return: list, parallel to segments, of lists of the normal refs cited in each segment.
+        A segment whose citations can't be parsed is skipped.  Any other error is raised, and fails the rebuild of the book.
+    """
+    results = []
+    for tref, lang, st in segments:
+        try:
+            results.append([oref.normal() for oref in library.get_refs_in_string(st, lang)])
+        except InputError as e:
+            logger.warning(u"Failed to scan {} for citations: {}".format(tref, e))
+            results.append([])
+    return results
@@ -72,6 +72,9 @@ def collapse_activity(activity):
     Returns a list of activity items in which edits / additions to consecutive segments are collapsed
     into a single entry.
     """
+    # Only text edits can be collapsed, so only their refs are parsed.  A ref that fails to parse is held as its InputError.
+    trefs = [a["ref"] for a in activity if "ref" in a and a.get("rev_type") in ("edit text", "add text")]
+    orefs = dict(zip(trefs, library.parse_refs(trefs)))
 
     def continues_streak(a, streak):
         """Returns True if 'a' continues the streak in 'streak'"""
@@ -84,7 +87,7 @@ def collapse_activity(activity):
                 a["rev_type"] not in ("edit text", "add text") or \
                 b["rev_type"] not in ("edit text", "add text") or \
                 a["version"] != b["version"] or \
-                Ref(a["ref"]).section_ref() != Ref(b["ref"]).section_ref():
+                orefs[a["ref"]].section_ref() != orefs[b["ref"]].section_ref():
 
                 return False
         except:
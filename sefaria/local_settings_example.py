@@ -73,6 +73,26 @@ SEFARIA_DATA_PATH = '/path/to/you/data/dir' # used for exporting texts
 
 GOOGLE_ANALYTICS_CODE = 'your google analytics code'
 
+# Maximum number of Ref objects held in each process's Ref cache.  0 or None for unbounded.
+REF_CACHE_SIZE = 200000
+
+# Query links by their indexed addresses.  Run data/scripts/migrate_link_addresses.py before turning on.
+LINK_ADDRESS_QUERIES = False
+
+# Answer link queries from an in-memory graph of all links, loaded in each process on first use.
+LINK_GRAPH = False
+
+# Precomputed library title and node tables, built during deploy with data/scripts/build_library_snapshot.py.
+# None to compute the tables in each process.
+LIBRARY_SNAPSHOT_PATH = None # e.g. SEFARIA_DATA_PATH + '/library_snapshot.pickle'
+
+# Number of section texts, as loaded by TextFamily, to hold in each process's memory.  0 turns the cache off.
+TEXT_FAMILY_CACHE_SIZE = 2000
+
+# Load the parts of a text (both languages, links, versions, notes, sheets) in parallel, on a pool of this many threads per process.
+TEXT_FAMILY_CONCURRENT = False
+TEXT_FAMILY_THREADS = 8
+
 # Integration with a NationBuilder list
 NATIONBUILDER = False
 NATIONBUILDER_SLUG = ""
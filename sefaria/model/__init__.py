@@ -19,9 +19,9 @@ and access directly as:
 import abstract
 
 # not sure why we have to do this now - it wasn't previously required
-import history, text, link, note, layer, notification, queue, lock, following, user_profile, version_state, translation_request
+import history, text, link, note, layer, notification, queue, lock, following, user_profile, version_state, translation_request, merged_text
 
-from history import History, HistorySet, log_add, log_delete, log_update, log_text
+from history import History, HistorySet, log_add, log_add_many, log_delete, log_update, log_text
 from text import library, build_node, get_index, TermScheme, Index, IndexSet, CommentaryIndex, Version, VersionSet, TextChunk, TextFamily, Ref, merge_texts
 from link import Link, LinkSet, get_link_counts, get_book_link_collection
 from note import Note, NoteSet
@@ -33,5 +33,10 @@ from translation_request import TranslationRequest, TranslationRequestSet
 from following import FollowRelationship, FollowersSet, FolloweesSet
 from user_profile import UserProfile, annotate_user_list
 from version_state import VersionState, VersionStateSet, StateNode, refresh_all_states
+from merged_text import MergedText, MergedTextSet
 
 import dependencies
+
+from sefaria.settings import LIBRARY_SNAPSHOT_PATH
+if LIBRARY_SNAPSHOT_PATH:
+    library.load_snapshot()
@@ -9,9 +9,10 @@ import copy
 #
 
 from bson.objectid import ObjectId
+from pymongo.errors import BulkWriteError
 
 from sefaria.system.database import db
-from sefaria.system.exceptions import InputError
+from sefaria.system.exceptions import InputError, DuplicateRecordError
 
 logging.basicConfig()
 logger = logging.getLogger("abstract")
@@ -92,10 +93,11 @@ class AbstractMongoRecord(object):
         self.load_from_dict(attrs)
         return self.save()
 
-    def save(self):
+    def save(self, **kwargs):
         """
         Save the object to the Mongo data store.
         On completion, will emit a 'save' notification.  If a tracked attribute has changed, will emit an 'attributeChange' notification.
+        :param kwargs: passed on to the subscribers of the 'save' notification
         :return: the object
         """
         is_new_obj = self.is_new()
@@ -129,7 +131,7 @@ class AbstractMongoRecord(object):
         self._post_save()
         '''
 
-        notify(self, "save", orig_vals=self.pkeys_orig_values)
+        notify(self, "save", orig_vals=self.pkeys_orig_values, **kwargs)
         if is_new_obj:
             notify(self, "create")
 
@@ -140,6 +142,72 @@ class AbstractMongoRecord(object):
 
         return self
 
+    @classmethod
+    def insert_many(cls, objs, batch_size=1000):
+        """
+        Saves many new objects, with an unordered bulk insert for each batch rather than a save() for each object.
+        Objects that fail to normalize with an InputError, or that are rejected by _pre_save_many() or by a unique index, are skipped.
+        Emits the 'save' and 'create' notifications for the objects of each batch together.  See notify_many().
+        :param objs: list of new objects of this class
+        :return: list of the objects that were saved
+        """
+        assert not cls.second_save
+        saved = []
+        for i in range(0, len(objs), batch_size):
+            batch = []
+            for obj in objs[i:i + batch_size]:
+                assert obj.is_new()
+                try:
+                    obj._normalize()
+                except InputError as e:
+                    logger.warning(u"Skipping {} that failed to normalize: {}".format(cls.__name__, e))
+                    continue
+                assert obj._validate()
+                batch.append(obj)
+            batch = cls._pre_save_many(batch) if batch else []
+            if not batch:
+                continue
+
+            bulk = getattr(db, cls.collection).initialize_unordered_bulk_op()
+            for obj in batch:
+                obj._id = ObjectId()
+                bulk.insert(obj._saveable_attrs())
+            rejected = set()
+            try:
+                bulk.execute()
+            except BulkWriteError as e:
+                errors = e.details.get("writeErrors", [])
+                if e.details.get("writeConcernErrors") or any(err["code"] not in (11000, 11001) for err in errors):
+                    raise
+                rejected = {err["index"] for err in errors}
+            for j in rejected:
+                del batch[j]._id
+            batch = [obj for j, obj in enumerate(batch) if j not in rejected]
+
+            notify_many(cls, batch, "save")
+            notify_many(cls, batch, "create")
+            if cls.track_pkeys:
+                for obj in batch:
+                    obj._set_pkeys()
+            saved += batch
+        return saved
+
+    @classmethod
+    def _pre_save_many(cls, objs):
+        """
+        Runs _pre_save() on each of a batch of objects about to be inserted by insert_many().
+        Subclasses may override this to make the checks for the whole batch at once.
+        :return: list of the objects to insert.  Those that would duplicate existing records are left out.
+        """
+        ret = []
+        for obj in objs:
+            try:
+                obj._pre_save()
+            except DuplicateRecordError:
+                continue
+            ret.append(obj)
+        return ret
+
     def delete(self):
         if self.is_new():
             raise InputError("Can not delete {} that doesn't exist in database.".format(type(self).__name__))
@@ -256,16 +324,51 @@ class AbstractMongoSet(collections.Iterable):
 
     def __init__(self, query={}, page=0, limit=0, sort=[["_id", 1]], proj=None):
         self.raw_records = getattr(db, self.recordClass.collection).find(query, proj).sort(sort).skip(page * limit).limit(limit)
-        self.has_more = limit != 0 and self.raw_records.count() == limit
+        self._query = query
+        self._sort = sort
+        self._skip = page * limit
+        self._limit = limit
+        self._has_more = None
         self.records = None
         self.current = 0
         self.max = None
         self._local_iter = None
 
+    @property
+    def has_more(self):
+        """
+        True if this set was given a limit, and the query matches exactly that many records.
+        Counted on first access, rather than with an extra query for every set.
+        """
+        if self._has_more is None:
+            self._has_more = self._limit != 0 and self.raw_records.count() == self._limit
+        return self._has_more
+
     def __iter__(self):
         self.__read_records()
         return iter(self.records)
 
+    def stream(self, batch_size=1000, proj=None):
+        """
+        Yields the records of this set one at a time, hydrating each one as the cursor reaches it.
+        Unlike iterating over the set, the records are not kept, so a scan of a whole collection runs in constant memory.
+        The set itself is left unread, and can still be iterated afterwards.
+        :param batch_size: Number of records fetched from Mongo in each round trip
+        :param proj: A projection to use in place of the set's own.
+            Records loaded with a projection are missing the other fields, and should not be saved.
+        """
+        if self.records is not None:
+            for rec in self.records:
+                yield rec
+            return
+
+        if proj is None:
+            cursor = self.raw_records.clone()
+        else:
+            cursor = getattr(db, self.recordClass.collection).find(self._query, proj).sort(self._sort).skip(self._skip).limit(self._limit)
+        for rec in cursor.batch_size(batch_size):
+            yield self.recordClass(attrs=rec)
+
     def __getitem__(self, item):
         self.__read_records()
         return self.records[item]
@@ -395,6 +498,7 @@ New : green
 """
 
 deps = {}
+many_deps = {}
 
 
 def notify(inst, action, **kwargs):
@@ -417,8 +521,8 @@ def notify(inst, action, **kwargs):
             raise Exception("Missing required argument {} in notify {}, {}".format(arg, inst, action))
 
     if action == "attributeChange":
-        callbacks = deps.get((type(inst), action, kwargs["attr"]), None)
-        logger.debug("Notify: " + str(inst) + "." + kwargs["attr"] + ": " + kwargs["old"] + " is becoming " + kwargs["new"])
+        callbacks = deps.get((type(inst), action, kwargs["attr"]), [])
+        logger.debug(u"Notify: {}.{}: {} is becoming {}".format(inst, kwargs["attr"], kwargs["old"], kwargs["new"]))
     else:
         logger.debug("Notify: " + str(inst) + " is being " + action + "d.")
         callbacks = deps.get((type(inst), action, None), [])
@@ -427,8 +531,37 @@ def notify(inst, action, **kwargs):
         logger.debug("Notify: Calling " + callback.__name__ + "() for " + inst.__class__.__name__ + " " + action)
         callback(inst, **kwargs)
 
+    if action != "attributeChange":
+        for callback in many_deps.get((type(inst), action), []):
+            logger.debug("Notify: Calling " + callback.__name__ + "() for " + inst.__class__.__name__ + " " + action)
+            callback([inst], **kwargs)
+
 
-def subscribe(callback, klass, action, attr=None):
+def notify_many(klass, insts, action, **kwargs):
+    """
+    Notifies the subscribers to action of each of insts, all instances of klass, as by insert_many().
+    Callbacks subscribed with many=True are called once with the list of insts, others once for each instance.
+    :param action: "save", "delete" or "create"
+    """
+    if not insts:
+        return
+    logger.debug("Notify: " + str(len(insts)) + " " + klass.__name__ + " records are being " + action + "d.")
+    for inst in insts:
+        for callback in deps.get((klass, action, None), []):
+            callback(inst, **kwargs)
+    for callback in many_deps.get((klass, action), []):
+        logger.debug("Notify: Calling " + callback.__name__ + "() for " + str(len(insts)) + " " + klass.__name__ + " " + action)
+        callback(insts, **kwargs)
+
+
+def subscribe(callback, klass, action, attr=None, many=False):
+    """
+    :param many: If True, callback is passed a list of instances, so that it can handle many saves or deletes at once.  See notify_many().
+    """
+    if many:
+        assert attr is None
+        many_deps.setdefault((klass, action), []).append(callback)
+        return
     if not deps.get((klass, action, attr), None):
         deps[(klass, action, attr)] = []
     deps[(klass, action, attr)].append(callback)
@@ -2,7 +2,7 @@
 dependencies.py -- list cross model dependencies and subscribe listeners to changes.
 """
 
-from . import abstract, link, note, history, text, layer, version_state, translation_request
+from . import abstract, link, note, history, text, layer, version_state, translation_request, merged_text
 
 from abstract import subscribe, cascade
 import sefaria.system.cache as scache
@@ -14,10 +14,12 @@ subscribe(version_state.create_version_state_on_index_creation,         text.Ind
 # Index Name Change (start with cache clearing)
 subscribe(scache.process_index_change_in_cache,                         text.Index, "attributeChange", "title")
 subscribe(link.process_index_title_change_in_links,                     text.Index, "attributeChange", "title")
+subscribe(link.process_index_title_change_in_link_counts,               text.Index, "attributeChange", "title")
 subscribe(note.process_index_title_change_in_notes,                     text.Index, "attributeChange", "title")
 subscribe(history.process_index_title_change_in_history,                text.Index, "attributeChange", "title")
 subscribe(text.process_index_title_change_in_versions,                  text.Index, "attributeChange", "title")
 subscribe(version_state.process_index_title_change_in_version_state,    text.Index, "attributeChange", "title")
+subscribe(merged_text.process_index_title_change_in_merged_texts,       text.Index, "attributeChange", "title")
 
 # Index Delete (start with cache clearing)
 subscribe(scache.process_index_change_in_cache,                         text.Index, "delete")
@@ -28,6 +30,22 @@ subscribe(text.process_index_delete_in_versions,                        text.Ind
 # Version Title Change
 subscribe(history.process_version_title_change_in_history,              text.Version, "attributeChange", "versionTitle")
 
+# Version Save / Delete
+subscribe(text.process_version_change_in_text_family_cache,             text.Version, "save")
+subscribe(text.process_version_change_in_text_family_cache,             text.Version, "delete")
+subscribe(merged_text.process_version_save_in_merged_text,              text.Version, "save")
+subscribe(merged_text.process_version_delete_in_merged_text,            text.Version, "delete")
+subscribe(version_state.process_version_save_in_preview,                text.Version, "save")
+
+# Link Save / Delete
+subscribe(link.process_links_change_in_generations,                     link.Link, "save", many=True)
+subscribe(link.process_links_change_in_generations,                     link.Link, "delete", many=True)
+subscribe(link.process_links_save_in_graph,                             link.Link, "save", many=True)
+subscribe(link.process_links_delete_in_graph,                           link.Link, "delete", many=True)
+subscribe(link.process_links_save_in_counts,                            link.Link, "save", many=True)
+subscribe(link.process_links_create_in_counts,                          link.Link, "create", many=True)
+subscribe(link.process_links_delete_in_counts,                          link.Link, "delete", many=True)
+
 # Note Delete
 subscribe(layer.process_note_deletion_in_layer,                         note.Note, "delete")
 
@@ -37,6 +55,7 @@ subscribe(cascade(text.TermSet, "scheme"),                              text.Ter
 
 # Version Save
 subscribe(translation_request.process_version_state_change_in_translation_requests, version_state.VersionState, "save")
+subscribe(version_state.process_version_state_save_in_generations,         version_state.VersionState, "save")
 
 # todo: notes? reviews?
 # todo: Scheme name change in Index
@@ -86,9 +86,36 @@ def log_add(user, klass, new_dict, **kwargs):
     return _log_general(user, kind, None, new_dict, rev_type, **kwargs)
 
 
+def log_add_many(user, klass, new_dicts, **kwargs):
+    """
+    Records the addition of many objects, as by tracker.add_many(), with a bulk insert of their history for each batch.
+    The records share one revision number, as the additions are one change.
+    """
+    kind = klass.history_noun
+    rev_type = "add {}".format(kind)
+    logs = [log for log in (_general_log(user, kind, None, new_dict, rev_type, **kwargs) for new_dict in new_dicts) if log]
+    if not logs:
+        return
+    revision = next_revision_num()
+    for log in logs:
+        log["revision"] = revision
+    for i in range(0, len(logs), 1000):
+        db.history.insert(logs[i:i + 1000])
+
+
 def _log_general(user, kind, old_dict, new_dict, rev_type, **kwargs):
+    log = _general_log(user, kind, old_dict, new_dict, rev_type, **kwargs)
+    if log is None:
+        return
+    log["revision"] = next_revision_num()
+    return History(log).save()
+
+
+def _general_log(user, kind, old_dict, new_dict, rev_type, **kwargs):
+    """
+    :return: dict of the history record of a change to an object, without its revision number, or None if the change isn't logged
+    """
     log = {
-        "revision": next_revision_num(),
         "user": user,
         "old": old_dict,
         "new": new_dict,
@@ -110,7 +137,7 @@ def _log_general(user, kind, old_dict, new_dict, rev_type, **kwargs):
     if kind == "index":
         log['title'] = new_dict["title"]
 
-    return History(log).save()
+    return log
 
 
 def next_revision_num():
@@ -4,10 +4,16 @@ Writes to MongoDB Collection: links
 """
 
 import regex as re
+import threading
+import datetime
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
 from bson.objectid import ObjectId
+from pymongo.errors import DuplicateKeyError
 
 from sefaria.system.exceptions import DuplicateRecordError, InputError
 from sefaria.system.database import db
+from sefaria.settings import LINK_ADDRESS_QUERIES, LINK_GRAPH
 from . import abstract as abst
 from . import text
 
@@ -21,6 +27,8 @@ class Link(abst.AbstractMongoRecord):
     """
     collection = 'links'
     history_noun = 'link'
+    track_pkeys = True
+    pkeys = ["refs"]  # so that a save that moves a link can be recounted in link_counts
 
     required_attrs = [
         "type",           # string of connection type
@@ -30,14 +38,19 @@ class Link(abst.AbstractMongoRecord):
         "anchorText",     # string of dibbur hamatchil (largely depcrated) 
         "auto",           # bool whether generated by automatic process
         "generated_by",   # string in ("add_commentary_links", "add_links_from_test")
-        "source_text_oid" # oid of text from which link was generated
+        "source_text_oid", # oid of text from which link was generated
+        "addresses",      # list of dicts, parallel to refs, of the indexable address of each ref.  See ref_address().
+        "key"             # string, the same for either order of refs.  See link_key().
     ]
 
     def _normalize(self):
         self.auto = getattr(self, 'auto', False)
         self.generated_by = getattr(self, "generated_by", None)
         self.source_text_oid = getattr(self, "source_text_oid", None)
-        self.refs = [text.Ref(self.refs[0]).normal(), text.Ref(self.refs[1]).normal()]
+        orefs = [text.Ref(self.refs[0]), text.Ref(self.refs[1])]
+        self.refs = [orefs[0].normal(), orefs[1].normal()]
+        self.addresses = [ref_address(orefs[0]), ref_address(orefs[1])]
+        self.key = link_key(self.refs)
 
         if getattr(self, "_id", None):
             self._id = ObjectId(self._id)
@@ -52,34 +65,78 @@ class Link(abst.AbstractMongoRecord):
 
     def _pre_save(self):
         if getattr(self, "_id", None) is None:
-            # Don't bother saving a connection that already exists, or that has a more precise link already
-            samelink = Link().load({"refs": self.refs})
-
-            if samelink and not self.auto and self.type and not samelink.type:
-                samelink.type = self.type
-                samelink.save()
-                raise DuplicateRecordError(u"Updated existing link with new type: {}".format(self.type))
+            # Exact duplicates, in either order, are rejected by the unique index on key.  See save().
+            # Until data/scripts/migrate_link_keys.py has created the index, they are looked for here.
+            if not has_link_key_index():
+                samelink = Link().load({"$or": [{"key": self.key}, {"refs": self.refs}]})
+                if samelink:
+                    self._raise_duplicate(samelink)
+
+            # Don't bother saving a connection that has a more precise link already.
+            preciselink = Link().load(
+                {'$and':
+                    [
+                        {'refs': self.refs[0]},
+                        link_query(text.Ref(self.refs[1])),
+                        {'key': {'$ne': self.key}}
+                    ]
+                }
+            )
+
+            if preciselink:
+                # logger.debug("save_link: More specific link exists: " + link["refs"][1] + " and " + preciselink["refs"][1])
+                raise DuplicateRecordError(u"A more precise link already exists: {}".format(preciselink.refs[1]))
+            # else: # this is a good new link
+
+    @classmethod
+    def _pre_save_many(cls, links):
+        """
+        Makes the "more precise link" check of _pre_save() for a batch of new links with one query,
+        and also between the links of the batch, in order, as if they were saved one by one.
+        Links repeated within the batch, or that exactly duplicate a link found by the query, are dropped here,
+        so that they are not inserted even before the unique index on key exists.
+        """
+        if not LINK_ADDRESS_QUERIES:
+            return super(Link, cls)._pre_save_many(links)
+
+        by_ref = {}  # ref -> list of (key, addresses) of the links that have it
+        query = {
+            "refs": {"$in": list({l.refs[0] for l in links})},
+            "addresses.book": {"$in": list({l.addresses[1]["book"] for l in links})}
+        }
+        keys = set()  # keys of the existing links found, and of the links of the batch kept so far
+        for doc in db.links.find(query, {"refs": 1, "addresses": 1, "key": 1}):
+            keys.add(doc.get("key") or link_key(doc["refs"]))
+            for tref in doc["refs"]:
+                by_ref.setdefault(tref, []).append((doc.get("key"), doc.get("addresses", [])))
+
+        ret = []
+        for link in links:
+            if link.key in keys:
+                continue
+            oref = text.Ref(link.refs[1])
+            if any(key != link.key and any(address_within(a, oref) for a in addresses) for key, addresses in by_ref.get(link.refs[0], [])):
+                continue
+            keys.add(link.key)
+            ret.append(link)
+            for tref in link.refs:
+                by_ref.setdefault(tref, []).append((link.key, link.addresses))
+        return ret
+
+    def save(self):
+        try:
+            return super(Link, self).save()
+        except DuplicateKeyError:
+            self._raise_duplicate(Link().load({"key": self.key}))
 
-            elif samelink:
-                #logger.debug("save_link: Same link exists: " + samelink["refs"][1])
-                raise DuplicateRecordError("This connection already exists. Try editing instead.")
+    def _raise_duplicate(self, samelink):
+        if samelink and not self.auto and self.type and not samelink.type:
+            samelink.type = self.type
+            samelink.save()
+            raise DuplicateRecordError(u"Updated existing link with new type: {}".format(self.type))
 
-            else:
-                preciselink = Link().load(
-                    {'$and':
-                        [
-                            {'refs': self.refs[0]},
-                            {'refs':
-                                {'$regex': text.Ref(self.refs[1]).regex()}
-                            }
-                        ]
-                    }
-                )
-
-                if preciselink:
-                    # logger.debug("save_link: More specific link exists: " + link["refs"][1] + " and " + preciselink["refs"][1])
-                    raise DuplicateRecordError(u"A more precise link already exists: {}".format(preciselink.refs[1]))
-                # else: # this is a good new link
+        #logger.debug("save_link: Same link exists: " + samelink["refs"][1])
+        raise DuplicateRecordError("This connection already exists. Try editing instead.")
 
 
 class LinkSet(abst.AbstractMongoSet):
@@ -88,15 +145,376 @@ class LinkSet(abst.AbstractMongoSet):
     def __init__(self, query_or_ref={}, page=0, limit=0):
         '''
         LinkSet can be initialized with a query dictionary, as any other MongoSet.
-        It can also be initialized with a :py:class: `sefaria.text.Ref` object, and will use the :py:meth: `sefaria.text.Ref.regex()` method to return the set of Links that refer to that Ref or below.
+        It can also be initialized with a :py:class: `sefaria.text.Ref` object, and will use :py:func: `link_query` to return the set of Links that refer to that Ref or below.
         :param query_or_ref: A query dict, or a :py:class: `sefaria.text.Ref` object
         '''
-        try:
-            super(LinkSet, self).__init__({"refs": {"$regex": query_or_ref.regex()}}, page, limit)
-        except AttributeError:
+        if isinstance(query_or_ref, text.Ref):
+            super(LinkSet, self).__init__(link_query(query_or_ref), page, limit)
+        else:
             super(LinkSet, self).__init__(query_or_ref, page, limit)
 
 
+"""
+Link addresses.
+Each Link stores, parallel to its refs, the address of each ref: its book, and the zero padded keys of its start and end sections.
+E.g. "Genesis 1:3-5" is {"book": "Genesis", "start": "00001.00003", "end": "00001.00005"}.
+Keys sort as their sections do, so the links to a Ref, and below it, can be found with an indexed range query,
+rather than with the $regex of Ref.regex(), which Mongo can't answer from an index.
+"""
+SECTION_KEY_WIDTH = 5
+
+
+def section_key(sections):
+    """
+    :param sections: list of ints
+    :return: string that sorts in the order of the sections, e.g. [1, 3] -> "00001.00003"
+    """
+    return u".".join(unicode(s).zfill(SECTION_KEY_WIDTH) for s in sections)
+
+
+def ref_address(oref):
+    """
+    :return: dict with the indexable address of oref
+    """
+    return {
+        "book": oref.book,
+        "start": section_key(oref.sections),
+        "end": section_key(oref.toSections)
+    }
+
+
+def address_query(oref):
+    """
+    :return: query for an element of a Link's addresses that starts within oref, at any depth
+    """
+    return {
+        "book": oref.book,
+        "start": {
+            "$gte": section_key(oref.sections),
+            "$lte": section_key(oref.toSections) + u"~"  # "~" sorts after "." and the digits, so deeper sections fall within range
+        }
+    }
+
+
+def address_within(address, oref):
+    """
+    :return: True if the address starts within oref, i.e. if it would be matched by address_query(oref)
+    """
+    return address["book"] == oref.book and section_key(oref.sections) <= address["start"] <= section_key(oref.toSections) + u"~"
+
+
+def link_query(oref):
+    """
+    :return: query for the Links that refer to oref or below.
+    Uses the Links' addresses, unless settings.LINK_ADDRESS_QUERIES is off, in which case it falls back to Ref.regex().
+    """
+    if LINK_ADDRESS_QUERIES:
+        return {"addresses": {"$elemMatch": address_query(oref)}}
+    return {"refs": {"$regex": oref.regex()}}
+
+
+def anchor_position(link, oref):
+    """
+    :return: The position (0 or 1) in link.refs of the ref that is at or below oref
+    """
+    if LINK_ADDRESS_QUERIES and getattr(link, "addresses", None):
+        return 0 if address_within(link.addresses[0], oref) else 1
+    return 0 if re.match(oref.regex(), link.refs[0]) else 1
+
+
+def links_to_ref(oref):
+    """
+    :return: list of (link, position) for the Links that refer to oref or below,
+        where position (0 or 1) is that of the ref in link.refs that is at or below oref.
+        Read from the link graph when settings.LINK_GRAPH is on, in which case the links are LinkEdges, rather than Links.
+        Until the graph has loaded in this process, the links are read from Mongo.
+    """
+    if LINK_GRAPH and link_graph.ready():
+        return link_graph.links_to(oref)
+    return [(link, anchor_position(link, oref)) for link in LinkSet(oref)]
+
+
+"""
+Link graph.
+A read-optimized copy of the links collection, held in each process when settings.LINK_GRAPH is on.
+Each link is an edge between the addresses of its two refs.  For each book, the edges that touch it are indexed
+by the start key of their address in that book, so the links to a Ref are found by bisection, as address_query() finds them in Mongo.
+
+The graph is loaded in a background thread on first use (see LinkGraph.ready()); reads go to Mongo until it is ready.
+Saves and deletes of Links in this process are applied to the graph as they happen.
+Changes from other processes are found through the "links:<book>" generation counters (see text.content_revision()):
+before each read, the books it touches are checked, and any that has changed is reloaded from Mongo.
+"""
+class LinkEdge(object):
+    """
+    The fields of a Link that the graph keeps.  Can be passed, like a Link, to the client formatting functions.
+    """
+    __slots__ = ["_id", "type", "refs", "addresses", "anchorText"]
+
+    def __init__(self, _id, type, refs, addresses, anchorText):
+        self._id = _id
+        self.type = type
+        self.refs = refs
+        self.addresses = addresses
+        self.anchorText = anchorText
+
+
+class LinkGraph(object):
+    proj = {"refs": 1, "type": 1, "addresses": 1, "anchorText": 1}
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._edges = {}        # _id -> LinkEdge
+        self._keys = {}         # book -> sorted list of the start keys of the addresses in that book
+        self._entries = {}      # book -> list, parallel to _keys, of (_id, position in refs)
+        self._book_counts = {}  # book -> number of links touching it
+        self._pair_counts = {}  # (book, book), in sorted order -> number of links between the two books
+        self._generations = {}  # book -> links generation when it was last loaded
+        self._loading = False   # True while ready() is loading the graph in the background
+
+    def links_to(self, oref):
+        """
+        :return: list of (LinkEdge, position) for the links with an address that starts within oref, at any depth.
+            Matches links_to_ref() when reading from Mongo.
+        """
+        self._refresh([oref.book])
+        lo, hi = section_key(oref.sections), section_key(oref.toSections) + u"~"
+        with self._lock:
+            keys = self._keys.get(oref.book, [])
+            found = OrderedDict()
+            for _id, pos in self._entries.get(oref.book, [])[bisect_left(keys, lo):bisect_right(keys, hi)]:
+                found[_id] = min(pos, found.get(_id, pos))
+            return [(self._edges[_id], pos) for _id, pos in found.items()]
+
+    def links_of_book(self, book):
+        """
+        :return: list of the LinkEdges of the links with a ref in book
+        """
+        self._refresh([book])
+        with self._lock:
+            ids = OrderedDict((_id, None) for _id, _ in self._entries.get(book, []))
+            return [self._edges[_id] for _id in ids]
+
+    def counts_among(self, books):
+        """
+        :return: dict of (book1, book2), in sorted order -> number of links between the two, for the pairs of books that have links,
+            as in the link_counts collection.  (book, book) holds the number of links touching book.
+        """
+        books = set(books)
+        self._refresh(list(books))
+        with self._lock:
+            counts = {(book, book): self._book_counts[book] for book in books if self._book_counts.get(book)}
+            counts.update({pair: n for pair, n in self._pair_counts.iteritems() if n and pair[0] in books and pair[1] in books})
+            return counts
+
+    def add(self, link):
+        with self._lock:
+            if not self._loaded:
+                return
+            self.remove(link)
+            self._add(link)
+
+    def remove(self, link):
+        with self._lock:
+            if not self._loaded:
+                return
+            edge = self._edges.pop(getattr(link, "_id", None), None)
+            if not edge:
+                return
+            for pos, address in enumerate(edge.addresses):
+                book, keys, entries = address["book"], self._keys[address["book"]], self._entries[address["book"]]
+                for i in range(bisect_left(keys, address["start"]), bisect_right(keys, address["start"])):
+                    if entries[i] == (edge._id, pos):
+                        del keys[i]
+                        del entries[i]
+                        break
+            self._count(edge, -1)
+
+    def _add(self, link):
+        addresses = getattr(link, "addresses", None)
+        if not addresses:
+            try:
+                addresses = [ref_address(text.Ref(tref)) for tref in link.refs]
+            except InputError:
+                return
+        edge = LinkEdge(link._id, getattr(link, "type", None), tuple(link.refs), tuple(addresses), getattr(link, "anchorText", ""))
+        self._edges[edge._id] = edge
+        for pos, address in enumerate(edge.addresses):
+            keys = self._keys.setdefault(address["book"], [])
+            i = bisect_right(keys, address["start"])
+            keys.insert(i, address["start"])
+            self._entries.setdefault(address["book"], []).insert(i, (edge._id, pos))
+        self._count(edge, 1)
+
+    def _count(self, edge, n):
+        books = [a["book"] for a in edge.addresses]
+        for book in set(books):
+            self._book_counts[book] = self._book_counts.get(book, 0) + n
+        if len(set(books)) == 2:
+            pair = tuple(sorted(books))
+            self._pair_counts[pair] = self._pair_counts.get(pair, 0) + n
+
+    def _load(self):
+        """
+        Loads the whole graph into a new LinkGraph, without holding the lock, and then swaps it in.
+        The generations are read first, so that changes made during the load are found later.
+        """
+        generations = {doc["_id"][len(u"links:"):]: doc["generation"] for doc in db.generations.find({"_id": {"$regex": u"^links:"}})}
+        new = LinkGraph()
+        for link in LinkSet().stream(proj=self.proj):
+            new._add(link)
+        with self._lock:
+            self._edges, self._keys, self._entries = new._edges, new._keys, new._entries
+            self._book_counts, self._pair_counts = new._book_counts, new._pair_counts
+            self._generations = generations
+            self._loaded = True
+
+    def ready(self):
+        """
+        :return: True if the graph is loaded.  If not, starts loading it in a background thread, and returns False
+            so that the caller can read from Mongo in the meantime.
+        """
+        if self._loaded:
+            return True
+        with self._lock:
+            if not self._loading:
+                self._loading = True
+                thread = threading.Thread(target=self._load_in_background)
+                thread.daemon = True
+                thread.start()
+        return False
+
+    def _load_in_background(self):
+        try:
+            self._load()
+        except Exception:
+            logger.exception("Failed to load the link graph")
+        finally:
+            self._loading = False
+
+    def _refresh(self, books):
+        """
+        Loads the graph on first use, and reloads the links of any of books that has changed in another process.
+        """
+        if not self._loaded:
+            self._load()
+            return
+        with self._lock:
+            current = {doc["_id"][len(u"links:"):]: doc["generation"] for doc in db.generations.find({"_id": {"$in": [u"links:" + b for b in books]}})}
+            for book in books:
+                if current.get(book, 0) != self._generations.get(book, 0):
+                    self._reload_book(book, current.get(book, 0))
+
+    def _reload_book(self, book, generation):
+        """
+        Rereads the links of book.  Links saved before addresses were added are found by their refs, as _add() indexes them.
+        """
+        for _id, _ in list(self._entries.get(book, [])):
+            if _id in self._edges:
+                self.remove(self._edges[_id])
+        try:
+            unaddressed = {"addresses": {"$exists": False}, "refs": {"$regex": text.Ref(book).regex()}}
+        except InputError:
+            unaddressed = {"addresses": {"$exists": False}, "refs": {"$regex": u"^{} ".format(re.escape(book))}}
+        for link in LinkSet({"$or": [{"addresses.book": book}, unaddressed]}).stream(proj=self.proj):
+            self.remove(link)
+            self._add(link)
+        self._generations[book] = generation
+
+    def process_links_change(self, links, deleted=False):
+        """
+        Applies Link saves or deletes in this process.  Runs after the books' generations have been bumped, once for all of links.
+        If no other process has changed the books in the meantime, the graph stays current for them without a reload.
+        """
+        with self._lock:
+            if not self._loaded:
+                return
+            books = set()
+            for link in links:
+                books |= set(a["book"] for a in (getattr(link, "addresses", None) or []))
+                old = self._edges.get(getattr(link, "_id", None))
+                if old:
+                    books |= set(a["book"] for a in old.addresses)
+                if deleted:
+                    self.remove(link)
+                else:
+                    self.add(link)
+            current = {doc["_id"][len(u"links:"):]: doc["generation"] for doc in db.generations.find({"_id": {"$in": [u"links:" + b for b in books]}})}
+            for book in books:
+                if current.get(book, 0) == self._generations.get(book, 0) + 1:
+                    self._generations[book] = current[book]
+
+    def clear(self):
+        with self._lock:
+            self._loaded = False
+            self._edges, self._keys, self._entries, self._book_counts, self._pair_counts, self._generations = {}, {}, {}, {}, {}, {}
+
+
+link_graph = LinkGraph()
+
+
+def process_links_save_in_graph(links, **kwargs):
+    link_graph.process_links_change(links)
+
+
+def process_links_delete_in_graph(links, **kwargs):
+    link_graph.process_links_change(links, deleted=True)
+
+
+def ensure_link_address_index():
+    db.links.ensure_index([("addresses.book", 1), ("addresses.start", 1)])
+
+
+def link_key(refs):
+    """
+    :param refs: list of normalized refs
+    :return: string that identifies the connection between refs, whichever order they are in
+    """
+    return u"|".join(sorted(refs))
+
+
+def ensure_link_key_index():
+    """
+    Links saved before keys were introduced have none, and so are left out of the index until data/scripts/migrate_link_keys.py is run.
+    """
+    global _link_key_index
+    db.links.ensure_index("key", unique=True, sparse=True)
+    _link_key_index = True
+
+
+_link_key_index = None  # whether the unique index on key exists, checked once per process
+
+
+def has_link_key_index():
+    """
+    :return: True if the unique index on Link key is in place, so that the database rejects duplicate links
+    """
+    global _link_key_index
+    if _link_key_index is None:
+        _link_key_index = any(info["key"] == [("key", 1)] and info.get("unique") for info in db.links.index_information().values())
+    return _link_key_index
+
+
+def process_links_change_in_generations(links, **kwargs):
+    """
+    Bumps the links generation of each book that the links touch, once however many of them touch it.  See text.content_revision().
+    """
+    books = set()
+    for link in links:
+        for i, tref in enumerate(getattr(link, "refs", [])):
+            addresses = getattr(link, "addresses", None)
+            if addresses and len(addresses) > i:
+                books.add(addresses[i]["book"])
+            else:
+                try:
+                    books.add(text.Ref(tref).book)
+                except InputError:
+                    pass
+    for book in books:
+        text.bump_generation(u"links:" + book)
+
+
 def process_index_title_change_in_links(indx, **kwargs):
     if indx.is_commentary():
         pattern = r'^{} on '.format(re.escape(kwargs["old"]))
@@ -107,6 +525,7 @@ def process_index_title_change_in_links(indx, **kwargs):
     links = LinkSet({"refs": {"$regex": pattern}})
     for l in links:
         l.refs = [r.replace(kwargs["old"], kwargs["new"], 1) if re.search(pattern, r) else r for r in l.refs]
+        l._title_change = True  # link_counts are renamed as a whole, by process_index_title_change_in_link_counts()
         try:
             l.save()
         except InputError: #todo: this belongs in a better place - perhaps in abstract
@@ -123,15 +542,145 @@ def process_index_delete_in_links(indx, **kwargs):
     LinkSet({"refs": {"$regex": pattern}}).delete()
 
 
+"""
+Link counts.
+The link_counts collection holds the number of links between each pair of books, as {"book1", "book2", "count"},
+with book1 <= book2.  Where book1 == book2, the count is of all of the links touching that book.
+It is built in one pass over the links by rebuild_link_counts(), which also writes a {"_id": "built"} marker,
+and is kept current as Links are created, moved and deleted.  Until the marker exists, Link changes don't touch it.
+"""
+LINK_COUNTS_BUILT = "built"  # _id of the marker document
+_link_counts_built = False
+
+
+def _link_count_pairs(link):
+    """
+    :return: list of the (book1, book2) pairs of link_counts that link counts towards
+    """
+    addresses = getattr(link, "addresses", None)
+    if addresses:
+        books = {a["book"] for a in addresses}
+    else:
+        try:
+            books = {text.Ref(tref).book for tref in link.refs}
+        except InputError:
+            return []
+    return _book_pairs(books)
+
+
+def _book_pairs(books):
+    pairs = [(book, book) for book in books]
+    if len(books) == 2:
+        pairs.append(tuple(sorted(books)))
+    return pairs
+
+
+def link_counts_built():
+    """
+    :return: True if rebuild_link_counts() has built the link_counts collection
+    """
+    global _link_counts_built
+    if not _link_counts_built:
+        _link_counts_built = bool(db.link_counts.find_one({"_id": LINK_COUNTS_BUILT}, {"_id": 1}))
+    return _link_counts_built
+
+
+def rebuild_link_counts():
+    """
+    Counts the links between each pair of books in one scan of the links collection.
+    The counts are written to a new collection, which then replaces link_counts, so readers never see a partial matrix.
+    """
+    counts = {}
+    for link in LinkSet().stream(proj={"refs": 1, "addresses.book": 1}):
+        for pair in _link_count_pairs(link):
+            counts[pair] = counts.get(pair, 0) + 1
+    building = getattr(db, "link_counts_build_{}".format(ObjectId()))
+    docs = [{"book1": book1, "book2": book2, "count": count} for (book1, book2), count in counts.iteritems()]
+    for i in range(0, len(docs), 1000):
+        building.insert(docs[i:i + 1000])
+    building.ensure_index([("book1", 1), ("book2", 1)], unique=True, sparse=True)
+    building.insert({"_id": LINK_COUNTS_BUILT, "date": datetime.datetime.utcnow()})
+    building.rename("link_counts", dropTarget=True)
+
+
+def _inc_link_counts(counts):
+    """
+    :param counts: dict of (book1, book2) -> change in count
+    """
+    if not link_counts_built():
+        return
+    for (book1, book2), n in counts.iteritems():
+        if n:
+            db.link_counts.update({"book1": book1, "book2": book2}, {"$inc": {"count": n}}, upsert=True)
+
+
+def process_links_save_in_counts(links, **kwargs):
+    """
+    Recounts a saved link that has been moved to other books, from the refs it had when it was loaded,
+    which notify() passes as orig_vals for a single save.  New links are counted by process_links_create_in_counts().
+    """
+    counts = {}
+    for link in links:
+        old_refs = (kwargs.get("orig_vals") or {}).get("refs")
+        if not old_refs or old_refs == link.refs or getattr(link, "_title_change", False):
+            continue
+        try:
+            old_books = {text.Ref(tref).book for tref in old_refs}
+        except InputError:
+            continue
+        old_pairs, new_pairs = set(_book_pairs(old_books)), set(_link_count_pairs(link))
+        for pair in old_pairs - new_pairs:
+            counts[pair] = counts.get(pair, 0) - 1
+        for pair in new_pairs - old_pairs:
+            counts[pair] = counts.get(pair, 0) + 1
+    _inc_link_counts(counts)
+
+
+def process_links_create_in_counts(links, **kwargs):
+    counts = {}
+    for link in links:
+        for pair in _link_count_pairs(link):
+            counts[pair] = counts.get(pair, 0) + 1
+    _inc_link_counts(counts)
+
+
+def process_links_delete_in_counts(links, **kwargs):
+    counts = {}
+    for link in links:
+        for pair in _link_count_pairs(link):
+            counts[pair] = counts.get(pair, 0) - 1
+    _inc_link_counts(counts)
+
+
+def process_index_title_change_in_link_counts(indx, **kwargs):
+    """
+    Renames the books of the pairs that the title change touches: the book itself, or for a commentator, each of its commentaries.
+    The links themselves are renamed by process_index_title_change_in_links(), with saves that leave the counts alone.
+    """
+    old, new = kwargs["old"], kwargs["new"]
+    if indx.is_commentary():
+        prefix = old + u" on "
+        pattern = u"^{}".format(re.escape(prefix))
+        rename = lambda book: new + book[len(old):] if book.startswith(prefix) else book
+    else:
+        commentators = text.IndexSet({"categories.0": "Commentary"}).distinct("title")
+        commentaries = {u"{} on {}".format(c, old): u"{} on {}".format(c, new) for c in commentators}
+        commentaries[old] = new
+        pattern = u"^({})$".format(u"|".join(re.escape(b) for b in commentaries))
+        rename = lambda book: commentaries.get(book, book)
+    for doc in db.link_counts.find({"$or": [{"book1": {"$regex": pattern}}, {"book2": {"$regex": pattern}}]}):
+        book1, book2 = sorted([rename(doc["book1"]), rename(doc["book2"])])
+        db.link_counts.update({"_id": doc["_id"]}, {"$set": {"book1": book1, "book2": book2}})
+
+
 #get_link_counts() and get_book_link_collection() are used in Link Explorer.
 #They have some client formatting code in them; it may make sense to move them up to sefaria.client or sefaria.helper
-link_counts = {}
 def get_link_counts(cat1, cat2):
-    global link_counts
-    key = cat1 + "-" + cat2
-    if link_counts.get(key):
-        return link_counts[key]
-
+    """
+    :return: list of {"book1", "book2", "count"} for each pair of books in categories cat1 and cat2 that have links between them.
+    Read from the link graph when settings.LINK_GRAPH is on, and otherwise from the link_counts collection,
+    which is built on first use if it hasn't been built.
+    """
     queries = []
     for c in [cat1, cat2]:
         if c == "Tanach" or c == "Torah" or c == "Prophets" or c == "Writings":
@@ -146,16 +695,21 @@ def get_link_counts(cat1, cat2):
             return {"error": "No results for {}".format(q)}
         titles.append(ts)
 
+    all_titles = list(set(titles[0]) | set(titles[1]))
+    if LINK_GRAPH and link_graph.ready():
+        counts = link_graph.counts_among(all_titles)
+    else:
+        if not link_counts_built():
+            rebuild_link_counts()
+        counts = {(d["book1"], d["book2"]): d["count"] for d in db.link_counts.find({"book1": {"$in": all_titles}, "book2": {"$in": all_titles}})}
+
     result = []
     for title1 in titles[0]:
         for title2 in titles[1]:
-            re1 = r"^{} \d".format(title1)
-            re2 = r"^{} \d".format(title2)
-            links = LinkSet({"$and": [{"refs": {"$regex": re1}}, {"refs": {"$regex": re2}}]})  # db.links.find({"$and": [{"refs": {"$regex": re1}}, {"refs": {"$regex": re2}}]})
-            if links.count():
-                result.append({"book1": title1.replace(" ","-"), "book2": title2.replace(" ", "-"), "count": links.count()})
+            count = counts.get(tuple(sorted([title1, title2])), 0)
+            if count:
+                result.append({"book1": title1.replace(" ","-"), "book2": title2.replace(" ", "-"), "count": count})
 
-    link_counts[key] = result
     return result
 
 
@@ -176,7 +730,11 @@ def get_book_link_collection(book, cat):
     link_re = r'^(?P<title>.+) (?P<loc>\d.*)$'
     ret = []
 
-    links = LinkSet({"$and": [{"refs": {"$regex": book_re}}, {"refs": {"$regex": cat_re}}]})
+    if LINK_GRAPH and link_graph.ready():
+        title_set = set(titles)
+        links = [edge for edge in link_graph.links_of_book(book) if any(a["book"] in title_set for a in edge.addresses)]
+    else:
+        links = LinkSet({"$and": [{"refs": {"$regex": book_re}}, {"refs": {"$regex": cat_re}}]})
     for link in links:
         l1 = re.match(link_re, link.refs[0])
         l2 = re.match(link_re, link.refs[1])
@@ -0,0 +1,148 @@
+"""
+merged_text.py
+Writes to MongoDB Collection: merged_texts
+
+For each book and language with more than one Version, holds the merge of all of its Versions (see text.merge_texts()),
+along with a jagged map, in the same shape, of the versionTitle that each segment was taken from.
+TextChunk reads from here when no version is requested, rather than merging the Versions on every read.
+
+Only simple texts, whose content is stored as a list in Version.chapter, are merged here.
+Complex texts are still merged on read.
+"""
+import re
+import logging
+logger = logging.getLogger(__name__)
+
+from . import abstract as abst
+from text import VersionSet, IndexSet, merge_texts
+from sefaria.system.database import db
+
+
+class MergedText(abst.AbstractMongoRecord):
+    """
+    The merge of all of the Versions of one book in one language.
+    """
+    collection = 'merged_texts'
+
+    required_attrs = [
+        "title",     # Index title
+        "language",
+        "chapter",   # merged text, in the shape of Version.chapter
+        "sources"    # jagged array, in the shape of chapter, of the versionTitle of each segment
+    ]
+    optional_attrs = []
+
+
+class MergedTextSet(abst.AbstractMongoSet):
+    recordClass = MergedText
+
+
+_merged_keys = None  # set of (title, language) with a MergedText record, loaded on first use
+
+
+def has_merged_text(title, lang):
+    """
+    Returns True if there may be a MergedText record for title and lang.
+    Records built by other processes are picked up when the texts cache is reset.
+    A False positive only costs a query, after which the caller reads the Versions directly.
+    """
+    global _merged_keys
+    if _merged_keys is None:
+        _merged_keys = {(d["title"], d["language"]) for d in db.merged_texts.find({}, {"title": 1, "language": 1})}
+    return (title, lang) in _merged_keys
+
+
+def reset_merged_keys():
+    global _merged_keys
+    _merged_keys = None
+
+
+def rebuild_merged_text(title, lang):
+    """
+    Merges all of the Versions of title in lang, and saves the result.
+    Removes the record if there are fewer than two Versions, or if the text is not simple.
+    :return: MergedText, or None
+    """
+    versions = VersionSet({"title": title, "language": lang}).array()
+    if len(versions) < 2 or not all(isinstance(getattr(v, "chapter", None), list) for v in versions):
+        _remove_merged_text(title, lang)
+        return None
+
+    merged, sources = merge_texts([v.chapter for v in versions], [v.versionTitle for v in versions], jagged_sources=True)
+    mt = MergedText().load({"title": title, "language": lang}, {"chapter": 0, "sources": 0}) or MergedText({"title": title, "language": lang})
+    mt.chapter = merged
+    mt.sources = sources
+    mt.save()
+    if _merged_keys is not None:
+        _merged_keys.add((title, lang))
+    return mt
+
+
+def update_merged_text_section(title, lang, section):
+    """
+    Re-merges only the top-level section of title in lang at the 0-based index section,
+    as after a TextChunk in that section has been saved.
+    Falls back to a full rebuild when the record is missing or does not yet reach that section.
+    """
+    proj = {"chapter": {"$slice": [section, 1]}}
+    versions = VersionSet({"title": title, "language": lang}, proj=proj).array()
+    if len(versions) < 2 or not all(isinstance(getattr(v, "chapter", None), list) for v in versions):
+        return rebuild_merged_text(title, lang)
+    if not db.merged_texts.find_one({"title": title, "language": lang, "chapter.{}".format(section): {"$exists": True}}, {"_id": 1}):
+        return rebuild_merged_text(title, lang)
+
+    merged, sources = merge_texts([v.chapter for v in versions], [v.versionTitle for v in versions], jagged_sources=True)
+    db.merged_texts.update({"title": title, "language": lang}, {"$set": {
+        "chapter.{}".format(section): merged[0] if merged else [],
+        "sources.{}".format(section): sources[0] if sources else []
+    }})
+
+
+def _remove_merged_text(title, lang):
+    db.merged_texts.remove({"title": title, "language": lang})
+    if _merged_keys is not None:
+        _merged_keys.discard((title, lang))
+
+
+def rebuild_all_merged_texts():
+    """
+    Builds the MergedText records for every book and language with more than one Version, and removes any others.
+    """
+    db.merged_texts.remove({})
+    reset_merged_keys()
+    for title in db.texts.distinct("title"):
+        for lang in ["en", "he"]:
+            if db.texts.find({"title": title, "language": lang}).count() > 1:
+                rebuild_merged_text(title, lang)
+
+
+def process_version_save_in_merged_text(version, **kwargs):
+    """
+    A TextChunk save passes the top-level section that it changed, so only that section is re-merged.
+    Any other save of a Version - through Version.save(), as by the editing tools and scripts - may change its content anywhere,
+    or its priority or title, so the whole book is rebuilt.
+    """
+    section = kwargs.get("section")
+    if section is not None:
+        update_merged_text_section(version.title, version.language, section)
+    else:
+        rebuild_merged_text(version.title, version.language)
+
+
+def process_version_delete_in_merged_text(version, **kwargs):
+    rebuild_merged_text(version.title, version.language)
+
+
+def process_index_title_change_in_merged_texts(indx, **kwargs):
+    """
+    The Versions are renamed, and rebuilt under the new title, before this is called.  Removes the records under the old titles.
+    """
+    old = re.escape(kwargs["old"])
+    if indx.is_commentary():
+        commentator_re = u"^{} on ".format(old)
+    else:
+        commentators = IndexSet({"categories.0": "Commentary"}).distinct("title")
+        commentator_re = u"^({}) on {}$".format(u"|".join(re.escape(c) for c in commentators), old)
+    db.merged_texts.remove({"title": kwargs["old"]})
+    db.merged_texts.remove({"title": {"$regex": commentator_re}})
+    reset_merged_keys()
@@ -0,0 +1,24 @@
+from contextlib import contextmanager
+
+from sefaria.model import Version, VersionSet
+
+
+@contextmanager
+def temp_version(vtitle, chapter, title="Pirkei Avot", **attrs):
+    """
+    Saves a throwaway English Version of title for a test, and deletes it afterwards, whether or not the test passed.
+    A Version left with the same versionTitle by an interrupted run is deleted first.
+    """
+    VersionSet({"versionTitle": vtitle}).delete()
+    attrs.update({
+        "language": "en",
+        "title": title,
+        "versionSource": "http://foobar.com",
+        "versionTitle": vtitle,
+        "chapter": chapter
+    })
+    v = Version(attrs).save()
+    try:
+        yield v
+    finally:
+        VersionSet({"versionTitle": vtitle}).delete()
@@ -60,6 +60,25 @@ class Test_Mongo_Set_Models(object):
             assert sub.recordClass != abstract.AbstractMongoRecord
             assert issubclass(sub.recordClass, abstract.AbstractMongoRecord)
 
+    def test_stream(self):
+        query = {"title": "Genesis"}
+        streamed = model.VersionSet(query).stream(batch_size=2)
+        assert not isinstance(streamed, list)
+        streamed = [v.versionTitle for v in streamed]
+        vset = model.VersionSet(query)
+        assert streamed == [v.versionTitle for v in vset]
+        assert [v.versionTitle for v in vset.stream()] == streamed
+
+        titles = [v for v in model.VersionSet(query).stream(proj={"versionTitle": 1})]
+        assert [v.versionTitle for v in titles] == streamed
+        assert not any(hasattr(v, "chapter") for v in titles)
+
+    def test_has_more(self):
+        count = model.VersionSet({"title": "Genesis"}).count()
+        assert model.VersionSet({"title": "Genesis"}, limit=count).has_more
+        assert not model.VersionSet({"title": "Genesis"}, limit=count + 1).has_more
+        assert not model.VersionSet({"title": "Genesis"}).has_more
+
 
 class Test_Mongo_Record_Methods(object):
     """ Tests of the methods on the abstract models.
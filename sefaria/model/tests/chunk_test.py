@@ -1,6 +1,7 @@
 import pytest
 
 from sefaria.model import *
+from sefaria.model.tests import temp_version
 from sefaria.system.exceptions import InputError
 from sefaria.utils.util import list_depth
 
@@ -90,6 +91,22 @@ def test_commentary_chunks():
     assert span.text[-1][-1] == verse.text
 
 
+def test_bulk_chunks():
+    orefs = [Ref(r) for r in [
+        "Daniel 2:3", "Daniel 2", "Daniel 2:3-5", "Daniel 2:3-4:5", "Daniel", "Genesis 1:1", "Daniel 2:3",
+        "Rashi on Exodus 3:1", "Rashi on Exodus 3:1-4:10", "Shabbat 7a:12-7b:3", "Hadran 3", "Meshech Hochma 66.4"
+    ]]
+    for lang, vtitle in [("en", None), ("he", None), ("en", "The Holy Scriptures: A New Translation (JPS 1917)"), ("he", "Tanach with Nikkud")]:
+        bulk = TextChunk.bulk(orefs, lang, vtitle)
+        assert len(bulk) == len(orefs)
+        for oref, chunk in zip(orefs, bulk):
+            single = TextChunk(oref, lang, vtitle)
+            assert chunk.text == single.text, u"{} {} {}".format(oref.normal(), lang, vtitle)
+            assert chunk.is_merged == single.is_merged
+            assert chunk.sources == single.sources
+            assert [v.versionTitle for v in chunk._versions] == [v.versionTitle for v in single._versions]
+
+
 def test_spanning_family():
     f = TextFamily(Ref("Daniel 2:3-4:5"), context=0)
 
@@ -113,6 +130,84 @@ def test_spanning_family():
 
 
 
+def test_family_cache():
+    from sefaria.model.text import text_family_cache
+
+    text_family_cache.clear()
+    hits = text_family_cache.stats()["hits"]
+    first = TextFamily(Ref("Daniel 2"), commentary=False).contents()
+    second = TextFamily(Ref("Daniel 2"), commentary=False).contents()
+    assert first == second
+    assert text_family_cache.stats()["hits"] == hits + 1
+
+    # served text can't change the cached text
+    second["text"][0] = "Changed"
+    assert TextFamily(Ref("Daniel 2"), commentary=False).text[0] != "Changed"
+
+    with temp_version("Pirkei Avot Cache Test", [["Text for 1:1"]]):
+        f = TextFamily(Ref("Pirkei Avot 1"), lang="en", version="Pirkei Avot Cache Test", commentary=False, context=0)
+        assert f.text == ["Text for 1:1"]
+
+        c = TextChunk(Ref("Pirkei Avot 1:1"), "en", "Pirkei Avot Cache Test")
+        c.text = "New Text for 1:1"
+        c.save()
+        f = TextFamily(Ref("Pirkei Avot 1"), lang="en", version="Pirkei Avot Cache Test", commentary=False, context=0)
+        assert f.text == ["New Text for 1:1"]
+
+
+def test_partial_save():
+    with temp_version("Pirkei Avot Partial Save Test", [["Text for 1:1"], []]):
+        for tref, text in [("Pirkei Avot 1:1", "New Text for 1:1"),  # $set
+                           ("Pirkei Avot 1:3", "Text for 1:3"),      # $push with padding
+                           ("Pirkei Avot 2:2", "Text for 2:2"),      # $push into an empty section
+                           ("Pirkei Avot 4:1", "Text for 4:1")]:     # new top-level sections: full save
+            c = TextChunk(Ref(tref), "en", "Pirkei Avot Partial Save Test")
+            c.text = text
+            c.save()
+
+        v = Version().load({"versionTitle": "Pirkei Avot Partial Save Test"})
+        assert v.chapter == [["New Text for 1:1", "", "Text for 1:3"], ["", "Text for 2:2"], [], ["Text for 4:1"]]
+
+        # a $push is conditional on the section not having grown since it was read
+        assert not v.save_partial({"$push": {"chapter.0": {"$each": ["", "Text for 1:5"]}}}, {"chapter.0.2": {"$exists": False}})
+        assert v.save_partial({"$push": {"chapter.0": {"$each": ["", "Text for 1:5"]}}}, {"chapter.0.3": {"$exists": False}})
+        v = Version().load({"versionTitle": "Pirkei Avot Partial Save Test"})
+        assert v.chapter[0] == ["New Text for 1:1", "", "Text for 1:3", "", "Text for 1:5"]
+
+
+def test_merged_text():
+    from sefaria.model.merged_text import MergedText, rebuild_merged_text
+
+    with temp_version("Pirkei Avot Merge Test", [["Merged 1:1"], [], ["Merged 3:1"]], priority=100) as v:
+        assert MergedText().load({"title": "Pirkei Avot", "language": "en"})
+        assert TextChunk(Ref("Pirkei Avot 1:1"), "en").text == "Merged 1:1"
+
+        # reads from the merged text match merging the versions on read
+        refs = [Ref("Pirkei Avot 1"), Ref("Pirkei Avot 1:2"), Ref("Pirkei Avot 1:3-2:2"), Ref("Pirkei Avot 2:4-6")]
+        assert [TextChunk(r, "en").text for r in refs] == [c.text for c in TextChunk.bulk(refs, "en")]
+
+        # a save updates the merged section
+        c = TextChunk(Ref("Pirkei Avot 3:1"), "en", "Pirkei Avot Merge Test")
+        c.text = "New Merged 3:1"
+        c.save()
+        assert TextChunk(Ref("Pirkei Avot 3:1"), "en").text == "New Merged 3:1"
+        assert MergedText().load({"title": "Pirkei Avot", "language": "en"}).chapter == rebuild_merged_text("Pirkei Avot", "en").chapter
+
+        v.delete()
+        assert TextChunk(Ref("Pirkei Avot 1:1"), "en").text != "Merged 1:1"
+
+
+def test_family_concurrent():
+    from sefaria.model.text import text_family_cache
+
+    for tref in ["Daniel 2", "Genesis 1:1-3", "Shabbat 3a:1"]:
+        text_family_cache.clear()
+        sequential = TextFamily(Ref(tref), concurrent=False).contents()
+        text_family_cache.clear()
+        concurrent = TextFamily(Ref(tref), concurrent=True).contents()
+        assert sequential == concurrent
+
+
 def test_family_chapter_result_no_merge():
     families = [
         TextFamily(Ref("Midrash Tanchuma.1.2")),  # this is supposed to get a version with exactly 1 en and 1 he.  The data may change.
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
+import os
+import tempfile
 
-from sefaria.model.text import library, Ref
+from sefaria.model.text import library, Ref, TitleTrie, CommentaryTitleMatcher
+from sefaria.system.exceptions import InputError
 
 
 
@@ -165,6 +168,64 @@ class Test_get_titles_in_text(object):
             assert {u"שמות"} <= set(library.get_titles_in_string(a, "he"))
 
 
+class Test_TitleTrie(object):
+    def test_longest_match(self):
+        trie = TitleTrie([u"Mishnah", u"Mishnah Peah", u"Peah"])
+        assert trie.match(u"Mishnah Peah 1:1").group('title') == u"Mishnah Peah"
+        assert trie.match(u"Mishnah Peahx").group('title') == u"Mishnah"
+        assert trie.match(u"Peah").group('title') == u"Peah"
+        assert trie.match(u"Peah 1", 1) is None
+
+    def test_delimiters(self):
+        trie = TitleTrie([u"Dan", u"Daniel"])
+        assert trie.match(u"Daniel 2").group('title') == u"Daniel"
+        assert trie.match(u"Dan. 2").end() == 5
+        assert trie.match(u"Danny 2") is None
+
+    def test_finditer(self):
+        trie = TitleTrie([u"Genesis", u"Exodus"])
+        s = u"See Genesis 1:1 and Exodus, and Genesisx"
+        assert [(m.group('title'), m.start()) for m in trie.finditer(s)] == [(u"Genesis", 4), (u"Exodus", 20)]
+
+    def test_commentary(self):
+        matcher = CommentaryTitleMatcher(TitleTrie([u"Rashi", u"Ramban"]), TitleTrie([u"Genesis", u"Gen."]))
+        m = matcher.match(u"Rashi on Genesis 1:1")
+        assert m.group('title') == u"Rashi on Genesis"
+        assert m.group('commentor') == u"Rashi"
+        assert m.group('commentee') == u"Genesis"
+        assert matcher.match(u"Rashi on Exodus 1:1") is None
+        assert [m.group('title') for m in matcher.finditer(u"cf. Ramban on Gen. 2")] == [u"Ramban on Gen."]
+
+    def test_matches_regex(self):
+        for s in [u"Here we have Genesis 3:5 may it be blessed", u"This is a test of a Brachot 7b and also of an Isaiah 12:13.", u"Rashi on Exodus 3:2 and Ramban on Genesis 1"]:
+            assert [m.group('title') for m in library.all_titles_trie("en").finditer(s)] == [m.group('title') for m in library.all_titles_regex("en").finditer(s)]
+            assert [m.group('title') for m in library.all_titles_trie("en", commentary=True).finditer(s)] == [m.group('title') for m in library.all_titles_regex("en", commentary=True).finditer(s)]
+
+
+class Test_parse_refs(object):
+    trefs = [u"Genesis 3:5", u"Exodus 1", u"Not A Book 3", u"Rashi on Genesis 2:3:1", u"Shabbat 7b", u"Genesis 3:5", u"Genesis 900", u"שמות כא, ד", u"Shabbat"]
+
+    def check(self, results):
+        assert len(results) == len(self.trefs)
+        for tref, result in zip(self.trefs, results):
+            if tref in (u"Not A Book 3", u"Genesis 900"):
+                assert isinstance(result, InputError)
+            else:
+                assert result == Ref(tref)
+        assert results[0] is results[5]
+
+    def test_parse_refs(self):
+        self.check(library.parse_refs(self.trefs))
+
+    def test_parse_refs_in_pool(self):
+        self.check(library.parse_refs(self.trefs, processes=2, chunksize=2))
+
+    def test_address(self):
+        for tref in [u"Genesis 3:5", u"Rashi on Genesis 2:3:1", u"Shabbat 7b-8a", u"Shulchan Arukh, Orach Chayim 3:2"]:
+            oref = Ref(tref)
+            assert library._ref_from_address(library._ref_address(oref)) == oref
+
+
 class Test_Library(object):
     def test_get_title_node(self):
         node = library.get_schema_node("Exodus")
@@ -174,6 +235,26 @@ class Test_Library(object):
         n2 = library.get_schema_node(u"שמות", "he")
         assert node == n2
 
+    def test_snapshot(self):
+        path = tempfile.mktemp()
+        try:
+            library.build_snapshot(path)
+            titles = library.full_title_list("en", with_commentators=False)
+
+            library.local_cache = {}
+            assert library.load_snapshot(path)
+            assert library.local_cache["full_title_list_en"] == titles
+            assert Ref("Rashi on Genesis 2:3").book == "Rashi on Genesis"
+            assert library.get_schema_node("Exodus").primary_title() == "Exodus"
+
+            library.bump_index_generation()
+            library.local_cache = {}
+            assert not library.load_snapshot(path)
+            assert library.local_cache == {}
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
 
 def test_get_en_text_titles():
     txts = [u'Avot', u'Avoth', u'Daniel', u'Dan', u'Dan.', u'Rashi', u"Me'or Einayim, Vayera"]
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+from sefaria.model import *
+from sefaria.model.link import section_key, ref_address, address_within, anchor_position
+
+
+class Test_Link_Address(object):
+
+    def test_section_key(self):
+        assert section_key([]) == u""
+        assert section_key([1, 3]) == u"00001.00003"
+        assert section_key([2]) < section_key([2, 1]) < section_key([2, 10]) < section_key([10])
+
+    def test_ref_address(self):
+        assert ref_address(Ref("Genesis 1:3-5")) == {"book": "Genesis", "start": u"00001.00003", "end": u"00001.00005"}
+        assert ref_address(Ref("Genesis")) == {"book": "Genesis", "start": u"", "end": u""}
+        assert ref_address(Ref("Rashi on Genesis 2:3:1"))["book"] == "Rashi on Genesis"
+
+    def test_address_within(self):
+        assert address_within(ref_address(Ref("Genesis 1:3")), Ref("Genesis 1"))
+        assert address_within(ref_address(Ref("Genesis 1:3-5")), Ref("Genesis 1:2-3"))
+        assert address_within(ref_address(Ref("Genesis 2:4")), Ref("Genesis 1-2"))
+        assert address_within(ref_address(Ref("Genesis 2:4")), Ref("Genesis"))
+        assert not address_within(ref_address(Ref("Genesis 10:1")), Ref("Genesis 1"))
+        assert not address_within(ref_address(Ref("Genesis 1:6")), Ref("Genesis 1:3-5"))
+        assert not address_within(ref_address(Ref("Exodus 1:3")), Ref("Genesis 1"))
+
+    def test_anchor_position(self):
+        l = Link({"refs": ["Rashi on Genesis 1:2:1", "Genesis 1:2"], "type": "commentary"})
+        l._normalize()
+        assert anchor_position(l, Ref("Genesis 1")) == 1
+        assert anchor_position(l, Ref("Rashi on Genesis 1")) == 0
+
+
+class Test_LinkSet(object):
+
+    def test_matches_regex(self):
+        for tref in ["Genesis 1", "Genesis 1:3", "Genesis 1:3-2:4", "Shabbat 7b", "Rashi on Exodus 2"]:
+            oref = Ref(tref)
+            regex_refs = {tuple(l.refs) for l in LinkSet({"refs": {"$regex": oref.regex()}})}
+            address_refs = {tuple(l.refs) for l in LinkSet(oref)}
+            assert regex_refs <= address_refs
+
+
+class Test_Link_Key(object):
+
+    def test_link_key(self):
+        from sefaria.model.link import link_key
+        assert link_key(["Job 3:2", "Pirkei Avot 1:1"]) == link_key(["Pirkei Avot 1:1", "Job 3:2"])
+        assert link_key(["Job 3:2", "Pirkei Avot 1:1"]) != link_key(["Job 3:2", "Pirkei Avot 1:2"])
+
+    def test_duplicates(self):
+        from sefaria.model.link import ensure_link_key_index
+        from sefaria.system.exceptions import DuplicateRecordError
+        ensure_link_key_index()
+        l = Link({"refs": ["Job 3:2", "Pirkei Avot 1:1"], "type": "test"}).save()
+        try:
+            for refs in [["Job 3:2", "Pirkei Avot 1:1"], ["Pirkei Avot 1:1", "Job 3:2"], ["Job 3:2", "Pirkei Avot 1"]]:
+                try:
+                    Link({"refs": refs, "type": "test"}).save()
+                except DuplicateRecordError:
+                    pass
+                else:
+                    assert False, refs
+        finally:
+            l.delete()
+
+
+class Test_Link_Graph(object):
+
+    def test_matches_linkset(self):
+        from sefaria.model.link import LinkGraph
+        graph = LinkGraph()
+        for tref in ["Genesis 1", "Genesis 1:3", "Genesis 1:3-2:4", "Shabbat 7b", "Rashi on Exodus 2"]:
+            oref = Ref(tref)
+            graph_links = {(str(edge._id), pos) for edge, pos in graph.links_to(oref)}
+            mongo_links = {(str(l._id), anchor_position(l, oref)) for l in LinkSet(oref)}
+            assert graph_links == mongo_links
+
+    def test_save_and_delete(self):
+        from sefaria.model.link import LinkGraph, link_graph
+        link_graph.links_to(Ref("Genesis 1"))  # load
+        before = {edge._id for edge, _ in link_graph.links_to(Ref("Job 3:2"))}
+        l = Link({"refs": ["Job 3:2", "Pirkei Avot 1:1"], "type": "test"}).save()
+        assert l._id in {edge._id for edge, _ in link_graph.links_to(Ref("Job 3:2"))}
+        assert l._id in {edge._id for edge, _ in LinkGraph().links_to(Ref("Pirkei Avot 1"))}
+        l.delete()
+        assert {edge._id for edge, _ in link_graph.links_to(Ref("Job 3:2"))} == before
+
+    def test_reload_keeps_links_without_addresses(self):
+        from sefaria.model.link import LinkGraph
+        from sefaria.model.text import bump_generation
+        from sefaria.system.database import db
+        _id = db.links.insert({"refs": ["Job 3:2", "Pirkei Avot 1:1"], "type": "test"})
+        try:
+            graph = LinkGraph()
+            assert _id in {edge._id for edge, _ in graph.links_to(Ref("Job 3:2"))}
+            bump_generation(u"links:Job")  # as when another process changes the links of Job
+            assert _id in {edge._id for edge, _ in graph.links_to(Ref("Job 3:2"))}
+        finally:
+            db.links.remove({"_id": _id})
+
+    def test_counts_match_link_counts(self):
+        from sefaria.model.link import LinkGraph, rebuild_link_counts
+        from sefaria.system.database import db
+        books = ["Genesis", "Rashi on Genesis", "Job", "Psalms"]
+        rebuild_link_counts()
+        stored = {(d["book1"], d["book2"]): d["count"] for d in db.link_counts.find({"book1": {"$in": books}, "book2": {"$in": books}})}
+        assert LinkGraph().counts_among(books) == stored
+
+
+class Test_Link_Counts(object):
+
+    def test_counts(self):
+        from sefaria.model.link import rebuild_link_counts
+        from sefaria.system.database import db
+
+        def count(book1, book2):
+            doc = db.link_counts.find_one({"book1": book1, "book2": book2})
+            return doc["count"] if doc else 0
+
+        rebuild_link_counts()
+        assert count("Genesis", "Rashi on Genesis") == LinkSet({"$and": [{"addresses.book": "Genesis"}, {"addresses.book": "Rashi on Genesis"}]}).count()
+        assert count("Job", "Job") == LinkSet({"addresses.book": "Job"}).count()
+
+        assert db.link_counts.find_one({"_id": "built"})
+
+        before = count("Job", "Pirkei Avot")
+        before_moved = count("Job", "Psalms")
+        l = Link({"refs": ["Job 3:2", "Pirkei Avot 1:1"], "type": "test"}).save()
+        assert count("Job", "Pirkei Avot") == before + 1
+        l = Link().load_by_id(l._id)
+        l.refs = ["Job 3:2", "Psalms 1:1"]
+        l.save()
+        assert count("Job", "Pirkei Avot") == before
+        assert count("Job", "Psalms") == before_moved + 1
+        l.delete()
+        assert count("Job", "Psalms") == before_moved
+
+
+class Test_Link_Title_Change(object):
+
+    def test_index_rename(self):
+        old, new = u"Test Link Rename", u"Test Link Renamed"
+        IndexSet({"title": {"$in": [old, new]}}).delete()
+        i = Index({
+            "title": old,
+            "titleVariants": [old],
+            "sectionNames": ["Chapter", "Paragraph"],
+            "categories": ["Musar"],
+            "lengths": [5, 50]
+        }).save()
+        l = Link({"refs": [u"{} 1:1".format(old), "Job 3:2"], "type": "test"}).save()
+        try:
+            i = Index().load({"title": old})
+            i.title = new
+            i.save()
+            l = Link().load_by_id(l._id)
+            assert l.refs == [u"{} 1:1".format(new), "Job 3:2"]
+        finally:
+            LinkSet({"_id": l._id}).delete()
+            IndexSet({"title": {"$in": [old, new]}}).delete()
@@ -263,4 +263,37 @@ class Test_Titles(object):
         with pytest.raises(IndexSchemaError):
             j = JaggedArrayNode()
             j.add_title(u"ייי", "he", primary=True)
-            j.add_title(u"ייעי", "he", primary=True)
\ No newline at end of file
+            j.add_title(u"ייעי", "he", primary=True)
+
+class Test_Regex(object):
+
+    @staticmethod
+    def node(title):
+        return JaggedArrayNode(serial={
+            "key": title,
+            "titles": [{"text": title, "lang": "en", "primary": True}]
+        }, parameters={
+            "depth": 2,
+            "addressTypes": ["Integer", "Integer"],
+            "sectionNames": ["Chapter", "Verse"]
+        })
+
+    def test_full_regex(self):
+        j = self.node(u"Regex Title")
+        reg = j.full_regex(u"Regex Title", "en")
+        m = reg.match(u"Regex Title 4:5")
+        assert m.group("a0") == u"4" and m.group("a1") == u"5"
+        assert not reg.match(u"Other Title 4:5")
+
+        braced = j.full_regex(u"Regex Title", "en", anchored=False)
+        assert [m.group("a0") for m in braced.finditer(u"see (Regex Title 3) and {Regex Title 7}")] == [u"3", u"7"]
+
+    def test_regex_cache(self):
+        JaggedArrayNode.clear_regex_cache()
+        j = self.node(u"Regex Title")
+        reg = j.full_regex(u"Regex Title", "en")
+        assert reg is j.full_regex(u"Regex Title", "en")
+        assert reg is self.node(u"Regex Title").full_regex(u"Regex Title", "en")  # shared across instances
+        assert reg is not j.full_regex(u"Regex Title", "en", strict=True)
+        JaggedArrayNode.clear_regex_cache()
+        assert reg is not j.full_regex(u"Regex Title", "en")
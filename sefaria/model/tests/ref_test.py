@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
+import re
 import pytest
 from sefaria.model import *
+from sefaria.model.text import RefCache
 from sefaria.system.exceptions import InputError
 
 class Test_Ref(object):
@@ -16,7 +18,7 @@ class Test_Ref(object):
 
     def test_bible_range(self):
         ref = Ref(u"Job.2:3-3:1")
-        assert ref.toSections == [3, 1]
+        assert ref.toSections == (3, 1)
 
     def test_short_bible_refs(self):  # this behavior is changed from earlier
         assert Ref(u"Exodus") != Ref(u"Exodus 1")
@@ -30,6 +32,7 @@ class Test_Ref(object):
         for lang in ["en", "he"]:
             for t in library.full_title_list(lang, False):
                 assert library.all_titles_regex(lang).match(t), u"'{}' doesn't resolve".format(t)
+                assert library.all_titles_trie(lang).match(t).group('title') == t, u"'{}' doesn't resolve".format(t)
 
     def test_map(self):
         assert Ref("Me'or Einayim 16") == Ref("Me'or Einayim, Yitro")
@@ -172,11 +175,55 @@ class Test_Ref(object):
 
     def test_ref_regex(self):
         assert Ref("Exodus 15").regex() == u'^Exodus( 15$| 15:| 15 \\d)'
-        assert Ref("Exodus 15:15-17").regex() == u'^Exodus( 15:15$| 15:15:| 15:15 \\d| 15:16$| 15:16:| 15:16 \\d| 15:17$| 15:17:| 15:17 \\d)'
+        assert Ref("Exodus 15:15-17").regex() == u'^Exodus( (?:15:(?:1(?:[5-7])))(?:$|:| \\d))'
         assert Ref("Yoma 14a").regex() == u'^Yoma( 14a$| 14a:| 14a \\d)'
-        assert Ref("Yoma 14a:12-15").regex() == u'^Yoma( 14a:12$| 14a:12:| 14a:12 \\d| 14a:13$| 14a:13:| 14a:13 \\d| 14a:14$| 14a:14:| 14a:14 \\d| 14a:15$| 14a:15:| 14a:15 \\d)'
+        assert Ref("Yoma 14a:12-15").regex() == u'^Yoma( (?:14a:(?:1(?:[2-5])))(?:$|:| \\d))'
         assert Ref("Yoma").regex() == u'^Yoma($|:| \\d)'  # This is as legacy had it
 
+    def test_range_regex_matches(self):
+        cases = {
+            "Exodus 15:15-17": (["Exodus 15:15", "Exodus 15:17:2", "Exodus 15:16 3"], ["Exodus 15:14", "Exodus 15:18", "Exodus 15:150", "Exodus 15"]),
+            "Exodus 15:3-17:2": (["Exodus 15:3", "Exodus 15:30", "Exodus 16:1", "Exodus 17:2"], ["Exodus 15:2", "Exodus 17:3", "Exodus 16", "Exodus 18:1"]),
+            "Shabbat 2a-150b": (["Shabbat 2a", "Shabbat 99b:4", "Shabbat 150b"], ["Shabbat 151a", "Shabbat 1b", "Shabbat 2"]),
+            "Shabbat 15a:15-15b:13": (["Shabbat 15a:15", "Shabbat 15a:55", "Shabbat 15b:13"], ["Shabbat 15a:14", "Shabbat 15b:14", "Shabbat 16a:1"]),
+        }
+        for tref, (matches, misses) in cases.items():
+            pattern = re.compile(Ref(tref).regex())
+            for r in matches:
+                assert pattern.match(r), u"{} should match {}".format(tref, r)
+            for r in misses:
+                assert not pattern.match(r), u"{} should not match {}".format(tref, r)
+
+    def test_spanning_regex_is_compact(self):
+        assert len(Ref("Shabbat 2a-150b").regex()) < 100
+
+    def test_iter_split_spanning_ref(self):
+        for tref in ["Leviticus 15:3 - 17:12", "Shabbat 15a:15-15b:13", "Rashi on Exodus 5:3-6:7", "Leviticus 15:17"]:
+            Ref.clear_cache()
+            oref = Ref(tref)
+            oref.get_state_ja()
+            size = Ref.cache_size()
+            iterated = list(oref.iter_split_spanning_ref())
+            assert Ref.cache_size() == size
+            assert iterated == oref.split_spanning_ref()
+
+    def test_iter_range_list(self):
+        Ref.clear_cache()
+        oref = Ref("Leviticus 15:12-17")
+        size = Ref.cache_size()
+        iterated = list(oref.iter_range_list())
+        assert Ref.cache_size() == size
+        assert iterated == oref.range_list()
+        assert list(Ref("Leviticus 15:12").iter_range_list()) == [Ref("Leviticus 15:12")]
+        with pytest.raises(InputError):
+            Ref("Exodus 15:12-16:1").iter_range_list()
+
+    def test_spanning_condition_query(self):
+        q = Ref("Shabbat 15a:15-16b:13").condition_query()
+        assert q["$or"] == [{"chapter.{}".format(i): {"$exists": True, "$elemMatch": {"$nin": ["", [], 0]}}} for i in range(28, 32)]
+        q = Ref("Rashi on Exodus 5:3-6:7").condition_query()
+        assert [p.keys()[0] for p in q["$or"]] == ["chapter.4", "chapter.5"]
+
     #todo: devise a better test of version_list()
     def test_version_list(self):
         assert len(Ref("Exodus").version_list()) > 3
@@ -218,6 +265,93 @@ class Test_Cache(object):
         r2 = Ref("Ramban on Genesis 1")
         assert r1 is not r2
 
+    def test_cache_stats(self):
+        Ref.clear_cache()
+        stats = Ref.cache_stats()
+        Ref("Gen. 27:3")
+        Ref("Gen. 27:3")
+        assert Ref.cache_stats()["misses"] == stats["misses"] + 1
+        assert Ref.cache_stats()["hits"] == stats["hits"] + 1
+        assert "Gen. 27:3" in Ref._raw_cache()
+        assert "Genesis 27:3" in Ref._raw_cache()
+
+
+class Test_Compact_Ref(object):
+    def test_no_instance_dict(self):
+        assert not hasattr(Ref("Genesis 27:3"), "__dict__")
+
+    def test_tuple_sections(self):
+        r = Ref("Genesis 27:3-5")
+        assert r.sections == (27, 3)
+        assert r.toSections == (27, 5)
+        assert r.padded_ref().sections == (27, 3)
+        assert Ref("Genesis 27").subref(4).sections == (27, 4)
+
+    def test_talmud_range_normal(self):
+        assert Ref("Shabbat 7a-8b").normal() == "Shabbat 7a-8b"
+        assert Ref("Shabbat 15a:15-15b:13").normal() == "Shabbat 15a:15-15b:13"
+        assert Ref("Rashi on Shabbat 15a-16b").normal() == "Rashi on Shabbat 15a-16b"
+        assert Ref("Shabbat 15a:15-15b:13").toSections == (30, 13)
+        assert Ref("Shabbat 7a-8b").he_normal()
+
+    def test_interned_book(self):
+        assert Ref("Genesis 27:3").book is Ref("Genesis 28:4").book
+        assert Ref("Genesis 27:3").type is Ref("Exodus 1").type
+
+    def test_lazy_memo_fields(self):
+        Ref.clear_cache()
+        r = Ref("Genesis 27:3")
+        assert r._context is None
+        assert r.context_ref() is Ref("Genesis 27")
+        assert r._context == {1: Ref("Genesis 27")}
+
+
+class Test_RefCache(object):
+    class FakeRef(object):
+        def __init__(self, n):
+            self.n = n
+
+        def normal(self):
+            return self.n
+
+    def test_alias_shares_entry(self):
+        c = RefCache(10)
+        r = c.add(self.FakeRef("Genesis 1"), "Gen. 1", u"בראשית א")
+        assert c.get("Gen. 1") is r
+        assert c.get(u"בראשית א") is r
+        assert c.get("Genesis 1") is r
+        assert len(c) == 1
+
+    def test_add_existing_normal_returns_cached(self):
+        c = RefCache(10)
+        r1 = c.add(self.FakeRef("Genesis 1"), "Gen. 1")
+        r2 = c.add(self.FakeRef("Genesis 1"), "Ge 1")
+        assert r1 is r2
+        assert c.get("Ge 1") is r1
+
+    def test_eviction_is_lru_and_drops_aliases(self):
+        c = RefCache(2)
+        c.add(self.FakeRef("A 1"), "a1")
+        c.add(self.FakeRef("B 1"), "b1")
+        c.get("a1")
+        c.add(self.FakeRef("C 1"), "c1")
+        assert "B 1" not in c
+        assert "b1" not in c
+        assert "a1" in c
+        assert "C 1" in c
+        assert c.stats()["evictions"] == 1
+        assert c.stats()["aliases"] == 2
+
+    def test_counters(self):
+        c = RefCache()
+        c.add(self.FakeRef("A 1"))
+        c.get("A 1")
+        c.get("B 1")
+        stats = c.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["evictions"] == 0
+
 
 class Test_normal_forms(object):
     def test_normal(self):
@@ -53,6 +53,24 @@ def test_text_helpers():
     assert u'Commentary' in cats
 
 
+def test_merge_texts():
+    from sefaria.model.text import merge_texts, iter_merged_sections
+
+    assert merge_texts([["a", ""], ["", "b", "c"]], ["A", "B"]) == [["a", "b", "c"], ["A", "B", "B"]]
+    assert merge_texts([["a", ""], ["", ""]], ["A", "B"]) == [["a", 0], ["A", "A"]]
+    assert merge_texts([], []) == ["", []]
+
+    text = [
+        [[["a", ""], ["b"]], [["c"]]],
+        [[["", "d"], ["", "e"]], [], [["f"]]]
+    ]
+    merged = [[["a", "d"], ["b", "e"]], [["c"]], [["f"]]]
+    jagged = [[["A", "B"], ["A", "B"]], [["A"]], [["B"]]]
+    assert merge_texts(text, ["A", "B"]) == [merged, ["A", "B", "A", "B", "A", "B"]]
+    assert merge_texts(text, ["A", "B"], jagged_sources=True) == [merged, jagged]
+    assert list(iter_merged_sections(text, ["A", "B"])) == zip(merged, jagged)
+
+
 def test_index_update():
     '''
     :return: Test:
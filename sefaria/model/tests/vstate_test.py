@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
 from sefaria.model import *
+from sefaria.model.version_state import next_populated_section, make_text_preview
+from sefaria.model.tests import temp_version
 
 
 class Test_VState(object):
@@ -14,6 +16,56 @@ class Test_VState(object):
             assert getattr(vs, "content")
 
 
+class Test_Populated_Sections(object):
+
+    def test_matches_traversal(self):
+        for tref in ["Job 4:5", "Job 1", "Job 42", "Shabbat 4b", "Shabbat 2a", "Rashi on Genesis 5:32:2", "Rashi on Genesis 6:2:1", "Mekhilta 23:19"]:
+            oref = Ref(tref)
+            ja = oref.get_state_node().ja("all", "availableTexts")
+            for forward in [True, False]:
+                starting_points = [s - 1 for s in oref.sections[:oref.index_node.depth - 1]]
+                starting_points[-1] += 1 if forward else -1
+                expected = ja.next_index(starting_points[:]) if forward else ja.prev_index(starting_points[:])
+                expected = tuple(expected[:-1]) if expected else None
+                assert next_populated_section(oref, starting_points, forward) == expected
+
+    def test_shorter_address(self):
+        oref = Ref("Rashi on Genesis 5")
+        assert next_populated_section(oref, [5], True)[0] >= 5
+        assert next_populated_section(oref, [3], False)[0] <= 3
+
+    def test_cache_follows_generation(self):
+        from sefaria.model.version_state import get_populated_sections, state_generation, _populated_sections_cache
+        oref = Ref("Job 1")
+        get_populated_sections(oref)
+        before = state_generation("Job")
+        VersionState("Job").save()
+        assert state_generation("Job") == before + 1
+        get_populated_sections(oref)
+        assert _populated_sections_cache[oref.index_node.full_title("en")][0] == before + 1
+
+
+class Test_Preview(object):
+
+    def test_refresh_matches_text(self):
+        for title in ["Pirkei Avot", "Hadran"]:
+            VersionState(title).refresh()
+            oref = Ref(title)
+            text = TextFamily(oref, pad=False, commentary=False)
+            assert VersionState(title).preview == make_text_preview(text.text, text.he, oref.index_node.depth)
+
+    def test_section_update(self):
+        VersionState("Pirkei Avot").refresh()
+        try:
+            with temp_version("Pirkei Avot Preview Test", [["Text for 1:1"]], priority=100):
+                c = TextChunk(Ref("Pirkei Avot 2:1"), "en", "Pirkei Avot Preview Test")
+                c.text = "Preview Test"
+                c.save()
+                assert VersionState("Pirkei Avot").preview[1]["en"].startswith("Preview Test")
+        finally:
+            VersionState("Pirkei Avot").refresh()
+
+
 class Test_VSNode(object):
     def test_section_counts(self):
         sn = StateNode("Exodus")
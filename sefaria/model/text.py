@@ -8,8 +8,17 @@ logger = logging.getLogger(__name__)
 
 import regex
 import copy
+import datetime
 import bleach
 import json
+import os
+import cPickle as pickle
+import threading
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+from functools import partial
+from collections import OrderedDict
+from itertools import izip_longest
 
 try:
     import re2 as re
@@ -21,6 +30,8 @@ except ImportError:
 from . import abstract as abst
 
 import sefaria.system.cache as scache
+from sefaria.settings import REF_CACHE_SIZE, LIBRARY_SNAPSHOT_PATH, TEXT_FAMILY_CACHE_SIZE, TEXT_FAMILY_CONCURRENT, TEXT_FAMILY_THREADS
+from sefaria.system.database import db
 from sefaria.system.exceptions import InputError, BookNameError, IndexSchemaError
 from sefaria.utils.talmud import section_to_daf, daf_to_section
 from sefaria.utils.hebrew import is_hebrew, decode_hebrew_numeral, encode_hebrew_numeral, hebrew_term
@@ -627,6 +638,7 @@ class SchemaContentNode(SchemaNode):
 class JaggedArrayNode(SchemaContentNode):
     required_param_keys = ["depth", "addressTypes", "sectionNames"]
     optional_param_keys = ["lengths"]
+    _compiled_regexes = {}  # Shared by all instances.  See full_regex()
 
     def __init__(self, index=None, serial=None, parameters=None):
         """
@@ -675,6 +687,40 @@ class JaggedArrayNode(SchemaContentNode):
         reg += ur"(?=\W|$)"
         return reg
 
+    def full_regex(self, title, lang, anchored=True, **kwargs):
+        """
+        A compiled regular expression that matches a reference to this node: 'title', followed by an address.
+        Compiled patterns are shared across instances, keyed by address types, title, language, strictness and anchoring,
+        so that nodes built on the fly (e.g. for commentaries) reuse them.  Cleared by clear_regex_cache().
+        :param title: The title used to refer to this node
+        :param lang: "en" or "he"
+        :param anchored: If True, the reference must begin the string.  If False, references are matched anywhere within parentheses or braces.
+        :param kwargs: 'strict' kwarg indicates that section names are required to match
+        :return: compiled regex object
+        """
+        key = (tuple(self.addressTypes), title, lang, kwargs.get("strict", False), anchored)
+        reg = self._compiled_regexes.get(key)
+        if reg is None:
+            if anchored:
+                re_string = u'^' + regex.escape(title) + self.delimiter_re + self.regex(lang, **kwargs)
+            else:
+                re_string = ur"""(?<=							# look behind for opening brace
+                    [({]										# literal '(', brace,
+                    [^})]*										# anything but a closing ) or brace
+                )
+                """ + regex.escape(title) + self.delimiter_re + self.regex(lang, **kwargs) + ur"""
+                (?=												# look ahead for closing brace
+                    [^({]*										# match of anything but an opening '(' or brace
+                    [)}]										# zero-width: literal ')' or brace
+                )"""
+            reg = regex.compile(re_string, regex.VERBOSE)
+            self._compiled_regexes[key] = reg
+        return reg
+
+    @classmethod
+    def clear_regex_cache(cls):
+        JaggedArrayNode._compiled_regexes.clear()
+
 
 class JaggedArrayCommentatorNode(JaggedArrayNode):
     """
@@ -1532,6 +1578,26 @@ class Version(abst.AbstractMongoRecord, AbstractTextRecord, AbstractSchemaConten
     def _normalize(self):
         pass
 
+    def save_partial(self, update, condition=None, **kwargs):
+        """
+        Applies a Mongo update document, such as {"$set": {"chapter.4.2": "..."}}, to this existing record,
+        rather than rewriting the whole record, and emits the 'save' notification.
+        The attributes of this object are not changed.  Used by TextChunk.save().
+        :param update: dict
+        :param condition: dict - further query on the record, such as {"chapter.4.3": {"$exists": False}}.
+            If the record no longer matches it, nothing is saved.
+        :param kwargs: passed on to the subscribers of the 'save' notification, as by save()
+        :return: True if the record was updated
+        """
+        assert not self.is_new(), u"Can not partially save a new Version"
+        query = {"_id": self._id}
+        query.update(condition or {})
+        result = getattr(db, self.collection).update(query, update, w=1)
+        if not result.get("n"):
+            return False
+        abst.notify(self, "save", orig_vals=self.pkeys_orig_values, **kwargs)
+        return True
+
 
 class VersionSet(abst.AbstractMongoSet):
     recordClass = Version
@@ -1560,63 +1626,167 @@ class VersionSet(abst.AbstractMongoSet):
 
 # used in VersionSet.merge(), merge_text_versions(), text_from_cur(), and export.export_merged()
 # todo: move this to JaggedTextArray class
-def merge_texts(text, sources):
+def merge_texts(text, sources, jagged_sources=False):
     """
-    This is a recursive function that merges the text in multiple
-    translations to fill any gaps and deliver as much text as
+    Merges the text in multiple translations to fill any gaps and deliver as much text as
     possible.
     e.g. [["a", ""], ["", "b", "c"]] becomes ["a", "b", "c"]
+    :param text: list of jagged arrays, one for each version, in order of preference
+    :param sources: list of the names of the versions
+    :param jagged_sources: If True, the sources are returned as a jagged array in the shape of the merged text,
+        naming the version of each segment.  Otherwise they are flattened into a one dimensional list,
+        which loses the mapping of sources to segments for texts of depth > 2.
+    :return: [merged text, sources]
     """
     if not (len(text) and len(sources)):
         return ["", []]
 
-    depth = list_depth(text)
-    if depth > 2:
-        results = []
-        result_sources = []
-        for x in range(max(map(len, text))):
-            translations = map(None, *text)[x]
-            remove_nones = lambda x: x or []
-            result, source = merge_texts(map(remove_nones, translations), sources)
-            results.append(result)
-            # NOTE - the below flattens the sources list, so downstream code can always expect
-            # a one dimensional list, but in so doing the mapping of source names to segments
-            # is lost for merged texts of depth > 2 (this mapping is not currenly used in general)
-            result_sources += source
-        return [results, result_sources]
+    merged, source_map = _merge_text_position(text, sources)
+    if jagged_sources:
+        return [merged, source_map]
+    return [merged, _flatten_source_map(source_map)]
+
+
+def iter_merged_sections(text, sources):
+    """
+    Yields (merged section, jagged source map) for each top-level section of the merge of text, one section at a time,
+    so that a whole book can be merged without holding all of the merged text.
+    For texts of depth 1, yields (segment, source) for each segment.
+    """
+    if not (len(text) and len(sources)):
+        return
+    depth = _merge_depth(text)
+    if depth == 1:
+        yield _merge_segments(text, sources, depth)
+        return
+    if depth == 2:
+        merged, source_map = _merge_segments(text, sources, depth)
+        for pair in zip(merged, source_map):
+            yield pair
+        return
+
+    for x in range(max(len(t) for t in text)):
+        yield _merge_text_position(_merge_text_column(text, x), sources)
+
+
+def _merge_text_column(text, x):
+    return [(t[x] if x < len(t) else None) or [] for t in text]
+
+
+def _merge_text_position(text, sources):
+    """
+    Merges the values that each version in text has at one position of the jagged array.
+    Walks the array with an explicit stack, rather than by recursion and transposed copies of each level.
+    :return: (merged, source map)
+    """
+    depth = _merge_depth(text)
+    if depth <= 2:
+        return _merge_segments(text, sources, depth)
+
+    merged, source_map = [], []
+    # Each frame: the versions' values at a position, the next index within them, and the merged lists being filled
+    stack = [[text, 0, max(len(t) for t in text), merged, source_map]]
+    while stack:
+        frame = stack[-1]
+        versions, x, width, frame_merged, frame_map = frame
+        if x == width:
+            stack.pop()
+            continue
+        frame[1] += 1
+
+        column = _merge_text_column(versions, x)
+        column_depth = _merge_depth(column)
+        if column_depth > 2:
+            child_merged, child_map = [], []
+            frame_merged.append(child_merged)
+            frame_map.append(child_map)
+            stack.append([column, 0, max(len(c) for c in column), child_merged, child_map])
+        else:
+            segment, segment_source = _merge_segments(column, sources, column_depth)
+            frame_merged.append(segment)
+            frame_map.append(segment_source)
+
+    return merged, source_map
+
+
+def _merge_depth(text):
+    """
+    Returns list_depth(text), capped at 3.  Looks only at the top two levels of text, rather than walking all of it.
+    """
+    if not all(isinstance(t, list) for t in text):
+        return 1
+    if any(t and all(isinstance(el, list) for el in t) for t in text):
+        return 3
+    return 2
 
+
+def _merge_segments(text, sources, depth):
+    """
+    Merges versions of a section (depth 2), or of a single segment (depth 1).
+    Each segment is taken from the first version which has it.  Segments that no version has are 0.
+    """
     if depth == 1:
-        text = map(lambda x: [x], text)
-
-    merged = map(None, *text)
-    text = []
-    text_sources = []
-    for verses in merged:
-        # Look for the first non empty version (which will be the oldest, or one with highest priority)
-        index, value = 0, 0
-        for i, version in enumerate(verses):
+        for i, version in enumerate(text):
             if version:
-                index = i
-                value = version
+                return version, sources[i]
+        return 0, sources[0]
+
+    merged, source_map = [], []
+    for segments in izip_longest(*text):
+        value, source = 0, sources[0]
+        for i, segment in enumerate(segments):
+            if segment:
+                value, source = segment, sources[i]
                 break
-        text.append(value)
-        text_sources.append(sources[index])
+        merged.append(value)
+        source_map.append(source)
+    return merged, source_map
+
+
+def _flatten_source_map(source_map):
+    if not isinstance(source_map, list):
+        return [source_map]
+    flat = []
+    stack = [iter(source_map)]
+    while stack:
+        for el in stack[-1]:
+            if isinstance(el, list):
+                stack.append(iter(el))
+                break
+            flat.append(el)
+        else:
+            stack.pop()
+    return flat
 
-    if depth == 1:
-        # strings were earlier wrapped in lists, now unwrap
-        text = text[0]
-    return [text, text_sources]
+
+def _contributing_sources(text, source_map):
+    """
+    Returns the sources in source_map of the non-empty segments of text, in order of first appearance.
+    text and source_map are jagged arrays of the same shape, as returned by merge_texts(..., jagged_sources=True).
+    """
+    found = []
+    stack = [(text, source_map)]
+    while stack:
+        txt, src = stack.pop()
+        if isinstance(txt, list):
+            if isinstance(src, list):
+                stack += reversed(zip(txt, src))
+        elif txt and src not in found:
+            found.append(src)
+    return found
 
 
 class TextChunk(AbstractTextRecord):
     text_attr = "text"
 
-    def __init__(self, oref, lang="en", vtitle=None):
+    def __init__(self, oref, lang="en", vtitle=None, _loaded=None):
         """
         :param oref:
         :type oref: Ref
         :param lang: "he" or "en"
         :param vtitle:
+        :param _loaded: Used internally by TextChunk.bulk().  A list of (Version, content) pairs already loaded for oref,
+            where content is what oref.part_projection() would have returned.
         :return:
         """
         self._oref = oref
@@ -1635,35 +1805,183 @@ class TextChunk(AbstractTextRecord):
 
         if lang and vtitle:
             self._saveable = True
-            v = Version().load({"title": oref.book, "language": lang, "versionTitle": vtitle}, oref.part_projection())
-            if v:
+            if _loaded is None:
+                v = Version().load({"title": oref.book, "language": lang, "versionTitle": vtitle}, oref.part_projection())
+                _loaded = [(v, getattr(v, oref.storage_address(), None))] if v else []
+            for v, content in _loaded[:1]:
                 self._versions += [v]
-                self.text = self._original_text = self.trim_text(getattr(v, oref.storage_address(), None))
+                self.text = self._original_text = self.trim_text(content)
         elif lang:
-            vset = VersionSet(oref.condition_query(lang), proj=oref.part_projection())
+            if _loaded is None:
+                if self._read_merged_text():
+                    return
+                vset = VersionSet(oref.condition_query(lang), proj=oref.part_projection())
+                _loaded = [(v, getattr(v, oref.storage_address(), None)) for v in vset]
 
-            if vset.count() == 0:
+            if len(_loaded) == 0:
                 return
-            if vset.count() == 1:
-                v = vset[0]
+            if len(_loaded) == 1:
+                v, content = _loaded[0]
                 self._versions += [v]
-                self.text = self.trim_text(getattr(v, oref.storage_address(), None))
+                self.text = self.trim_text(content)
                 #todo: Should this instance, and the non-merge below, be made saveable?
             else:  # multiple versions available, merge
-                merged_text, sources = vset.merge(oref.storage_address())  #todo: For commentaries, this merges the whole chapter.  It may show up as merged, even if our part is not merged.
+                for v, _ in _loaded:
+                    if not getattr(v, "versionTitle", None):
+                        logger.error("No version title for Version: {}".format(vars(v)))
+                merged_text, sources = merge_texts([content if content is not None else [] for _, content in _loaded],
+                                                   [getattr(v, "versionTitle", None) for v, _ in _loaded])  #todo: For commentaries, this merges the whole chapter.  It may show up as merged, even if our part is not merged.
                 self.text = self.trim_text(merged_text)
                 if len(set(sources)) == 1:
-                    for v in vset:
+                    for v, _ in _loaded:
                         if v.versionTitle == sources[0]:
                             self._versions += [v]
                             break
                 else:
                     self.sources = sources
                     self.is_merged = True
-                    self._versions = vset.array()
+                    self._versions = [v for v, _ in _loaded]
         else:
             raise Exception("TextChunk requires a language.")
 
+    def _read_merged_text(self):
+        """
+        Loads this chunk from the precomputed merge of its book's Versions, if there is one.  See merged_text.py.
+        If only one Version supplies text within the Ref, that Version is loaded instead, as it would be without a merge.
+        :return: False if there is no merged text, and the Versions should be read and merged here.
+        """
+        from . import merged_text
+        oref = self._oref
+        if oref.storage_address() != "chapter" or not merged_text.has_merged_text(oref.book, self.lang):
+            return False
+        proj = oref.part_projection()
+        if "chapter" in proj:
+            proj["sources"] = proj["chapter"]
+        mt = merged_text.MergedText().load({"title": oref.book, "language": self.lang}, proj)
+        if not mt:
+            return False
+
+        sources = _flatten_source_map(mt.sources)
+        text = self.trim_text(mt.chapter)
+        vtitles = _contributing_sources(text, self.trim_text(mt.sources))
+        if len(vtitles) == 1:
+            v = Version().load({"title": oref.book, "language": self.lang, "versionTitle": vtitles[0]}, oref.part_projection())
+            if v:
+                self._versions += [v]
+                self.text = self.trim_text(getattr(v, "chapter", None))
+        elif len(vtitles) > 1:
+            self.text = text
+            self.sources = sources
+            self.is_merged = True
+            self._versions = VersionSet({"title": oref.book, "language": self.lang, "versionTitle": {"$in": vtitles}}, proj={"chapter": 0}).array()
+        return True
+
+    @classmethod
+    def bulk(cls, orefs, lang, vtitle=None, stats=None):
+        """
+        Returns a list of TextChunks, one for each Ref in orefs, in the same order.
+        Equivalent to [TextChunk(oref, lang, vtitle) for oref in orefs], but each Version of a book is loaded only once,
+        with a single $slice projection that covers the top-level sections of all of the Refs in that book.
+        Each Ref is then trimmed (and merged) in memory.
+        :param orefs: list of Refs
+        :param lang: "he" or "en"
+        :param vtitle:
+        :param stats: Optional dict.  Its "queries" count is increased by the number of queries made.
+        :return: list of TextChunks
+        """
+        if not lang:
+            raise Exception("TextChunk requires a language.")
+
+        groups = OrderedDict()  # (book, storage address) -> [(position in orefs, oref)]
+        for i, oref in enumerate(orefs):
+            groups.setdefault((oref.book, oref.storage_address()), []).append((i, oref))
+
+        chunks = [None] * len(orefs)
+        for (book, address), group in groups.items():
+            query = {"title": book, "language": lang}
+            if vtitle:
+                query["versionTitle"] = vtitle
+            proj, start = cls._bulk_projection([oref for _, oref in group], address)
+            versions = VersionSet(query, proj=proj).array()
+            if stats is not None:
+                stats["queries"] = stats.get("queries", 0) + 1
+
+            for i, oref in group:
+                loaded = []
+                for v in versions:
+                    content = cls._bulk_content(oref, getattr(v, address, None), start)
+                    if vtitle or cls._has_content(oref, content):
+                        loaded.append((v, content))
+                chunks[i] = cls(oref, lang, vtitle, _loaded=loaded)
+
+        return chunks
+
+    @staticmethod
+    def _bulk_projection(orefs, address):
+        """
+        Returns a projection covering the part_projection() of each of orefs, and the index of the first top-level section it returns.
+        """
+        slices = [oref.part_projection().get(address) for oref in orefs]
+        if any(s is None for s in slices):
+            return {"_id": 0}, 0
+        start = min(s["$slice"][0] for s in slices)
+        end = max(s["$slice"][0] + s["$slice"][1] for s in slices)
+        return {"_id": 0, address: {"$slice": [start, end - start]}}, start
+
+    @staticmethod
+    def _bulk_content(oref, content, start):
+        """
+        Cuts the content that oref.part_projection() would have returned out of content loaded by _bulk_projection(), which begins at section start.
+        """
+        slce = oref.part_projection().get(oref.storage_address())
+        if slce and isinstance(content, list):
+            skip, limit = slce["$slice"]
+            content = content[skip - start:skip - start + limit]
+            if oref.is_range() and oref.range_index() < len(oref.sections) - 1:
+                content = copy.deepcopy(content)  # trim_text() trims the nested sections of spanning refs in place
+        return content
+
+    @staticmethod
+    def _has_content(oref, content):
+        """
+        Mirrors oref.condition_query() on content loaded with oref.part_projection(),
+        so that bulk() selects the same versions that a query for each Ref would.
+        """
+        empty = ["", [], 0]
+
+        def any_content(a):
+            return isinstance(a, list) and any(e not in empty for e in a)
+
+        def walk(path):
+            a = content
+            for i in path:
+                if not isinstance(a, list) or not 0 <= i < len(a):
+                    return None
+                a = a[i]
+            return a
+
+        if not oref.sections:
+            return any_content(content)
+
+        # The first element of sliced content is top-level section oref.sections[0]
+        base = oref.sections[0] - 1 if oref.part_projection().get(oref.storage_address()) else 0
+        if not oref.is_spanning():
+            path = [s - 1 for s in (oref.sections if not oref.is_range() else oref.sections[:-1])]
+            if path:
+                path[0] -= base
+            if len(oref.sections) == oref.index_node.depth and not oref.is_range():
+                value = walk(path)
+                return value is not None and value not in empty
+            return any_content(walk(path))
+
+        prefix = [s - 1 for s in oref.sections[:oref.range_index()]]
+        for n in range(oref.sections[oref.range_index()], oref.toSections[oref.range_index()] + 1):
+            path = prefix + [n - 1]
+            path[0] -= base
+            if any_content(walk(path)):
+                return True
+        return False
+
     def is_empty(self):
         return bool(self.text)
 
@@ -1690,19 +2008,78 @@ class TextChunk(AbstractTextRecord):
                     "title": self._oref.book
                 }
             )
-        else:
+            self._save_full()
+        elif not self._save_partial():
             self.full_version = Version().load({"title": self._oref.book, "language": self.lang, "versionTitle": self.vtitle})
             assert self.full_version, u"Failed to load Version record for {}, {}".format(self._oref.normal(), self.vtitle)
             if self.versionSource:
                 self.full_version.versionSource = self.versionSource  # hack
+            self._save_full()
 
+        self._oref.recalibrate_next_prev_refs(len(self.text))
+        return self
+
+    def _save_full(self):
+        """
+        Pads and sets self.text within the whole of self.full_version, and saves the whole record.
+        """
         content = self.full_version.sub_content(self._oref.index_node.version_address())
         self._pad(content)
         self.full_version.sub_content(self._oref.index_node.version_address(), [i - 1 for i in self._oref.sections], self.text)
+        self.full_version.save(**self._changed_section())
 
-        self.full_version.save()
-        self._oref.recalibrate_next_prev_refs(len(self.text))
-        return self
+    def _save_partial(self):
+        """
+        Saves self.text with a single $set (or, where padding is needed, $push) on its address in the existing Version record.
+        Only the top-level section of the Ref is loaded, and self.full_version holds only that section.
+        :return: False, without saving, if the change restructures the text - adding top-level sections,
+            or replacing a string with an array - and the whole record needs to be rewritten by _save_full().
+            Also False if padding is needed and the section has grown since it was read, so that the $push would misplace the text.
+        """
+        oref = self._oref
+        if not oref.sections:
+            return False
+        address = oref.storage_address()
+        indexes = [i - 1 for i in oref.sections]
+        self.full_version = Version().load({"title": oref.book, "language": self.lang, "versionTitle": self.vtitle},
+                                           {address: {"$slice": [indexes[0], 1]}})
+        assert self.full_version, u"Failed to load Version record for {}, {}".format(oref.normal(), self.vtitle)
+        section = self.full_version.sub_content(oref.index_node.version_address())
+        if not isinstance(section, list) or not section:
+            return False
+
+        empty = lambda pos: "" if pos == oref.index_node.depth - 1 else []
+        parent = section[0]
+        path = u"{}.{}".format(address, indexes[0])
+        condition = None
+        for pos, i in enumerate(indexes[1:], 1):
+            if not isinstance(parent, list):
+                return False
+            if len(parent) <= i:
+                item = self.text
+                for deeper in reversed(range(pos + 1, len(indexes))):
+                    item = [empty(deeper)] * indexes[deeper] + [item]
+                update = {"$push": {path: {"$each": [empty(pos)] * (i - len(parent)) + [item]}}}
+                condition = {u"{}.{}".format(path, len(parent)): {"$exists": False}}
+                break
+            parent = parent[i]
+            path += u".{}".format(i)
+        else:
+            update = {"$set": {path: self.text}}
+
+        if self.versionSource and self.versionSource != getattr(self.full_version, "versionSource", None):
+            self.full_version.versionSource = self.versionSource  # hack
+            update.setdefault("$set", {})["versionSource"] = self.versionSource
+        return self.full_version.save_partial(update, condition, **self._changed_section())
+
+    def _changed_section(self):
+        """
+        :return: kwargs for the 'save' notification of the Version, naming the top-level section that this save changed,
+            so that the merged text and preview update just that section
+        """
+        if self._oref.sections and self._oref.storage_address() == "chapter":
+            return {"section": self._oref.sections[0] - 1}
+        return {}
 
     def _pad(self, content):
         """
@@ -1856,6 +2233,165 @@ class TextChunk(AbstractTextRecord):
             raise Exception("Called TextChunk.version() on merged TextChunk.")
 
 
+def bump_generation(key):
+    """
+    Increments the generation counter named key, and records when it was changed.
+    Counters are kept in the generations collection: "index", "text" (any Version), "text:<title>", "links:<title>"
+    and "state:<title>" (see version_state.state_generation()).
+    """
+    db.generations.update({"_id": key}, {"$inc": {"generation": 1}, "$set": {"modified": datetime.datetime.utcnow()}}, upsert=True)
+
+
+def content_revision(keys):
+    """
+    Reads several generation counters with one query.
+    :param keys: list of counter names.  See bump_generation().
+    :return: (token, modified) - a string that changes whenever any of the counters does,
+        and the latest time that any of them changed, or None if that isn't known.
+    """
+    docs = {doc["_id"]: doc for doc in db.generations.find({"_id": {"$in": keys}})}
+    token = u"-".join(unicode(docs[key]["generation"]) if key in docs else u"0" for key in keys)
+    times = [doc["modified"] for doc in docs.values() if doc.get("modified")]
+    return token, max(times) if times else None
+
+
+def text_generation(title):
+    """
+    :return: int that increases whenever a Version of the book 'title' is saved or deleted.
+    """
+    doc = db.generations.find_one({"_id": u"text:" + title})
+    return doc["generation"] if doc else 0
+
+
+def bump_text_generation(title):
+    bump_generation(u"text:" + title)
+    bump_generation(u"text")
+
+
+class TextFamilyCache(object):
+    """
+    A size bounded, least recently used cache of the TextChunks loaded by :class:`TextFamily`,
+    keyed by (normal ref, lang, version, context, pad).
+
+    Each entry is stamped with the text generation of its book when it was loaded.  Saving or deleting a Version
+    bumps the generation of its book, so an entry is never served after an edit to its book, including edits made in another process.
+    Counts hits, misses and evictions.
+    """
+
+    def __init__(self, capacity=None):
+        """
+        :param capacity: Maximum number of entries to hold.  0 or None turns the cache off.
+        """
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (book, generation, chunks), least recently used first
+        self._lock = threading.Lock()
+
+    def get(self, key, generation):
+        """
+        Returns the chunks cached under 'key', or None if there are none or if they were loaded at a generation other than 'generation'.
+        Marks the entry as recently used.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None or entry[1] != generation:
+                self.misses += 1
+                return None
+            self._entries[key] = entry
+            self.hits += 1
+            return entry[2]
+
+    def add(self, key, book, generation, chunks):
+        """
+        Caches 'chunks' under 'key'.  'generation' should be read before the chunks are loaded,
+        so that an edit made while they load leaves them stale.
+        """
+        if not self.capacity:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (book, generation, chunks)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_book(self, book):
+        """
+        Drops every entry loaded from 'book'
+        """
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if entry[0] == book]:
+                del self._entries[key]
+
+    def clear(self):
+        """
+        Empties the cache.  Hit, miss and eviction counts are kept.
+        """
+        with self._lock:
+            self._entries = OrderedDict()
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+text_family_cache = TextFamilyCache(TEXT_FAMILY_CACHE_SIZE)
+
+
+def process_version_change_in_text_family_cache(version, **kwargs):
+    bump_text_generation(version.title)
+    text_family_cache.invalidate_book(version.title)
+
+
+_fetch_pool = None
+_fetch_pool_lock = threading.Lock()
+_fetch_local = threading.local()
+
+
+def fetch_concurrently(calls, concurrent=None):
+    """
+    Calls each of the functions in calls, which take no arguments, and returns their results in the same order.
+    If concurrent, all but the first are run on a shared pool of TEXT_FAMILY_THREADS threads while the caller runs the first.
+    This suits independent database fetches, which spend their time waiting on Mongo.
+    An exception raised by any call is raised here.
+    Calls made from within the pool always run in sequence, so that the pool can't be exhausted by threads waiting on itself.
+    :param calls: list of functions
+    :param concurrent: If None, settings.TEXT_FAMILY_CONCURRENT
+    :return: list
+    """
+    if concurrent is None:
+        concurrent = TEXT_FAMILY_CONCURRENT
+    if not concurrent or len(calls) < 2 or getattr(_fetch_local, "in_pool", False):
+        return [call() for call in calls]
+
+    pending = [_get_fetch_pool().apply_async(_run_in_fetch_pool, (call,)) for call in calls[1:]]
+    first = calls[0]()
+    return [first] + [p.get() for p in pending]
+
+
+def _get_fetch_pool():
+    global _fetch_pool
+    with _fetch_pool_lock:
+        if _fetch_pool is None:
+            _fetch_pool = ThreadPool(TEXT_FAMILY_THREADS)
+        return _fetch_pool
+
+
+def _run_in_fetch_pool(call):
+    _fetch_local.in_pool = True
+    return call()
+
+
 class TextFamily(object):
     """
     A text with its translations and optionally the commentary on it.  Mirrors the construction of the old get_text() method.
@@ -1902,7 +2438,12 @@ class TextFamily(object):
     }
 
 
-    def __init__(self, oref, context=1, commentary=True, version=None, lang=None, pad=True):
+    def __init__(self, oref, context=1, commentary=True, version=None, lang=None, pad=True, concurrent=None):
+        """
+        :param concurrent: If True, the chunks of each language, the links and the version list are loaded in parallel.
+            If None, settings.TEXT_FAMILY_CONCURRENT.  See fetch_concurrently().
+        """
+        cache_key = (oref.normal(), lang, version, context, pad)
         if pad:
             oref = oref.padded_ref()
         self.ref = oref.normal()
@@ -1919,28 +2460,44 @@ class TextFamily(object):
             oref = oref.context_ref()
         self._context_oref = oref
 
+        generation = text_generation(oref.book) if text_family_cache.capacity else None
+        chunks = text_family_cache.get(cache_key, generation) if text_family_cache.capacity else None
+
+        fetches = OrderedDict()
+        if chunks is None:
+            for language in self.text_attr_map:
+                fetches[language] = partial(TextChunk, oref, language, version if language == lang else None)
+        if commentary:
+            fetches["links"] = partial(self._load_links, oref)
+            # get list of available versions of this text
+            # but only if you care enough to get commentary also (hack)
+            fetches["versions"] = oref.version_list
+        fetched = dict(zip(fetches.keys(), fetch_concurrently(fetches.values(), concurrent)))
+
+        if chunks is None:
+            chunks = {language: fetched[language] for language in self.text_attr_map}
+            text_family_cache.add(cache_key, oref.book, generation, chunks)
+
+        # The chunks may be shared with other requests through the cache, so callers get their own copy of the text
         for language, attr in self.text_attr_map.items():
-            if language == lang:
-                c = TextChunk(oref, language, version)
-            else:
-                c = TextChunk(oref, language)
-            self._chunks[language] = c
-            setattr(self, self.text_attr_map[language], c.text)
+            self._chunks[language] = chunks[language]
+            setattr(self, attr, copy.deepcopy(chunks[language].text))
 
         if oref.is_spanning():
             self.spanning = True
 
         if commentary:
-            from sefaria.client.wrapper import get_links
-            if not oref.is_spanning():
-                links = get_links(oref.normal())  #todo - have this function accept an object
-            else:
-                links = [get_links(r.normal()) for r in oref.split_spanning_ref()]
+            links = fetched["links"]
             self.commentary = links if "error" not in links else []
+            self.versions = fetched["versions"]
 
-            # get list of available versions of this text
-            # but only if you care enough to get commentary also (hack)
-            self.versions = oref.version_list()
+    @staticmethod
+    def _load_links(oref):
+        from sefaria.client.wrapper import get_links
+        if not oref.is_spanning():
+            return get_links(oref.normal())  #todo - have this function accept an object
+        else:
+            return [get_links(r.normal()) for r in oref.split_spanning_ref()]
 
     def contents(self):
         """ Ramaining:
@@ -1966,7 +2523,7 @@ class TextFamily(object):
         for attr in ["book", "type"]:
             d[attr] = getattr(self._original_oref, attr)
         for attr in ["sections", "toSections"]:
-            d[attr] = getattr(self._original_oref, attr)[:]
+            d[attr] = list(getattr(self._original_oref, attr))
         if self._context_oref.is_commentary():
             for attr in ["commentaryBook", "commentaryCategories", "commentator", "heCommentator"]:
                 d[attr] = getattr(self._inode.index, attr, "")
@@ -1974,7 +2531,7 @@ class TextFamily(object):
         for language, attr in self.text_attr_map.items():
             chunk = self._chunks.get(language)
             if chunk.is_merged:
-                d[self.sourceMap[language]] = chunk.sources
+                d[self.sourceMap[language]] = list(chunk.sources)
             else:
                 ver = chunk.version()
                 if ver:
@@ -2030,20 +2587,130 @@ def process_index_delete_in_versions(indx, **kwargs):
 """
 
 
+class RefCache(object):
+    """
+    A size bounded, least recently used cache of Ref objects, used by :class:`RefCachingType`.
+
+    Each Ref is held in one entry, keyed by its normal form.  Any other string that the Ref was instanciated with
+    is stored as an alias of that entry, so that a lookup by either string finds the same object,
+    and the aliases are dropped when the entry is evicted.
+    Counts hits, misses and evictions, so that the capacity can be sized from production data.
+    """
+
+    def __init__(self, capacity=None):
+        """
+        :param capacity: Maximum number of Refs to hold.  0 or None for unbounded.
+        """
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # normal form -> Ref, least recently used first
+        self._aliases = {}             # alternate string -> normal form
+        self._entry_aliases = {}       # normal form -> list of alternate strings
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the Ref cached under 'key' (a normal form or an alias), or None.
+        Marks the entry as recently used.
+        """
+        with self._lock:
+            normal = self._aliases.get(key, key)
+            ref = self._entries.pop(normal, None)
+            if ref is None:
+                self.misses += 1
+                return None
+            self._entries[normal] = ref
+            self.hits += 1
+            return ref
+
+    def add(self, ref, *aliases):
+        """
+        Caches 'ref' under its normal form, and under each of 'aliases'.
+        If a Ref with the same normal form is already cached, that Ref is kept, the aliases are attached to it,
+        and it is returned.
+        :return: The cached Ref
+        """
+        normal = ref.normal()
+        with self._lock:
+            cached = self._entries.pop(normal, None)
+            if cached is None:
+                cached = ref
+                self._entry_aliases[normal] = []
+            self._entries[normal] = cached
+            for alias in aliases:
+                if alias != normal and alias not in self._aliases:
+                    self._aliases[alias] = normal
+                    self._entry_aliases[normal].append(alias)
+            if self.capacity:
+                while len(self._entries) > self.capacity:
+                    self._evict()
+            return cached
+
+    def _evict(self):
+        normal, _ = self._entries.popitem(last=False)
+        for alias in self._entry_aliases.pop(normal, []):
+            del self._aliases[alias]
+        self.evictions += 1
+
+    def clear(self):
+        """
+        Empties the cache.  Hit, miss and eviction counts are kept.
+        """
+        with self._lock:
+            self._entries = OrderedDict()
+            self._aliases = {}
+            self._entry_aliases = {}
+
+    def iteritems(self):
+        """
+        Yields (key, Ref) for every key in the cache, both normal forms and aliases.
+        Iterates over a snapshot, taken under the lock, so other threads may add and evict meanwhile.
+        """
+        with self._lock:
+            snapshot = [(normal, ref, list(self._entry_aliases.get(normal, []))) for normal, ref in self._entries.iteritems()]
+        for normal, ref, aliases in snapshot:
+            yield normal, ref
+            for alias in aliases:
+                yield alias, ref
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "aliases": len(self._aliases),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self._aliases.get(key, key) in self._entries
+
+
 class RefCachingType(type):
     """
     Metaclass for Ref class.
-    Caches all Ref isntances according to the string they were instanciated with and their normal form.
+    Caches Ref isntances according to the string they were instanciated with and their normal form.
     Returns cached instance on instanciation if either instanciation string or normal form are matched.
+    The cache is bounded by settings.REF_CACHE_SIZE, evicting the least recently used Refs.
+    Passing _cache=False builds a Ref that is neither looked up in, nor added to, the cache.
     """
 
     def __init__(cls, name, parents, dct):
         super(RefCachingType, cls).__init__(name, parents, dct)
-        cls.__cache = {}
+        cls.__cache = RefCache(REF_CACHE_SIZE)
 
     def cache_size(cls):
         return len(cls.__cache)
 
+    def cache_stats(cls):
+        return cls.__cache.stats()
+
     def cache_dump(cls):
         return [(a, repr(b)) for (a, b) in cls.__cache.iteritems()]
 
@@ -2051,9 +2718,12 @@ class RefCachingType(type):
         return cls.__cache
 
     def clear_cache(cls):
-        cls.__cache = {}
+        cls.__cache.clear()
 
     def __call__(cls, *args, **kwargs):
+        if not kwargs.pop("_cache", True):
+            return super(RefCachingType, cls).__call__(*args, **kwargs)
+
         if len(args) == 1:
             tref = args[0]
         else:
@@ -2062,28 +2732,88 @@ class RefCachingType(type):
         obj_arg = kwargs.get("_obj")
 
         if tref:
-            if tref in cls.__cache:
-                return cls.__cache[tref]
-            else:
-                result = super(RefCachingType, cls).__call__(*args, **kwargs)
-                if result.normal() in cls.__cache:
-                    #del result  #  Do we need this to keep memory clean?
-                    cls.__cache[tref] = cls.__cache[result.normal()]
-                    return cls.__cache[result.normal()]
-                cls.__cache[result.normal()] = result
-                cls.__cache[tref] = result
-                return result
-        elif obj_arg:
-            result = super(RefCachingType, cls).__call__(*args, **kwargs)
-            if result.normal() in cls.__cache:
-                #del result  #  Do we need this to keep memory clean?
-                return cls.__cache[result.normal()]
-            cls.__cache[result.normal()] = result
+            result = cls.__cache.get(tref)
+            if result is None:
+                result = cls.__cache.add(super(RefCachingType, cls).__call__(*args, **kwargs), tref)
             return result
+        elif obj_arg:
+            return cls.__cache.add(super(RefCachingType, cls).__call__(*args, **kwargs))
         else:  # Default.  Shouldn't be used.
             return super(RefCachingType, cls).__call__(*args, **kwargs)
 
 
+_interned_strings = {}
+
+
+def _intern(s):
+    """
+    Returns a shared instance of string s, so that the many Refs to a book hold one copy of its name.
+    (The builtin intern() does not accept unicode.)
+    """
+    if s is None:
+        return s
+    return _interned_strings.setdefault(s, s)
+
+
+def _digits_range_regex(lo, hi):
+    """
+    Returns a regex for the numbers from lo to hi, which are digit strings of the same length.
+    """
+    rest = len(lo) - 1
+    if lo == hi:
+        return lo
+    if lo[1:] == "0" * rest and hi[1:] == "9" * rest:
+        return u"[{}-{}]".format(lo[0], hi[0]) + ur"\d" * rest
+    if lo[0] == hi[0]:
+        return u"{}(?:{})".format(lo[0], _digits_range_regex(lo[1:], hi[1:]))
+    parts = [u"{}(?:{})".format(lo[0], _digits_range_regex(lo[1:], "9" * rest))]
+    if int(hi[0]) - int(lo[0]) > 1:
+        parts.append(u"[{}-{}]".format(int(lo[0]) + 1, int(hi[0]) - 1) + ur"\d" * rest)
+    parts.append(u"{}(?:{})".format(hi[0], _digits_range_regex("0" * rest, hi[1:])))
+    return u"|".join(parts)
+
+
+def _int_range_regex(lo, hi=None):
+    """
+    Returns a regex for the integers from lo to hi, inclusive, without enumerating them.
+    If hi is None, the range has no upper bound.
+    _int_range_regex(3, 21) -> u"[3-9]|1(?:[0-9])|2(?:[0-1])"
+    """
+    lo_len = len(str(lo))
+    hi_len = len(str(hi)) if hi is not None else lo_len
+    parts = []
+    for length in range(lo_len, hi_len + 1):
+        start = lo if length == lo_len else 10 ** (length - 1)
+        end = hi if hi is not None and length == hi_len else 10 ** length - 1
+        if start <= end:
+            parts.append(_digits_range_regex(str(start), str(end)))
+    if hi is None:
+        parts.append(ur"[1-9]\d{%d,}" % lo_len)
+    return u"|".join(parts)
+
+
+def _daf_range_regex(lo, hi=None):
+    """
+    Returns a regex for the dafs of the Talmud sections from lo to hi, inclusive.  If hi is None, the range has no upper bound.
+    Section 3 is 2a, section 4 is 2b.
+    _daf_range_regex(4, 9) -> u"2b|(?:[3-4])[ab]|5a"
+    """
+    parts = []
+    first = (lo + 1) / 2
+    if lo % 2 == 0:
+        parts.append(u"{}b".format(lo / 2))
+        first += 1
+    if hi is None:
+        parts.append(u"(?:{})[ab]".format(_int_range_regex(first)))
+        return u"|".join(parts)
+    last = hi / 2
+    if first <= last:
+        parts.append(u"(?:{})[ab]".format(_int_range_regex(first, last)))
+    if hi % 2 == 1:
+        parts.append(u"{}a".format((hi + 1) / 2))
+    return u"|".join(parts)
+
+
 class Ref(object):
     """
         Current attr, old attr - def
@@ -2091,8 +2821,8 @@ class Ref(object):
         book, book - a string name of the text
         index.sectionNames, sectionNames - an array of strings naming the kinds of sections in this text (Chapter, Verse)
         index.textDepth, textDepth - an integer denote the number of sections named in sectionNames
-        sections, sections - an array of ints giving the requested sections numbers
-        toSections, toSections - an array of ints giving the requested sections at the end of a range
+        sections, sections - a tuple of ints giving the requested sections numbers
+        toSections, toSections - a tuple of ints giving the requested sections at the end of a range
         * next, prev - an dictionary with the ref and labels for the next and previous sections
         index.categories, categories - an array of categories for this text
         type, type - the highest level category for this text
@@ -2100,6 +2830,13 @@ class Ref(object):
 
     __metaclass__ = RefCachingType
 
+    # Refs are cached in great numbers, so they are kept compact: no instance __dict__, and memo fields are allocated when used
+    __slots__ = (
+        "index", "book", "type", "index_node", "sections", "toSections", "orig_tref", "tref", "_lang",
+        "_normal", "_he_normal", "_url", "_next", "_prev", "_padded", "_context", "_spanned_refs", "_ranged_refs",
+        "_range_depth", "_range_index"
+    )
+
     def __init__(self, tref=None, _obj=None):
         """
         Object is initialized with either tref - a textual reference, or _obj - a complete dict composing the Ref data
@@ -2119,16 +2856,24 @@ class Ref(object):
             self._lang = "he" if is_hebrew(tref) else "en"
             self.__clean_tref()
             self.__init_tref()
+            self.__compact()
             self._validate()
         elif _obj:
             for key, value in _obj.items():
                 setattr(self, key, value)
+            self.__compact()
             self.__init_ref_pointer_vars()
             self.tref = self.normal()
             self._validate()
         else:
             self.__init_ref_pointer_vars()
 
+    def __compact(self):
+        self.book = _intern(self.book)
+        self.type = _intern(self.type)
+        self.sections = tuple(self.sections)
+        self.toSections = tuple(self.toSections)
+
     def __init_ref_pointer_vars(self):
         self._normal = None
         self._he_normal = None
@@ -2136,9 +2881,9 @@ class Ref(object):
         self._next = None
         self._prev = None
         self._padded = None
-        self._context = {}
-        self._spanned_refs = []
-        self._ranged_refs = []
+        self._context = None
+        self._spanned_refs = None
+        self._ranged_refs = None
         self._range_depth = None
         self._range_index = None
 
@@ -2179,7 +2924,7 @@ class Ref(object):
         base = parts[0]
         title = None
 
-        match = library.all_titles_regex(self._lang).match(base)
+        match = library.all_titles_trie(self._lang).match(base)
         if match:
             title = match.group('title')
             self.index_node = library.get_schema_node(title, self._lang)
@@ -2196,8 +2941,7 @@ class Ref(object):
             if getattr(self.index_node, "checkFirst", None) and self.index_node.checkFirst.get(self._lang):
                 try:
                     check_node = library.get_schema_node(self.index_node.checkFirst[self._lang], self._lang)
-                    re_string = '^' + regex.escape(title) + check_node.delimiter_re + check_node.regex(self._lang, strict=True)
-                    reg = regex.compile(re_string, regex.VERBOSE)
+                    reg = check_node.full_regex(title, self._lang, strict=True)
                     self.sections = self.__get_sections(reg, base)
                 except InputError: # Regex doesn't work
                     pass
@@ -2210,7 +2954,7 @@ class Ref(object):
             self.book = self.index_node.full_title("en")
 
         elif self._lang == "en":  # Check for a Commentator
-            match = library.all_titles_regex(self._lang, commentary=True).match(base)
+            match = library.all_titles_trie(self._lang, commentary=True).match(base)
             if match:
                 title = match.group('title')
                 self.index = get_index(title)
@@ -2234,8 +2978,7 @@ class Ref(object):
                 self.book = self.index_node.full_title("en")
             return
 
-        re_string = '^' + regex.escape(title) + self.index_node.delimiter_re + self.index_node.regex(self._lang)
-        reg = regex.compile(re_string, regex.VERBOSE)
+        reg = self.index_node.full_regex(title, self._lang)
 
         self.sections = self.__get_sections(reg, base)
         self.type = self.index_node.index.categories[0]
@@ -2380,8 +3123,8 @@ class Ref(object):
             "book": self.book,
             "type": self.type,
             "index_node": self.index_node,
-            "sections": self.sections[:],
-            "toSections": self.toSections[:]
+            "sections": list(self.sections),
+            "toSections": list(self.toSections)
         }
 
     def section_ref(self):
@@ -2453,14 +3196,22 @@ class Ref(object):
         if len(starting_points) > 0:
             starting_points[-1] += 1 if forward else -1
 
-        #let the counts obj calculate the correct place to go.
-        c = self.get_state_node().ja("all", "availableTexts")
-        new_section = c.next_index(starting_points) if forward else c.prev_index(starting_points)
+        #look up the place to go in the precomputed table of populated sections, if there is one
+        new_section = False
+        if depth_up == 1:
+            from . import version_state
+            new_section = version_state.next_populated_section(self, starting_points, forward)
 
-        # we are also scaling back the sections to the level ABOVE the lowest section type (eg, for bible we want chapter, not verse)
-        if new_section:
+        if new_section is False:
+            #let the counts obj calculate the correct place to go.
+            c = self.get_state_node().ja("all", "availableTexts")
+            new_section = c.next_index(starting_points) if forward else c.prev_index(starting_points)
+            # we are also scaling back the sections to the level ABOVE the lowest section type (eg, for bible we want chapter, not verse)
+            new_section = new_section[:-depth_up] if new_section else None
+
+        if new_section is not None:
             d = self._core_dict()
-            d["toSections"] = d["sections"] = [(s + 1) for s in new_section[:-depth_up]]
+            d["toSections"] = d["sections"] = [(s + 1) for s in new_section]
             return Ref(_obj=d)
         else:
             return None
@@ -2484,7 +3235,7 @@ class Ref(object):
         if level == 0:
             return self
 
-        if not self._context.get(level) or not self._context[level]:
+        if not self._context or not self._context.get(level):
             if len(self.sections) <= self.index_node.depth - level:
                 return self
 
@@ -2493,6 +3244,8 @@ class Ref(object):
             d = self._core_dict()
             d["sections"] = d["sections"][:self.index_node.depth - level]
             d["toSections"] = d["toSections"][:self.index_node.depth - level]
+            if self._context is None:
+                self._context = {}
             self._context[level] = Ref(_obj=d)
         return self._context[level]
 
@@ -2504,7 +3257,7 @@ class Ref(object):
         """
         if not self._padded:
             if not getattr(self, "index_node", None):
-                raise Exception(u"No index_node found {}".format(vars(self)))
+                raise Exception(u"No index_node found {}".format(self.tref))
             if len(self.sections) >= self.index_node.depth - 1:
                 return self
 
@@ -2528,44 +3281,53 @@ class Ref(object):
 
         """
         if not self._spanned_refs:
+            self._spanned_refs = list(self._iter_spanned_refs())
+        return self._spanned_refs
 
-            if self.index_node.depth == 1 or not self.is_spanning():
-                self._spanned_refs = [self]
+    def iter_split_spanning_ref(self):
+        """
+        Yields the same refs as split_spanning_ref(), one at a time.
+        The refs are not added to the Ref cache, so a very large span can be walked without holding all of its sections in memory.
+        """
+        if self._spanned_refs:
+            return iter(self._spanned_refs)
+        return self._iter_spanned_refs(cache=False)
+
+    def _iter_spanned_refs(self, cache=True):
+        if self.index_node.depth == 1 or not self.is_spanning():
+            yield self
+            return
+
+        start, end = self.sections[self.range_index()], self.toSections[self.range_index()]
+        ref_depth = len(self.sections)
+        ja = self.get_state_ja() if self.range_index() + 1 < ref_depth else None
 
+        for n in range(start, end + 1):
+            d = self._core_dict()
+            if n == start:
+                d["toSections"] = list(self.sections[0:self.range_index() + 1])
+                for i in range(self.range_index() + 1, ref_depth):
+                    d["toSections"] += [ja.sub_array_length([s - 1 for s in d["toSections"][0:i]])]
+            elif n == end:
+                d["sections"] = list(self.toSections[0:self.range_index() + 1])
+                for _ in range(self.range_index() + 1, ref_depth):
+                    d["sections"] += [1]
             else:
-                start, end = self.sections[self.range_index()], self.toSections[self.range_index()]
-                ref_depth = len(self.sections)
-
-                refs = []
-                for n in range(start, end + 1):
-                    d = self._core_dict()
-                    if n == start:
-                        d["toSections"] = self.sections[0:self.range_index() + 1]
-                        for i in range(self.range_index() + 1, ref_depth):
-                            d["toSections"] += [self.get_state_ja().sub_array_length([s - 1 for s in d["toSections"][0:i]])]
-                    elif n == end:
-                        d["sections"] = self.toSections[0:self.range_index() + 1]
-                        for _ in range(self.range_index() + 1, ref_depth):
-                            d["sections"] += [1]
-                    else:
-                        d["sections"] = self.sections[0:self.range_index()] + [n]
-                        d["toSections"] = self.sections[0:self.range_index()] + [n]
-
-                        for i in range(self.range_index() + 1, ref_depth):
-                            d["sections"] += [1]
-                            d["toSections"] += [self.get_state_ja().sub_array_length([s - 1 for s in d["toSections"][0:i]])]
-                    if d["toSections"][-1]:  # to filter out, e.g. non-existant Rashi's, where the last index is 0
-                        refs.append(Ref(_obj=d))
-
-                if self.range_depth() == 2:
-                    self._spanned_refs = refs
-                if self.range_depth() > 2: #recurse
-                    expanded_refs = []
-                    for ref in refs:
-                        expanded_refs.extend(ref.split_spanning_ref())
-                    self._spanned_refs = expanded_refs
+                d["sections"] = list(self.sections[0:self.range_index()]) + [n]
+                d["toSections"] = list(self.sections[0:self.range_index()]) + [n]
 
-        return self._spanned_refs
+                for i in range(self.range_index() + 1, ref_depth):
+                    d["sections"] += [1]
+                    d["toSections"] += [ja.sub_array_length([s - 1 for s in d["toSections"][0:i]])]
+            if not d["toSections"][-1]:  # to filter out, e.g. non-existant Rashi's, where the last index is 0
+                continue
+
+            ref = Ref(_obj=d, _cache=cache)
+            if self.range_depth() > 2:  # recurse
+                for sub_ref in ref._iter_spanned_refs(cache):
+                    yield sub_ref
+            else:
+                yield ref
 
     def range_list(self):
         """
@@ -2578,44 +3340,92 @@ class Ref(object):
             if self.is_spanning():
                 raise InputError(u"Can not get range of spanning ref: {}".format(self))
 
+            self._ranged_refs = list(self._iter_ranged_refs())
+        return self._ranged_refs
 
-            results = []
-
-            for s in range(self.sections[-1], self.toSections[-1] + 1):
-                d = self._core_dict()
-                d["sections"][-1] = s
-                d["toSections"][-1] = s
-                results.append(Ref(_obj=d))
+    def iter_range_list(self):
+        """
+        Yields the same refs as range_list(), one at a time, without adding them to the Ref cache.
+        Does not work for spanning refs
+        """
+        if self._ranged_refs:
+            return iter(self._ranged_refs)
+        if not self.is_range():
+            return iter([self])
+        if self.is_spanning():
+            raise InputError(u"Can not get range of spanning ref: {}".format(self))
+        return self._iter_ranged_refs(cache=False)
 
-            self._ranged_refs = results
-        return self._ranged_refs
+    def _iter_ranged_refs(self, cache=True):
+        for s in range(self.sections[-1], self.toSections[-1] + 1):
+            d = self._core_dict()
+            d["sections"][-1] = s
+            d["toSections"][-1] = s
+            yield Ref(_obj=d, _cache=cache)
 
     def regex(self):
         """
         Returns a string for a Regular Expression which will find any refs that match
         'ref' exactly, or more specificly than 'ref'
         E.g., "Genesis 1" yields an RE that match "Genesis 1" and "Genesis 1:3"
+        Ranged and spanning refs are matched by the numeric bounds of their sections, rather than by listing every ref in the range.
         """
         #todo: explore edge cases - book name alone, full ref to segment level
-        patterns = []
+        if self.is_range() and (self.type != "Commentary" or getattr(self.index, "commentaryCategories", None)):
+            return u"^%s( (?:%s)(?:$|:| \d))" % (re.escape(self.book), self._section_range_regex(self.sections, self.toSections))
+
+        # Ranges of commentaries without commentaryCategories still list every ref in the range
         if self.is_spanning():
-            s_refs = self.split_spanning_ref()
             normals = []
-            for s_ref in s_refs:
+            for s_ref in self.split_spanning_ref():
                 normals += [r.normal() for r in s_ref.range_list()]
         elif self.is_range():
             normals = [r.normal() for r in self.range_list()]
         else:
             normals = [self.normal()]
 
+        patterns = []
         for r in normals:
             sections = re.sub("^%s" % re.escape(self.book), '', r)
             patterns.append("%s$" % sections)   # exact match
             patterns.append("%s:" % sections)   # more granualar, exact match followed by :
             patterns.append("%s \d" % sections) # extra granularity following space
-
         return "^%s(%s)" % (re.escape(self.book), "|".join(patterns))
 
+    def _section_range_regex(self, starts, ends, level=0):
+        """
+        Returns a regex for the section addresses from starts to ends, inclusive, as they are written in normal().
+        Either bound may be a list of Nones, for no bound.
+        E.g., for Genesis, [1, 5], [3, 2] -> u"1:(?:[5-9]|[1-9]\d{1,})|(?:2)(?::\d+)|3:(?:[1-2])"
+        """
+        def section_regex(lo, hi):
+            lo = lo or 1
+            if level == 0 and self.is_talmud():
+                return _daf_range_regex(lo, hi)
+            return _int_range_regex(lo, hi)
+
+        def section_str(n):
+            return section_to_daf(n) if level == 0 and self.is_talmud() else str(n)
+
+        if len(starts) == 1:
+            return section_regex(starts[0], ends[0])
+
+        lo, hi = starts[0], ends[0]
+        unbounded = [None] * (len(starts) - 1)
+        if lo is not None and lo == hi:
+            return u"{}:(?:{})".format(section_str(lo), self._section_range_regex(starts[1:], ends[1:], level + 1))
+
+        parts = []
+        if lo is not None:
+            parts.append(u"{}:(?:{})".format(section_str(lo), self._section_range_regex(starts[1:], unbounded, level + 1)))
+        middle_lo = lo + 1 if lo is not None else None
+        middle_hi = hi - 1 if hi is not None else None
+        if middle_hi is None or (middle_lo or 1) <= middle_hi:
+            parts.append(u"(?:{}){}".format(section_regex(middle_lo, middle_hi), ur"(?::\d+)" * len(unbounded)))
+        if hi is not None:
+            parts.append(u"{}:(?:{})".format(section_str(hi), self._section_range_regex(unbounded, ends[1:], level + 1)))
+        return u"|".join(parts)
+
     """ Methods for working with Versions and VersionSets """
     def storage_address(self):
         return ".".join(["chapter"] + self.index_node.address()[1:])
@@ -2667,16 +3477,16 @@ class Ref(object):
                     condition_addr: {"$exists": True, "$elemMatch": {"$nin": ["", [], 0]}}
                 })
         else:
-            #todo: If this method gets cached, then copies need to be made before the del below.
-            parts = []
-            refs = self.split_spanning_ref()
-            for r in refs:
-                q = r.condition_query()
-                del q["title"]
-                parts.append(q)
-                d.update({
-                    "$or": parts
-                })
+            # One condition for each section in the span, at the level where the span begins.
+            # The sections are read off of sections and toSections, without building a Ref for each of them.
+            for s in range(0, self.range_index()):
+                condition_addr += ".{}".format(self.sections[s] - 1)
+            d.update({
+                "$or": [
+                    {"{}.{}".format(condition_addr, n - 1): {"$exists": True, "$elemMatch": {"$nin": ["", [], 0]}}}
+                    for n in range(self.sections[self.range_index()], self.toSections[self.range_index()] + 1)
+                ]
+            })
 
         return d
 
@@ -2742,7 +3552,7 @@ class Ref(object):
                 if not self.sections[i] == self.toSections[i]:
                     if self.is_talmud():
                         if i == 0:
-                            self._he_normal += u"-{}".format((u" ".join([unicode(s) for s in [section_to_daf(self.toSections[0], lang="he")] + self.toSections[i + 1:]])))
+                            self._he_normal += u"-{}".format((u" ".join([unicode(s) for s in [section_to_daf(self.toSections[0], lang="he")] + list(self.toSections[i + 1:])])))
                         else:
                             self._he_normal += u"-{}".format((u" ".join([unicode(s) for s in self.toSections[i:]])))
                     else:
@@ -2770,7 +3580,7 @@ class Ref(object):
             for i in range(len(self.sections)):
                 if not self.sections[i] == self.toSections[i]:
                     if i == 0 and self.is_talmud():
-                        self._normal += "-{}".format((":".join([str(s) for s in [section_to_daf(self.toSections[0])] + self.toSections[i + 1:]])))
+                        self._normal += "-{}".format((":".join([str(s) for s in [section_to_daf(self.toSections[0])] + list(self.toSections[i + 1:])])))
                     else:
                         self._normal += "-{}".format(":".join([str(s) for s in self.toSections[i:]]))
                     break
@@ -2813,6 +3623,154 @@ class Ref(object):
         return LinkSet(self)
 
 
+class TitleMatch(object):
+    """
+    The result of a title search with a title matcher.  Mirrors the parts of a regex match object used by the title regexes.
+    """
+    def __init__(self, string, start, title_end, end, groups=None):
+        """
+        :param string: The string searched
+        :param start: Position of the start of the title
+        :param title_end: Position of the end of the title
+        :param end: Position of the end of the match, including any delimiters following the title
+        :param groups: dict of other named parts of the title, e.g. 'commentor'
+        """
+        self.string = string
+        self._start = start
+        self._title_end = title_end
+        self._end = end
+        self._groups = groups or {}
+
+    def group(self, name="title"):
+        if name == "title":
+            return self.string[self._start:self._title_end]
+        return self._groups.get(name)
+
+    def start(self):
+        return self._start
+
+    def end(self):
+        return self._end
+
+
+class AbstractTitleMatcher(object):
+    """
+    Finds known titles in strings.  A title matches only where it is followed by the end of the string or by delimiters.
+    Subclasses implement match().
+    """
+    delimiters = u":., "
+
+    def match(self, s, pos=0):
+        """
+        :param s: The string to search
+        :param pos: The position in s at which the title must begin
+        :return: TitleMatch or None
+        """
+        pass
+
+    def finditer(self, s):
+        """
+        Yields non-overlapping TitleMatches, from left to right, in one pass over s
+        """
+        pos = 0
+        while pos < len(s):
+            m = self.match(s, pos)
+            if m:
+                yield m
+                pos = m.end()
+            else:
+                pos += 1
+
+    def _delimited(self, s, end):
+        """
+        :return: The end of the delimiters that follow position 'end' in s, or None if the title at 'end' is not followed by delimiters or the end of the string
+        """
+        if end == len(s):
+            return end
+        i = end
+        while i < len(s) and s[i] in self.delimiters:
+            i += 1
+        return i if i > end else None
+
+
+class TitleTrie(AbstractTitleMatcher):
+    """
+    A character trie of titles.
+    Finding a title walks the trie from a position in the string, so the cost of a search is independent of the number of titles,
+    and the trie grows only with the total length of the titles.
+    Where several titles begin at the same position, the longest one that is followed by delimiters matches.
+    """
+    _terminal = ""  # Key that marks the end of a title.  Never a single character, so never confused with a child.
+
+    def __init__(self, titles=None):
+        self._root = {}
+        for title in titles or []:
+            self.add(title)
+
+    def add(self, title):
+        if not title:
+            return self
+        node = self._root
+        for c in title:
+            node = node.setdefault(c, {})
+        node[self._terminal] = True
+        return self
+
+    def prefix_ends(self, s, pos=0):
+        """
+        :return: list of end positions of every title that begins at s[pos], longest first
+        """
+        ends = []
+        node = self._root
+        i = pos
+        while True:
+            if self._terminal in node:
+                ends.append(i)
+            if i == len(s):
+                break
+            node = node.get(s[i])
+            if node is None:
+                break
+            i += 1
+        ends.reverse()
+        return ends
+
+    def match(self, s, pos=0):
+        for title_end in self.prefix_ends(s, pos):
+            end = self._delimited(s, title_end)
+            if end is not None:
+                return TitleMatch(s, pos, title_end, end)
+        return None
+
+
+class CommentaryTitleMatcher(AbstractTitleMatcher):
+    """
+    Matches "<commentator> on <title>" titles, e.g. "Rashi on Genesis".
+    Sets the 'commentor' and 'commentee' groups on its matches.
+    """
+    connector = u" on "
+
+    def __init__(self, commentator_trie, title_trie):
+        """
+        :param commentator_trie: TitleTrie of commentator names
+        :param title_trie: TitleTrie of the titles that can be commented on
+        """
+        self.commentator_trie = commentator_trie
+        self.title_trie = title_trie
+
+    def match(self, s, pos=0):
+        for c_end in self.commentator_trie.prefix_ends(s, pos):
+            if not s.startswith(self.connector, c_end):
+                continue
+            m = self.title_trie.match(s, c_end + len(self.connector))
+            if m:
+                return TitleMatch(s, pos, m._title_end, m.end(), {
+                    "commentor": s[pos:c_end],
+                    "commentee": m.group("title")
+                })
+        return None
+
+
 class Library(object):
     """
     A highest level class, for methods that work across the entire collection of texts.
@@ -2822,6 +3780,8 @@ class Library(object):
 
     local_cache = {}
 
+    snapshot_version = 1  # Increment when the contents or format of snapshots change
+
     #WARNING: Do NOT put the compiled re2 object into redis.  It gets corrupted.
     def all_titles_regex(self, lang="en", commentary=False):
         """
@@ -2856,6 +3816,31 @@ class Library(object):
             self.local_cache[key] = reg
         return reg
 
+    def all_titles_trie(self, lang="en", commentary=False):
+        """
+        A title matcher that will match any known title in the library in the provided language.
+        Behaves like the regex returned by all_titles_regex(), for match() and finditer(), without compiling the titles into one regular expression.
+        :param lang: "en" or "he"
+        :param commentary bool: Default False.  If True, matches commentary records only.  If False matches simple records only.
+        :return: TitleTrie or CommentaryTitleMatcher
+        :raise InputError: if lang == "he" and commentary == True
+        """
+        key = "all_titles_trie_" + lang
+        key += "_commentary" if commentary else ""
+        matcher = self.local_cache.get(key)
+        if not matcher:
+            if not commentary:
+                matcher = TitleTrie(self.full_title_list(lang, with_commentators=False))
+            else:
+                if lang == "he":
+                    raise InputError("No support for Hebrew Commentatory Ref Objects")
+                matcher = CommentaryTitleMatcher(
+                    TitleTrie(self.get_commentator_titles(with_variants=True)),
+                    self.all_titles_trie(lang)
+                )
+            self.local_cache[key] = matcher
+        return matcher
+
     def full_title_list(self, lang="en", with_commentators=True, with_commentary=False):
         """ Returns a list of strings of all possible titles, including maps
         If with_commentators is True, includes the commentator names, with variants, but not the cross-product with books.
@@ -2864,15 +3849,82 @@ class Library(object):
         key = "full_title_list_" + lang
         key += "_commentators" if with_commentators else ""
         key += "_commentary" if with_commentary else ""
-        titles = scache.get_cache_elem(key)
+        titles = self.local_cache.get(key)
+        if not titles:
+            titles = scache.get_cache_elem(key)
         if not titles:
             titles = self.get_title_node_dict(lang, with_commentary=with_commentary).keys()
             titles += self.get_map_dict().keys()
             if with_commentators:
                 titles += self.get_commentator_titles(lang, with_variants=True)
             scache.set_cache_elem(key, titles)
+        self.local_cache[key] = titles
         return titles
 
+    def index_generation(self):
+        """
+        :return: int that increases whenever an Index record is saved or deleted.  Snapshots are valid only for the generation they were built at.
+        """
+        doc = db.generations.find_one({"_id": "index"})
+        return doc["generation"] if doc else 0
+
+    def bump_index_generation(self):
+        bump_generation("index")
+
+    def build_snapshot(self, path=None):
+        """
+        Computes the library's derived title, node and map tables and writes them to a file,
+        which load_snapshot() reads in place of computing them.
+        :param path: Default settings.LIBRARY_SNAPSHOT_PATH
+        :return: The path written
+        """
+        path = path or LIBRARY_SNAPSHOT_PATH
+        if not path:
+            raise InputError("No path given for library snapshot, and settings.LIBRARY_SNAPSHOT_PATH is not set.")
+        generation = self.index_generation()
+        self.local_cache = {}
+        for lang in ["en", "he"]:
+            self.get_title_node_dict(lang)
+            self.full_title_list(lang)
+            self.full_title_list(lang, with_commentators=False)
+            self.all_titles_trie(lang)
+        self.all_titles_trie("en", commentary=True)
+
+        snapshot = {
+            "version": self.snapshot_version,
+            "generation": generation,
+            "tables": {k: v for k, v in self.local_cache.items() if not k.startswith("all_titles_regex")}  # compiled regexes don't pickle
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(snapshot, f, pickle.HIGHEST_PROTOCOL)
+        os.rename(tmp_path, path)  # Replace atomically, so that a loading process never reads a partial file
+        return path
+
+    def load_snapshot(self, path=None):
+        """
+        Loads the tables written by build_snapshot(), if the file was built for the current Index generation and snapshot version.
+        :param path: Default settings.LIBRARY_SNAPSHOT_PATH
+        :return: True if the snapshot was loaded
+        """
+        path = path or LIBRARY_SNAPSHOT_PATH
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            with open(path, "rb") as f:
+                snapshot = pickle.load(f)
+        except Exception as e:
+            logger.warning(u"Failed to read library snapshot {}: {}".format(path, e))
+            return False
+        if snapshot.get("version") != self.snapshot_version:
+            logger.info(u"Ignoring library snapshot {}, built with version {}".format(path, snapshot.get("version")))
+            return False
+        if snapshot.get("generation") != self.index_generation():
+            logger.info(u"Ignoring stale library snapshot {}".format(path))
+            return False
+        self.local_cache.update(snapshot["tables"])
+        return True
+
     def ref_list(self):
         from version_state import VersionStateSet
         return [r.normal() for r in VersionStateSet().all_refs()]
@@ -2880,12 +3932,15 @@ class Library(object):
     #todo: how do we handle language here?
     def get_map_dict(self):
         """ Returns a dictionary of maps - {from: to} """
-        maps = {}
-        for i in IndexSet():
-            if i.is_commentary():
-                continue
-            for m in i.get_maps():  # both simple maps & those derived from term schemes
-                maps[m["from"]] = m["to"]
+        maps = self.local_cache.get("map_dict")
+        if maps is None:
+            maps = {}
+            for i in IndexSet():
+                if i.is_commentary():
+                    continue
+                for m in i.get_maps():  # both simple maps & those derived from term schemes
+                    maps[m["from"]] = m["to"]
+            self.local_cache["map_dict"] = maps
         return maps
 
     # todo: commentary nodes - hairy because right now there's the JA assumption on commentary nodes
@@ -2958,7 +4013,7 @@ class Library(object):
 
     #todo: This wants some thought...
     def get_commentary_schema_node(self, title, lang="en"): #only supports "en"
-        match = self.all_titles_regex(lang, commentary=True).match(title)
+        match = self.all_titles_trie(lang, commentary=True).match(title)
         if match:
             title = match.group('title')
             index = get_index(title)
@@ -3030,10 +4085,131 @@ class Library(object):
         if not lang:
             lang = "he" if is_hebrew(s) else "en"
         if lang=="en":
-            #todo: combine into one regex
-            return [m.group('title') for m in self.all_titles_regex(lang, commentary=True).finditer(s)] + [m.group('title') for m in self.all_titles_regex(lang, commentary=False).finditer(s)]
+            # One pass over the string, tracking commentary and simple titles separately,
+            # so that e.g. "Rashi on Genesis" yields both "Rashi on Genesis" and "Genesis"
+            simple_matcher = self.all_titles_trie(lang)
+            commentary_matcher = self.all_titles_trie(lang, commentary=True)
+            commentary_titles, simple_titles = [], []
+            next_commentary = next_simple = 0
+            for pos in xrange(len(s)):
+                if pos >= next_commentary:
+                    m = commentary_matcher.match(s, pos)
+                    if m:
+                        commentary_titles.append(m.group('title'))
+                        next_commentary = m.end()
+                if pos >= next_simple:
+                    m = simple_matcher.match(s, pos)
+                    if m:
+                        simple_titles.append(m.group('title'))
+                        next_simple = m.end()
+            return commentary_titles + simple_titles
         elif lang=="he":
-            return [m.group('title') for m in self.all_titles_regex(lang, commentary=False).finditer(s)]
+            return [m.group('title') for m in self.all_titles_trie(lang).finditer(s)]
+
+    def parse_refs(self, trefs, processes=None, chunksize=1000):
+        """
+        Parses many textual references at once.
+        Identical strings are parsed once.  The compiled regexes of each node are shared (see JaggedArrayNode.full_regex()),
+        so they are built once per title however many strings refer to it.
+        When run in worker processes, strings are sent in chunks grouped by the title they begin with,
+        so that each worker builds the regexes for as few titles as it can.
+        :param trefs: iterable of textual references
+        :param processes: If greater than 1, the number of worker processes to parse with.  For very large inputs.
+        :param chunksize: The most strings sent to a worker process at a time
+        :return: list, in the order of trefs, holding for each string either its Ref or the InputError raised in parsing it
+        """
+        trefs = list(trefs)
+
+        results = {}
+        if processes and processes > 1:
+            groups = {}
+            for tref in set(trefs):
+                groups.setdefault(self._ref_title_key(tref), []).append(tref)
+            chunks = []
+            for key in sorted(groups.iterkeys()):
+                group = groups[key]
+                chunks += [group[i:i + chunksize] for i in range(0, len(group), chunksize)]
+            pool = multiprocessing.Pool(processes)
+            try:
+                for chunk_results in pool.imap_unordered(_parse_refs_to_addresses, chunks):
+                    for tref, address, error in chunk_results:
+                        if error is not None:
+                            results[tref] = InputError(error)
+                        else:
+                            try:
+                                results[tref] = self._ref_from_address(address)
+                            except InputError as e:
+                                results[tref] = e
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            for tref in trefs:
+                if tref not in results:
+                    results[tref] = _parse_ref(tref)
+
+        return [results[tref] for tref in trefs]
+
+    def _ref_title_key(self, tref):
+        """
+        :return: The title that tref begins with, or u"" if none is found.  Used to group strings in parse_refs().
+        """
+        try:
+            base = tref.strip().replace("_", " ")
+            if not is_hebrew(base):
+                base = base.decode('utf-8') if isinstance(base, str) else base
+                return self.all_titles_trie("en").match(base[:1].upper() + base[1:]).group('title')
+            return self.all_titles_trie("he").match(base).group('title')
+        except (AttributeError, UnicodeError):
+            return u""
+
+    @staticmethod
+    def _ref_address(oref):
+        """
+        :return: A picklable tuple that identifies oref, for rebuilding it with _ref_from_address()
+        """
+        def node_address(node):
+            path = []
+            while node.parent:
+                path.insert(0, node.parent.children.index(node))
+                node = node.parent
+            return node.index.title, path
+
+        if isinstance(oref.index_node, JaggedArrayCommentatorNode):
+            node_addr = (oref.index.title, None)
+            commentee_addr = node_address(oref.index_node.basenode)
+        else:
+            node_addr = node_address(oref.index_node)
+            commentee_addr = None
+        return oref.book, oref.type, node_addr, commentee_addr, oref.sections, oref.toSections
+
+    @staticmethod
+    def _ref_from_address(address):
+        """
+        Rebuilds a Ref from the tuple returned by _ref_address(), without parsing a string
+        """
+        def address_node(node_addr):
+            title, path = node_addr
+            node = get_index(title).nodes
+            for i in path:
+                node = node.children[i]
+            return node
+
+        book, type, node_addr, commentee_addr, sections, toSections = address
+        if commentee_addr:
+            index = get_index(node_addr[0])
+            node = JaggedArrayCommentatorNode(index, address_node(commentee_addr))
+        else:
+            node = address_node(node_addr)
+            index = node.index
+        return Ref(_obj={
+            "index": index,
+            "book": book,
+            "type": type,
+            "index_node": node,
+            "sections": sections,
+            "toSections": toSections
+        })
 
     def get_refs_in_string(self, st, lang=None):
         """
@@ -3050,7 +4226,7 @@ class Library(object):
                 res = self._build_all_refs_from_string(title, st)
                 refs += res
         else:  # lang == "en"
-            for match in self.all_titles_regex(lang, commentary=False).finditer(st):
+            for match in self.all_titles_trie(lang).finditer(st):
                 title = match.group('title')
                 res = self._build_ref_from_string(title, st[match.start():])  # Slice string from title start
                 refs += res
@@ -3067,8 +4243,7 @@ class Library(object):
         """
         node = self.get_schema_node(title, lang)
 
-        re_string = '^' + regex.escape(title) + node.delimiter_re + node.regex(lang)
-        reg = regex.compile(re_string, regex.VERBOSE)
+        reg = node.full_regex(title, lang)
         ref_match = reg.match(st)
         if ref_match:
             sections = []
@@ -3106,17 +4281,7 @@ class Library(object):
         node = self.get_schema_node(title, lang)
 
         refs = []
-        re_string = ur"""(?<=							# look behind for opening brace
-                [({]										# literal '(', brace,
-                [^})]*										# anything but a closing ) or brace
-            )
-            """ + regex.escape(title) + node.delimiter_re + node.regex(lang) + ur"""
-            (?=												# look ahead for closing brace
-                [^({]*										# match of anything but an opening '(' or brace
-                [)}]										# zero-width: literal ')' or brace
-            )"""
-        #node.regex(lang)
-        reg = regex.compile(re_string, regex.VERBOSE)
+        reg = node.full_regex(title, lang, anchored=False)
         for ref_match in reg.finditer(st):
             sections = []
             gs = ref_match.groupdict()
@@ -3141,3 +4306,28 @@ class Library(object):
         return refs
 
 library = Library()
+
+
+def _parse_ref(tref):
+    """
+    :return: Ref for tref, or the InputError raised in parsing it.  Used by Library.parse_refs().
+    """
+    try:
+        return Ref(tref)
+    except InputError as e:
+        return e
+
+
+def _parse_refs_to_addresses(trefs):
+    """
+    Worker for Library.parse_refs() when run in a process pool.  Returns picklable results.
+    :return: list of (tref, address, error message) tuples.  Exactly one of address and error message is None.
+    """
+    results = []
+    for tref in trefs:
+        oref = _parse_ref(tref)
+        if isinstance(oref, InputError):
+            results.append((tref, None, unicode(oref)))
+        else:
+            results.append((tref, library._ref_address(oref), None))
+    return results
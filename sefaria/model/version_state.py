@@ -3,6 +3,7 @@ version_state.py
 Writes to MongoDB Collection:
 """
 import logging
+from bisect import bisect_left, bisect_right
 
 
 logger = logging.getLogger(__name__)
@@ -10,10 +11,12 @@ logger = logging.getLogger(__name__)
 from . import abstract as abst
 from . import text
 from . import link
-from text import VersionSet, AbstractIndex, AbstractSchemaContent, IndexSet, library, get_index, Ref
+from text import VersionSet, AbstractIndex, AbstractSchemaContent, IndexSet, library, get_index, Ref, JaggedArrayNode, merge_texts
 from sefaria.datatype.jagged_array import JaggedTextArray, JaggedIntArray
 from sefaria.system.exceptions import InputError, BookNameError
 from sefaria.system.cache import delete_template_cache
+from sefaria.system.database import db
+from sefaria.utils.util import strip_tags
 
 '''
 old count docs were:
@@ -64,6 +67,7 @@ and now self.content is:
         "_he": ...
         "_all" {
             "availableTexts":
+            "populatedSections":  # ordered list of the addresses (0 based) of sections with any text.  Used for next/prev navigation.
         }
     }
 
@@ -82,7 +86,8 @@ class VersionState(abst.AbstractMongoRecord, AbstractSchemaContent):
     ]
     optional_attrs = [
         "flags",
-        "linksCount"
+        "linksCount",
+        "preview"  # for simple texts, the preview of each section.  See make_text_preview().
         #"categories",
     ]
 
@@ -143,6 +148,12 @@ class VersionState(abst.AbstractMongoRecord, AbstractSchemaContent):
         self.content = self.index.nodes.visit_content(self._content_node_visitor, self.content)
         self.index.nodes.visit_structure(self._aggregate_structure_state, self)
         self.linksCount = link.LinkSet(Ref(self.index.title)).count()
+        if isinstance(self.index.nodes, JaggedArrayNode):
+            self.preview = make_text_preview(
+                _merge_for_preview([v.chapter for v in self.versions("en")]),
+                _merge_for_preview([v.chapter for v in self.versions("he")]),
+                self.index.nodes.depth
+            )
         self.save()
 
     def get_flag(self, flag):
@@ -205,7 +216,10 @@ class VersionState(abst.AbstractMongoRecord, AbstractSchemaContent):
         # Sum all of the languages
         ja['_all'] = reduce(lambda x, y: x + y, [ja[lkey] for lkey in self.lang_keys])
         zero_mask = ja['_all'].zero_mask()
-        current["_all"] = {"availableTexts": ja['_all'].array()}
+        current["_all"] = {
+            "availableTexts": ja['_all'].array(),
+            "populatedSections": ja['_all'].non_empty_sections() if depth > 1 else []
+        }
 
         # Get derived data for all languages
         for lang, lkey in self.lang_map.items():
@@ -443,8 +457,145 @@ class StateNode(object):
         return en[unit]
 
 
+"""
+Section navigation.
+Next and previous sections are found by bisecting the ordered list of populated section addresses
+that VersionState.refresh() stores for each content node, rather than by traversing availableTexts.
+The lists are cached per process, stamped with the state generation of their book.
+Saving a VersionState, in any process, bumps that generation, so a list is never used after its VersionState changes.
+"""
+_populated_sections_cache = {}  # node title -> (state generation, sections)
+
+
+def state_generation(title):
+    """
+    :return: int that increases whenever the VersionState of title is saved
+    """
+    doc = db.generations.find_one({"_id": u"state:" + title})
+    return doc["generation"] if doc else 0
+
+
+def get_populated_sections(oref):
+    """
+    :return: Ordered list of tuples of the 0 based addresses of the sections of oref's content node that have text,
+    or None if its VersionState predates populatedSections
+    """
+    key = oref.index_node.full_title("en")
+    generation = state_generation(oref.book)
+    entry = _populated_sections_cache.get(key)
+    if entry is None or entry[0] != generation:
+        try:
+            sections = [tuple(s) for s in oref.get_state_node().var("all", "populatedSections")]
+        except KeyError:
+            sections = None
+        entry = _populated_sections_cache[key] = (generation, sections)
+    return entry[1]
+
+
+def next_populated_section(oref, starting_points, forward=True):
+    """
+    Finds the next (or previous) populated section of oref's content node, starting from starting_points.
+    Matches JaggedArray.next_index() / prev_index() on availableTexts, at section level.
+    :param starting_points: list of 0 based indexes.  Forward, the result is at or after this address.  Backward, at or before it, or within it.
+    :return: tuple of 0 based indexes, None if there are no more populated sections, or False if there is no table for this node.
+    """
+    sections = get_populated_sections(oref)
+    if sections is None or (len(sections) and len(sections[0]) != oref.index_node.depth - 1):
+        return False
+    start = tuple(starting_points)
+    if forward:
+        i = bisect_left(sections, start)
+        return sections[i] if i < len(sections) else None
+    else:
+        i = bisect_right(sections, start + (float("inf"),)) - 1  # include sections within a shorter starting address
+        return sections[i] if i >= 0 else None
+
+
+def process_version_state_save_in_generations(vstate, **kwargs):
+    """
+    Bumps the state generation of the VersionState's book.  See state_generation().
+    """
+    text.bump_generation(u"state:" + vstate.title)
+
+
+"""
+Text previews.
+The table of contents shows the first characters of each section of a text, in both languages.
+These are made for simple texts by VersionState.refresh(), and each section is remade when a TextChunk in it is saved.
+"""
+PREVIEW_CHARS = 80
+
+
+def text_preview(en, he):
+    """
+    Returns a jagged array terminating in dicts like {'he': '', 'en': ''} which offers preview
+    text merging what's available in jagged string arrays 'en' and 'he'.
+    """
+    en = [""] if en == [] or not isinstance(en, list) else en
+    he = [""] if he == [] or not isinstance(he, list) else he
+
+    def preview(section):
+        """Returns a preview string for list section"""
+        section = [s for s in section if isinstance(s, basestring) and s]
+        section = " ".join(map(unicode, section))
+        return strip_tags(section[:PREVIEW_CHARS]).strip()
+
+    if not any(isinstance(x, list) for x in en + he):
+        return {'en': preview(en), 'he': preview(he)}
+    else:
+        zipped = map(None, en, he)
+        return [text_preview(x[0], x[1]) for x in zipped]
+
+
+def make_text_preview(en, he, depth):
+    """
+    Returns the list of previews of each section of a whole text, as served by the text preview API.
+    :param en: the English text, as TextChunk would return it for the whole text
+    :param he: the Hebrew text
+    :param depth: depth of the text
+    """
+    if depth == 1:
+        # Give deeper previews for texts with depth 1 (boring to look at otherwise)
+        en, he = [[i] for i in en], [[i] for i in he]
+    preview = text_preview(en, he) if (en or he) else []
+    return preview if isinstance(preview, list) else [preview]
+
+
+def _merge_for_preview(contents):
+    contents = [c for c in contents if isinstance(c, list)]
+    if len(contents) < 2:
+        return contents[0] if contents else []
+    return merge_texts(contents, [None] * len(contents))[0]
+
+
+def update_preview_section(title, section):
+    """
+    Remakes the preview of the top-level section of title at the 0-based index section.
+    A section beyond the stored preview is left for the next VersionState.refresh(), which counts the new section.
+    """
+    if not db.vstate.find_one({"title": title, "preview.{}".format(section): {"$exists": True}}, {"_id": 1}):
+        return
+    proj = {"chapter": {"$slice": [section, 1]}}
+    en, he = [_merge_for_preview([v.chapter for v in VersionSet({"title": title, "language": lang}, proj=proj)])
+              for lang in ["en", "he"]]
+    en, he = [content[0] if content else None for content in (en, he)]
+    if get_index(title).nodes.depth == 1:
+        en, he = [[i] if i is not None else None for i in (en, he)]
+    db.vstate.update({"title": title}, {"$set": {"preview.{}".format(section): text_preview(en, he)}})
+
+
+def process_version_save_in_preview(version, **kwargs):
+    """
+    A TextChunk save passes the top-level section that it changed.
+    Other Version saves are followed by a VersionState refresh, which rebuilds the whole preview.
+    """
+    section = kwargs.get("section")
+    if section is not None:
+        update_preview_section(version.title, section)
+
+
 def refresh_all_states():
-    indices = IndexSet()
+    indices = IndexSet().stream()
 
     for index in indices:
         if index.is_commentary():
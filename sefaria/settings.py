@@ -252,6 +252,32 @@ CACHES = {
     }
 }
 
+# Maximum number of Ref objects held in the in-process Ref cache.
+# The least recently used Refs are evicted once this is exceeded.  0 or None for unbounded.
+REF_CACHE_SIZE = 200000
+
+# Find the links to a Ref with range queries on Link addresses, rather than with a $regex on refs.
+# Off until data/scripts/migrate_link_addresses.py has written the addresses of the existing links,
+# since links without addresses are not found by these queries.
+LINK_ADDRESS_QUERIES = False
+
+# Hold a copy of the links collection in each process, and answer get_links() and the Link Explorer from it.
+# Uses a lot of memory for a large library.  The copy is loaded in the background on first use, with reads going to Mongo meanwhile.
+LINK_GRAPH = False
+
+# File holding a precomputed snapshot of the library's title and node tables, built with
+# data/scripts/build_library_snapshot.py.  Loaded on import when set.  None to always compute the tables.
+LIBRARY_SNAPSHOT_PATH = None
+
+# Maximum number of TextFamily texts held in each process's text cache.  0 turns the cache off.
+# Entries are dropped whenever a Version of their book is saved or deleted.
+TEXT_FAMILY_CACHE_SIZE = 2000
+
+# Whether TextFamily, and the reader views, make their independent database fetches in parallel by default.
+# Each call can override this.  TEXT_FAMILY_THREADS is the size of the thread pool they share in each process.
+TEXT_FAMILY_CONCURRENT = False
+TEXT_FAMILY_THREADS = 8
+
 # Grab enviornment specific settings from a file which
 # is left out of the repo. 
 from local_settings import *
@@ -52,10 +52,15 @@ def reset_texts_cache():
     delete_template_cache('texts_list')
     delete_template_cache('leaderboards')
     model.Ref.clear_cache()
+    model.text.JaggedArrayNode.clear_regex_cache()
     model.library.local_cache = {}
+    model.text.text_family_cache.clear()
+    model.merged_text.reset_merged_keys()
 
 
 def process_index_change_in_cache(indx, **kwargs):
+    import sefaria.model as model
+    model.library.bump_index_generation()
     reset_texts_cache()
 
 def get_cache_elem(key):
@@ -15,6 +15,12 @@ class Test_get_links():
         y = len(get_links("Exodus 2:4"))
         assert len(get_links("Exodus 2:3-4")) == (x+y)
 
+    def test_get_links_text(self):
+        for link in get_links("Genesis 1:1"):
+            text = TextFamily(Ref(link["ref"]), context=0, commentary=False, pad=False)
+            assert link["text"] == text.text
+            assert link["he"] == text.he
+
 
 class Test_links_from_get_text():
 
@@ -22,4 +28,41 @@ class Test_links_from_get_text():
         t1 = TextFamily(Ref("Exodus ")).contents()
         t2 = TextFamily(Ref("Exodus 1")).contents()
 
-        assert len(t1["commentary"]) == len(t2["commentary"])
\ No newline at end of file
+        assert len(t1["commentary"]) == len(t2["commentary"])
+
+class Test_add_many():
+
+    def test_add_many(self):
+        import sefaria.tracker as tracker
+        from sefaria.model.link import ensure_link_key_index
+        ensure_link_key_index()
+        existing = Link({"refs": ["Job 3:2", "Pirkei Avot 1:1"], "type": "test", "auto": True}).save()
+        attrs = [
+            {"refs": ["Job 3:2", "Pirkei Avot 1:1"], "type": "test", "auto": True},  # duplicate of an existing link
+            {"refs": ["Job 3:2", "Pirkei Avot 1"], "type": "test", "auto": True},    # less precise than an existing link
+            {"refs": ["Job 3:3", "Pirkei Avot 1:2"], "type": "test", "auto": True},
+            {"refs": ["Pirkei Avot 1:2", "Job 3:3"], "type": "test", "auto": True},  # duplicate within the batch
+        ]
+        history_query = {"rev_type": "add link", "new.refs": ["Job 3:3", "Pirkei Avot 1:2"]}
+        logged = HistorySet(history_query).count()
+        links = tracker.add_many(1, Link, attrs)
+        try:
+            assert [l.refs for l in links] == [["Job 3:3", "Pirkei Avot 1:2"]]
+            assert Link().load({"refs": ["Job 3:3", "Pirkei Avot 1:2"]})
+            assert HistorySet(history_query).count() == logged + 1
+        finally:
+            for l in links:
+                l.delete()
+            existing.delete()
+
+
+class Test_rebuild_links_from_text():
+
+    def test_text_segments(self):
+        from sefaria.helper.link import _text_segments
+        segments = list(_text_segments(Ref("Genesis"), [["a", ""], [], ["b", "c"]]))
+        assert segments == [("Genesis 1:1", "a"), ("Genesis 3:1", "b"), ("Genesis 3:2", "c")]
+
+    def test_citations_in_segments(self):
+        from sefaria.helper.link import _citations_in_segments
+        assert _citations_in_segments([("Job 3:2", "en", "As it says in Genesis 1:3"), ("Job 3:3", "en", "Nothing")]) == [["Genesis 1:3"], []]
@@ -68,6 +68,21 @@ def add(user, klass, attrs, **kwargs):
     return obj
 
 
+def add_many(user, klass, attrs_list, **kwargs):
+    """
+    Creates many new instances with bulk inserts, and records their history together.
+    Unlike add(), doesn't look for existing records to update.  Instances that would duplicate existing records are skipped.
+    :param klass: The class we are instanciating
+    :param attrs_list: List of dictionaries, each with the attributes of one instance
+    :param user:  Integer user id
+    :return: list of the instances that were created
+    """
+    assert issubclass(klass, model.abstract.AbstractMongoRecord)
+    objs = klass.insert_many([klass(attrs) for attrs in attrs_list])
+    model.log_add_many(user, klass, [obj.contents() for obj in objs], **kwargs)
+    return objs
+
+
 def update(user, klass, attrs, **kwargs):
     assert issubclass(klass, model.abstract.AbstractMongoRecord)
     if getattr(klass, "criteria_override_field", None) and attrs.get(klass.criteria_override_field):
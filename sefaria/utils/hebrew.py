@@ -100,11 +100,25 @@ def heb_string_to_int(n):
 def decode_hebrew_numeral(n):
 	"""
 	Takes any string representing a Hebrew numeral and returns it integer value.
+	Numerals up to HEBREW_NUMERAL_TABLE_MAX are looked up in a precomputed table.
 
 	>>> decode_hebrew_numeral(u'ה׳תשס״ד')
 	5764
 	"""
 
+	if _decode_table is None:
+		_build_numeral_tables()
+	try:
+		return _decode_table[n]
+	except KeyError:
+		return _decode_hebrew_numeral(n)
+
+
+def _decode_hebrew_numeral(n):
+	"""
+	Decodes a Hebrew numeral without the precomputed table.
+	"""
+
 	t = map(heb_string_to_int, split_thousands(n))  # split and convert to numbers
 	t = map(lambda (E, num): pow(10, 3 * E) * num, enumerate(t))  # take care of thousands and add
 	return sum(t)
@@ -242,7 +256,7 @@ def sanitize(input_string, punctuation=True):
 	)
 
 	for wrong, right in replacement_pairs:
-		input_string = re.sub(wrong, right, input_string)
+		input_string = input_string.replace(wrong, right)
 
 	if punctuation:
 		# add gershayim at end
@@ -280,6 +294,20 @@ def encode_hebrew_numeral(n, punctuation=True):
 	This function is not intended for numbers 1,000,000 or more, as there is not currently
 	an established convention and there can be ambiguity.  This can be the same for numbers like
 	2000 (which would be displayed as bet-geresh) and should instead possibly use words, like "bet elef."
+
+	Numbers up to HEBREW_NUMERAL_TABLE_MAX are looked up in a precomputed table.
+	"""
+
+	if 0 < n <= HEBREW_NUMERAL_TABLE_MAX:
+		if _encode_tables is None:
+			_build_numeral_tables()
+		return _encode_tables[bool(punctuation)][n]
+	return _encode_hebrew_numeral(n, punctuation)
+
+
+def _encode_hebrew_numeral(n, punctuation=True):
+	"""
+	Encodes a Hebrew numeral without the precomputed tables.
 	"""
 
 	if n < 1200:
@@ -300,6 +328,37 @@ def encode_hebrew_numeral(n, punctuation=True):
 	return ret
 
 
+########## PRECOMPUTED TABLES #############
+
+# Numerals from 1 to HEBREW_NUMERAL_TABLE_MAX are encoded and decoded by lookup in tables, built on first use.
+# Other numbers and strings go through the functions above.
+HEBREW_NUMERAL_TABLE_MAX = 10000
+
+_encode_tables = None  # {punctuation: list of encoded strings, indexed by integer}
+_decode_table = None   # {encoded string: integer}, for strings with and without punctuation, and with ascii quotes for geresh and gershayim
+
+
+def _build_numeral_tables():
+	global _encode_tables, _decode_table
+
+	small = [encode_small_hebrew_numeral(n) for n in range(1200)]
+	encode_tables = {True: [None], False: [None]}
+	decode_table = {}
+	for n in range(1, HEBREW_NUMERAL_TABLE_MAX + 1):
+		# As in _encode_hebrew_numeral(): from 1200, thousands are encoded separately, followed by a geresh
+		raw = small[n] if n < 1200 else small[n // 1000] + GERESH + small[n % 1000]
+		for punctuation in (False, True):
+			encoded = sanitize(raw, punctuation)
+			encode_tables[punctuation].append(encoded)
+			for variant in (encoded, encoded.replace(GERSHAYIM, u'"').replace(GERESH, u"'")):
+				# Where strings coincide (e.g. 2 and 2000) keep the smaller number, as _decode_hebrew_numeral() does
+				decode_table.setdefault(variant, n)
+
+	# Assign when complete, so that other threads never see partial tables
+	_decode_table = decode_table
+	_encode_tables = encode_tables
+
+
 def strip_nikkud(rawString):
 	return rawString.replace(r"[\u0591-\u05C7]", "");
 
@@ -59,6 +59,25 @@ class TestSpecificInOutTests():
         assert u'טז׳' == e(16000)
 
 
+class TestNumeralTables(object):
+
+    def test_tables_match_algorithm(self):
+        for x in range(1, h.HEBREW_NUMERAL_TABLE_MAX + 1):
+            for punctuation in (True, False):
+                encoded = e(x, punctuation)
+                assert encoded == h._encode_hebrew_numeral(x, punctuation)
+                assert d(encoded) == h._decode_hebrew_numeral(encoded)
+
+    def test_ascii_quotes(self):
+        assert d(u'ל"ג') == 33
+        assert d(u"ה'תשס\"ד") == 5764
+
+    def test_fallback(self):
+        assert u'א׳׳ה' == e(1000005)
+        assert d(u'יה') == 15
+        assert d(u'יא׳א') == 11001
+
+
 class TestFunctionTests(object):
 
     def test_break_int_magnitudes(self):
@@ -214,7 +214,8 @@ def rebuild_citation_links(request, title):
 @staff_member_required
 def cache_stats(request):
     resp = {
-        'ref_cache_size': model.Ref.cache_size()
+        'ref_cache_size': model.Ref.cache_size(),
+        'ref_cache_stats': model.Ref.cache_stats()
     }
     return jsonResponse(resp)
 
@@ -222,7 +223,8 @@ def cache_stats(request):
 @staff_member_required
 def cache_dump(request):
     resp = {
-        'ref_cache_dump': model.Ref.cache_dump()
+        'ref_cache_dump': model.Ref.cache_dump(),
+        'ref_cache_stats': model.Ref.cache_stats()
     }
     return jsonResponse(resp)
 